@@ -5,6 +5,12 @@ No sidebar, just header, hero, features, and footer.
 """
 import streamlit as st
 
+from services.rag.model_registry import start_warmup
+from utils.instrumentation import begin_page, end_page
+
+_instrumentation = begin_page("landing")
+start_warmup()
+
 # Configure page - MUST be first
 st.set_page_config(
     page_title="Personal Finance Coach - Your Path to Financial Freedom",
@@ -210,3 +216,5 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+end_page("landing", _instrumentation)
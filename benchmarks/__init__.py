@@ -0,0 +1 @@
+# Benchmarks package - load tests and performance tooling (not imported by the app)
@@ -0,0 +1,106 @@
+"""
+Backtest engine (services.backtest): loading price files and running each
+strategy over every instrument and start month, vs a per-window Python
+loop.
+
+Writes --instruments synthetic daily NAV series (--years of business
+days, listing dates staggered) as CSVs to a temp directory, loads them
+into a PricePanel, then times Backtester.run() per strategy at a
+--horizon in months. The loop baseline is timed on --sample windows and
+scaled to the full run.
+
+Usage:
+    python -m benchmarks.bench_backtest --instruments 500 --years 15 --horizon 60
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from benchmarks.bench_vector_index import _report
+from services.backtest import STRATEGIES, Backtester, PricePanel, money_weighted_return
+
+
+def _write_prices(root: Path, instruments: int, years: int, rng: np.random.Generator) -> None:
+    days = np.arange(np.datetime64("2025-01-01") - 365 * years, np.datetime64("2025-01-01"))
+    days = days[np.is_busday(days)]
+    for i in range(instruments):
+        asset_type = ("mf", "etf", "stock", "gold")[i % 4]
+        own = days[rng.integers(0, len(days) // 3):]
+        prices = 10 * np.exp(np.cumsum(rng.normal(0.0004, 0.012, len(own))))
+        folder = root / asset_type
+        folder.mkdir(exist_ok=True)
+        with open(folder / f"instrument_{i}.csv", "w") as f:
+            f.write("date,price\n")
+            f.writelines(f"{d},{p:.4f}\n" for d, p in zip(own.astype(str), prices))
+
+
+def _loop_window(prices: np.ndarray, strategy: str, amount: float, target_growth: float = 0.12):
+    """One window the obvious way: month by month."""
+    horizon = len(prices) - 1
+    units, flows = 0.0, []
+    growth = (1 + target_growth) ** (1 / 12) - 1
+    for k in range(horizon):
+        if strategy == "lump_sum":
+            buy = amount if k == 0 else 0.0
+        elif strategy == "sip":
+            buy = amount
+        else:
+            target = amount * sum((1 + growth) ** j for j in range(k + 1))
+            buy = max(target - units * prices[k], 0.0)
+        units += buy / prices[k]
+        flows.append(buy)
+    final_value = units * prices[-1]
+    return final_value, money_weighted_return(np.array(flows), np.array(final_value))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instruments", type=int, default=500)
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--horizon", type=int, default=60, help="months")
+    parser.add_argument("--sample", type=int, default=200, help="windows timed for the loop baseline")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_prices(Path(tmp), args.instruments, args.years, rng)
+        start = time.perf_counter()
+        panel = PricePanel.load(tmp)
+        load_ms = (time.perf_counter() - start) * 1000
+    panel = panel.add_fixed_deposit("fd/bank_5y", 0.07)
+    grid, monthly = panel.monthly()
+    print(f"{len(panel.instruments)} instruments x {len(panel.dates)} days, loaded in {load_ms:.0f} ms\n")
+
+    for strategy in STRATEGIES:
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = Backtester.run(panel, strategy, 10000, args.horizon)
+            samples.append((time.perf_counter() - start) * 1000)
+        windows = int(np.isfinite(result["cagr"]).sum())
+        _report(f"{strategy} vectorized", samples)
+
+        valid = np.argwhere(np.isfinite(result["cagr"]))
+        if not len(valid):
+            print(f"{'':<28} no {args.horizon}-month windows in {args.years} years; loop skipped")
+            continue
+        picks = valid[rng.choice(len(valid), size=min(args.sample, len(valid)), replace=False)]
+        start = time.perf_counter()
+        worst = 0.0
+        for row, s in picks:
+            final_value, cagr = _loop_window(monthly[row, s:s + args.horizon + 1], strategy, 10000)
+            worst = max(worst, abs(float(cagr) - result["cagr"][row, s]))
+        per_window = (time.perf_counter() - start) * 1000 / len(picks)
+        print(f"{'':<28} {windows} windows; loop ~{per_window * windows:.0f} ms for all "
+              f"({per_window:.3f} ms/window), max |cagr diff| {worst:.1e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Dashboard chart cost: four separate gauge figures rebuilt every rerun vs
+one cached gauge row (utils.charts).
+
+- figures: build + serialize the way st.plotly_chart does (to_dict, then
+  to_json), reporting time and spec bytes per dashboard render
+- page: full dashboard script runs through AppTest with a sample analysis,
+  reporting render time and the bytes of all chart elements sent
+
+Usage:
+    python -m benchmarks.bench_dashboard_charts --renders 200
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from benchmarks.bench_vector_index import _report
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _sample_guest_data():
+    from services.calculator import FinancialCalculator
+
+    snapshot = {'monthly_income': 120_000, 'monthly_expenses': 70_000, 'current_savings': 250_000}
+    assets = [{'type': 'mutual_fund', 'name': f'Fund {i}', 'value': 50_000 + i * 1000} for i in range(10)]
+    liabilities = [{'type': 'credit_card', 'name': 'Card', 'outstanding': 80_000, 'interest_rate': 0.36}]
+    analysis = FinancialCalculator.analyze_financial_health(snapshot, assets, liabilities)
+    return {'snapshot': snapshot, 'assets': assets, 'liabilities': liabilities, 'goals': [],
+            'plan': None, 'analysis': analysis}
+
+
+def _figure_bench(renders: int, guest_data) -> None:
+    import plotly.graph_objects as go
+    import plotly.io
+    import plotly.tools
+
+    from utils import charts
+
+    snapshot, metrics, scores = guest_data['snapshot'], guest_data['analysis']['metrics'], guest_data['analysis']['scores']
+
+    def serialize(fig) -> int:
+        # Same steps as st.plotly_chart
+        figure = plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True)
+        return len(plotly.io.to_json(figure, validate=False))
+
+    def separate() -> int:
+        figures = [go.Figure(charts._gauge(scores[key], title)) for key, title in charts.GAUGES]
+        for fig in figures:
+            fig.update_layout(height=200, margin=dict(l=20, r=20, t=40, b=20))
+        figures.append(charts.income_expense_chart.__wrapped__(
+            snapshot['monthly_income'], snapshot['monthly_expenses'], metrics['monthly_surplus']))
+        figures.append(charts.assets_liabilities_chart.__wrapped__(metrics['total_assets'], metrics['total_liabilities']))
+        return sum(serialize(fig) for fig in figures)
+
+    def cached() -> int:
+        figures = [
+            charts.health_gauges(scores),
+            charts.income_expense_chart(snapshot['monthly_income'], snapshot['monthly_expenses'],
+                                        metrics['monthly_surplus']),
+            charts.assets_liabilities_chart(metrics['total_assets'], metrics['total_liabilities']),
+        ]
+        return sum(serialize(fig) for fig in figures)
+
+    def timed(fn: Callable[[], int]):
+        samples, size = [], 0
+        for _ in range(renders):
+            start = time.perf_counter()
+            size = fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples, size
+
+    for name, fn in (("6 figures, rebuilt", separate), ("3 figures, cached", cached)):
+        samples, size = timed(fn)
+        _report(name, samples)
+        print(f"{'':<28} spec bytes per render: {size / 1024:.1f} KB")
+
+
+def _page_bench(renders: int, guest_data) -> None:
+    from streamlit.testing.v1 import AppTest
+
+    samples, chart_bytes = [], 0
+    for _ in range(renders):
+        at = AppTest.from_file(str(ROOT / "pages" / "2_dashboard.py"), default_timeout=30)
+        at.session_state["guest_data"] = guest_data
+        start = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - start) * 1000)
+        charts_sent = at.get("plotly_chart")
+        chart_bytes = sum(el.proto.ByteSize() for el in charts_sent)
+    _report("dashboard page", samples)
+    print(f"{'':<28} {len(charts_sent)} chart elements, {chart_bytes / 1024:.1f} KB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=200, help="figure renders to time")
+    parser.add_argument("--page-renders", type=int, default=20, help="full dashboard runs to time")
+    args = parser.parse_args(argv)
+
+    guest_data = _sample_guest_data()
+    _figure_bench(args.renders, guest_data)
+    print()
+    _page_bench(args.page_renders, guest_data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
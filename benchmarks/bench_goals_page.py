@@ -0,0 +1,73 @@
+"""
+Goals page rerun time as the number of goals grows.
+
+Runs pages/3_goals.py through AppTest with N generated goals and a sample
+analysis (so realistic-completion projections are shown), then times
+reruns. Target: under 100 ms at 500 goals.
+
+Usage:
+    python -m benchmarks.bench_goals_page --goals 10 100 500 --reruns 20
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.bench_vector_index import _report
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _guest_data(goals: int):
+    from services.calculator import FinancialCalculator
+
+    snapshot = {'monthly_income': 150_000, 'monthly_expenses': 90_000, 'current_savings': 300_000}
+    today = datetime.now()
+    return {
+        'snapshot': snapshot,
+        'assets': [],
+        'liabilities': [],
+        'analysis': FinancialCalculator.analyze_financial_health(snapshot, [], []),
+        'goals': [
+            {
+                'name': f"Goal {i}",
+                'target_amount': 100_000 + i * 5_000,
+                'current_progress': (i * 7_919) % 100_000,
+                'target_date': (today + timedelta(days=30 * (6 + i % 60))).strftime("%Y-%m-%d"),
+                'category': "Medium-term (3-5 years)",
+                'required_monthly': 5_000,
+                'created_at': today.strftime("%Y-%m-%d"),
+            }
+            for i in range(goals)
+        ],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--goals", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    from streamlit.testing.v1 import AppTest
+
+    for count in args.goals:
+        at = AppTest.from_file(str(ROOT / "pages" / "3_goals.py"), default_timeout=60)
+        at.session_state["guest_data"] = _guest_data(count)
+        at.run()
+        if len(at.exception):
+            print(f"{count} goals: {at.exception[0].value}")
+            return 1
+        samples = []
+        for _ in range(args.reruns):
+            start = time.perf_counter()
+            at.run()
+            samples.append((time.perf_counter() - start) * 1000)
+        _report(f"{count} goals", samples)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Guest-to-account migration: GuestMigrationService.migrate() vs saving the
+same guest data with the piecemeal DataService calls.
+
+For each --rows size, a guest session with that many assets, liabilities
+and goals (and an analysis) is written to a new account on a throwaway
+SQLite database, and again to an account that already holds half of
+those rows with other values (the login case: updates, inserts and kept
+rows). Reports wall time, SQL statements executed and transactions.
+
+Usage:
+    python -m benchmarks.bench_guest_migration --rows 10,100,1000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from benchmarks.bench_user_saves import _new_user
+
+
+def _guest(rows: int, scale: float = 1.0):
+    from models.session import Asset, Goal, GuestData, Liability, Snapshot
+    from services.calculator import FinancialCalculator
+
+    guest = GuestData.new()
+    guest['snapshot'] = Snapshot(monthly_income=150_000, monthly_expenses=80_000, current_savings=200_000)
+    guest['assets'] = [Asset(type="mutual_fund", name=f"Fund {i}", value=(10_000 + i) * scale)
+                       for i in range(rows)]
+    guest['liabilities'] = [Liability(type="credit_card", name=f"Card {i}", outstanding=(20_000 + i) * scale,
+                                      interest_rate=0.36) for i in range(rows)]
+    guest['goals'] = [Goal(name=f"Goal {i}", target_amount=(500_000 + i) * scale, target_date="2030-01-01",
+                           category="long_term", priority=1) for i in range(rows)]
+    guest['analysis'] = FinancialCalculator.analyze_financial_health(
+        guest['snapshot'], guest['assets'], guest['liabilities'])
+    return guest
+
+
+def _piecemeal(user_id: str, guest) -> None:
+    from services.data_service import DataService
+    from services.plan_generator import PlanGenerator
+
+    data = guest.to_dict()
+    DataService.save_snapshot(user_id, data['snapshot'])
+    DataService.save_assets(user_id, data['assets'])
+    DataService.save_liabilities(user_id, data['liabilities'])
+    DataService.save_goals(user_id, data['goals'])
+    DataService.save_plan(user_id, PlanGenerator.generate_plan(
+        data['snapshot'], data['assets'], data['liabilities'], data['goals'], analysis=data['analysis']))
+
+
+def _migrate(user_id: str, guest) -> None:
+    from services.guest_migration import GuestMigrationService
+
+    if GuestMigrationService.migrate(user_id, guest) is None:
+        raise RuntimeError("migration failed")
+
+
+def _measure(fn: Callable[[], None]) -> Tuple[float, int, int]:
+    """(milliseconds, statements, transactions committed) while fn runs."""
+    from sqlalchemy import event
+
+    from models.database import get_engine
+    from utils.query_profiler import profile_queries
+
+    commits = []
+    engine = get_engine()
+
+    def on_commit(conn):
+        commits.append(1)
+
+    event.listen(engine, "commit", on_commit)
+    try:
+        with profile_queries("migration") as profile:
+            start = time.perf_counter()
+            fn()
+            elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        event.remove(engine, "commit", on_commit)
+    return elapsed, profile.count, len(commits)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10,100,1000", help="comma-separated rows per collection")
+    args = parser.parse_args(argv)
+
+    # Throwaway database; must be set before config/models are imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    import models.user, models.financial, models.plans  # noqa: F401,E401  (register tables)
+    from models.database import init_db
+
+    init_db()
+    print(f"{'rows/collection':<16} {'account':<9} {'path':<10} {'ms':>9} {'statements':>11} {'transactions':>13}")
+    for rows in (int(r) for r in args.rows.split(",")):
+        guest = _guest(rows)
+        existing = _guest(rows // 2, scale=0.5)
+        for account in ("new", "existing"):
+            for name, path in (("piecemeal", _piecemeal), ("migrate", _migrate)):
+                user_id = _new_user()
+                if account == "existing":
+                    _migrate(user_id, existing)
+                elapsed, statements, commits = _measure(lambda: path(user_id, guest))
+                print(f"{rows:<16} {account:<9} {name:<10} {elapsed:>9.1f} {statements:>11} {commits:>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
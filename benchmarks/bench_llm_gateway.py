@@ -0,0 +1,84 @@
+"""
+Throughput and latency of the LLM gateway against the local stand-in.
+
+Starts benchmarks.fake_llm in-process, then fires --requests prompts from
+--callers threads (as concurrent Streamlit sessions would). --duplicates
+sets the share of callers asking an identical prompt, which the gateway
+should coalesce into one upstream request. No network or API key needed.
+
+Usage:
+    python -m benchmarks.bench_llm_gateway --requests 200 --callers 32 --duplicates 0.5
+"""
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from benchmarks.fake_llm import serve
+from benchmarks.loadtest import percentile
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--callers", type=int, default=32, help="concurrent calling threads")
+    parser.add_argument("--duplicates", type=float, default=0.5, help="share of identical prompts")
+    parser.add_argument("--concurrency", type=int, default=8, help="gateway in-flight limit")
+    parser.add_argument("--ttft-ms", type=float, default=100.0)
+    parser.add_argument("--token-ms", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    from services.llm_gateway import LLMGateway, LLMError
+
+    server = serve(0, args.ttft_ms, args.token_ms)
+    gateway = LLMGateway(base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="",
+                         model="fake-llm-1", max_concurrency=args.concurrency, timeout=args.timeout)
+
+    rng = random.Random(0)
+    prompts = [
+        [{"role": "user", "content": "Why build an emergency fund first?" if rng.random() < args.duplicates
+          else f"Explain recommendation {i}"}]
+        for i in range(args.requests)
+    ]
+
+    first_token: List[float] = []
+    total: List[float] = []
+    errors = 0
+
+    def call(messages):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            stream = gateway.stream(messages)
+            first = None
+            for _ in stream:
+                if first is None:
+                    first = time.perf_counter() - start
+            first_token.append((first or 0.0) * 1000)
+            total.append((time.perf_counter() - start) * 1000)
+        except LLMError:
+            errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.callers) as pool:
+        list(pool.map(call, prompts))
+    elapsed = time.perf_counter() - started
+    gateway.close()
+    server.shutdown()
+
+    print(f"{args.requests} requests from {args.callers} callers, concurrency limit {args.concurrency}, "
+          f"{args.duplicates:.0%} duplicate prompts")
+    print(f"throughput: {args.requests / elapsed:.1f} req/s over {elapsed:.2f}s, errors: {errors}")
+    print(f"upstream requests: {gateway.upstream_requests} ({gateway.coalesced_requests} coalesced)")
+    for name, samples in (("time to first token", first_token), ("total", total)):
+        if samples:
+            print(f"{name:<20} p50={percentile(samples, 50):8.1f} ms  p95={percentile(samples, 95):8.1f} ms  "
+                  f"p99={percentile(samples, 99):8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
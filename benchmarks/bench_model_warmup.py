@@ -0,0 +1,60 @@
+"""
+Startup-to-first-response with and without background model warm-up.
+
+Each mode runs in a fresh process: start -> (warm-up) -> simulated user
+think time -> first query embedding. With warm-up the model loads during
+the think time, so the first response only waits for whatever is left.
+
+Usage:
+    python -m benchmarks.bench_model_warmup --model all-MiniLM-L6-v2 --think-time 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+from services.rag import model_registry
+from services.rag.embeddings import get_embedder
+if sys.argv[1] == "warm":
+    model_registry.start_warmup()
+time.sleep(float(sys.argv[2]))
+t1 = time.perf_counter()
+get_embedder().encode(["why build an emergency fund first?"])
+t2 = time.perf_counter()
+print(json.dumps({"first_response_s": t2 - t0, "wait_after_think_s": t2 - t1,
+                  "status": model_registry.get_registry().status()}))
+"""
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="embedding model (default: settings.EMBEDDING_MODEL)")
+    parser.add_argument("--think-time", type=float, default=2.0, help="seconds before the first question")
+    args = parser.parse_args(argv)
+
+    env = {**os.environ, "LLM_ENABLED": "true", "MODEL_WARMUP_ENABLED": "true"}
+    if args.model:
+        env["EMBEDDING_MODEL"] = args.model
+
+    for mode in ("lazy", "warm"):
+        result = subprocess.run([sys.executable, "-c", _SCRIPT, mode, str(args.think_time)], cwd=ROOT, env=env,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"[{mode}] failed:\n{result.stderr.strip().splitlines()[-1]}")
+            return 1
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"[{mode}] startup to first response {timings['first_response_s']:.2f}s "
+              f"(waited {timings['wait_after_think_s']:.2f}s after {args.think_time:.1f}s think time)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Per-interaction server time and websocket payload on the onboarding page,
+full-page rerun vs fragment rerun, for a user with many holdings.
+
+Starts `streamlit run pages/1_onboarding.py` headless and talks to it the
+way the browser does (protobuf BackMsg / ForwardMsg over the websocket).
+After seeding --holdings rows (split between assets and debts), each
+measured interaction deletes an asset and adds it back:
+
+- before: a whole-script rerun followed by a second one, which is what
+  the button handler's st.rerun() cost before the lists were fragments
+- full-page rerun: one whole-script rerun (callbacks, no st.rerun())
+- fragment rerun: only the asset-list fragment reruns
+
+Time is from sending the rerun to receiving script_finished; payload is
+the total size of the ForwardMsg frames received for that rerun.
+
+Requires the `websockets` package (benchmark only).
+
+Usage:
+    python -m benchmarks.bench_onboarding_fragments --holdings 120 --interactions 30
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.loadtest import percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port: int) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "pages/1_onboarding.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Streamlit server did not start")
+
+
+class Browser:
+    """Minimal websocket client: tracks widget IDs and replays widget state."""
+
+    def __init__(self, url: str):
+        from websockets.sync.client import connect
+
+        self.ws = connect(url, max_size=None)
+        self.widgets: Dict[str, Tuple[str, str]] = {}  # key or label -> (widget id, fragment id)
+
+    def rerun(self, values: Dict[str, object], trigger: Optional[str] = None,
+              fragment: Optional[str] = None) -> Tuple[float, int]:
+        """
+        Send one rerun with the given widget values; returns (ms, bytes received).
+
+        values / trigger name widgets by key (or label for form submit buttons);
+        fragment names a widget whose fragment should rerun alone.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        states = msg.rerun_script.widget_states.widgets
+        for name, value in values.items():
+            state = states.add()
+            state.id = self.widgets[name][0]
+            if isinstance(value, str):
+                state.string_value = value
+            else:
+                state.int_value = value
+        if trigger:
+            state = states.add()
+            state.id = self.widgets[trigger][0]
+            state.trigger_value = True
+        if fragment:
+            msg.rerun_script.fragment_id = self.widgets[fragment][1]
+
+        start = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        received = 0
+        while True:
+            raw = self.ws.recv()
+            received += len(raw)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                widget = getattr(element, element.WhichOneof("type"))
+                widget_id = getattr(widget, "id", "")
+                if widget_id:
+                    # "$$ID-<hash>-<user key>", "-None" without a key, "-FormSubmitter:..." for submits
+                    key = widget_id.split("-", 2)[2]
+                    if key == "None" or key.startswith("FormSubmitter:"):
+                        key = widget.label
+                    self.widgets[key] = (widget_id, fwd.delta.fragment_id)
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return (time.perf_counter() - start) * 1000, received
+
+    def close(self) -> None:
+        self.ws.close()
+
+
+def _summary(name: str, times: List[float], sizes: List[int]) -> None:
+    print(f"{name:<24} p50={percentile(times, 50):7.1f} ms  p95={percentile(times, 95):7.1f} ms  "
+          f"payload={sum(sizes) / len(sizes) / 1024:8.1f} KB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--holdings", type=int, default=120)
+    parser.add_argument("--interactions", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("This benchmark needs the websockets package: pip install websockets")
+        return 1
+
+    port = _free_port()
+    server = _start_server(port)
+    browser = Browser(f"ws://127.0.0.1:{port}/_stcore/stream")
+    try:
+        browser.rerun({})
+        browser.rerun({"💵 Monthly Income (₹)": 100_000}, trigger="➡️ Next: Add Assets & Debts")
+
+        def add(i: int, fragment: Optional[str]) -> Tuple[float, int]:
+            return browser.rerun({"asset_name": f"Fund {i}", "asset_value": 10_000 + i},
+                                 trigger="➕ Add Asset", fragment=fragment)
+
+        assets = args.holdings - args.holdings // 2
+        for i in range(assets):
+            add(i, "➕ Add Asset")
+        for i in range(args.holdings - assets):
+            browser.rerun({"debt_name": f"Loan {i}", "debt_outstanding": 50_000 + i},
+                          trigger="➕ Add Debt", fragment="➕ Add Debt")
+        print(f"seeded {assets} assets, {args.holdings - assets} debts\n")
+
+        def interaction(mode: str, i: int) -> Tuple[float, int]:
+            fragment = "➕ Add Asset" if mode == "fragment rerun" else None
+            steps = [lambda: browser.rerun({}, trigger="del_asset_0", fragment=fragment),
+                     lambda: add(assets + i, fragment)]
+            ms = size = 0
+            for step in steps:
+                for _ in range(2 if mode == "before" else 1):
+                    step_ms, step_size = step()
+                    ms, size = ms + step_ms, size + step_size
+            return ms / len(steps), size // len(steps)
+
+        results = {}
+        for mode in ("before", "full-page rerun", "fragment rerun"):
+            samples = [interaction(mode, i) for i in range(args.interactions)]
+            results[mode] = ([ms for ms, _ in samples], [size for _, size in samples])
+            _summary(mode, *results[mode])
+
+        before, frag = results["before"], results["fragment rerun"]
+        print(f"\nfragment vs before: {percentile(before[0], 50) / max(percentile(frag[0], 50), 1e-9):.1f}x "
+              f"less time (p50), {sum(before[1]) / max(sum(frag[1]), 1):.1f}x less payload per interaction")
+    finally:
+        browser.close()
+        server.terminate()
+        server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
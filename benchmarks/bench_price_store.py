@@ -0,0 +1,114 @@
+"""
+Price store (services.price_store) vs re-parsing CSVs.
+
+Writes --funds synthetic daily NAV histories (--years of business days)
+as mf/<scheme code>.csv, then reports:
+
+- initial ingest of the CSVs into a store, and its size on disk
+- a daily AMFI NAVAll-style file with one new NAV per scheme: ingest,
+  and ingesting the same file again (nothing new)
+- one fund's last year: parsing its CSV vs a store slice
+- a backtest panel of every fund: PricePanel.load() from the CSVs vs
+  PricePanel.from_store(), for the full history and the last 5 years
+
+Usage:
+    python -m benchmarks.bench_price_store --funds 500 --years 15
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from benchmarks.bench_vector_index import _report
+from models.financial import AssetType
+from services.backtest import PricePanel
+from services.price_store import PriceStore, read_price_csv
+
+FIRST_CODE = 100000
+
+
+def _write_history(root: Path, funds: int, years: int, rng: np.random.Generator) -> np.ndarray:
+    days = np.arange(np.datetime64("2025-01-01") - 365 * years, np.datetime64("2025-01-01"))
+    days = days[np.is_busday(days)]
+    folder = root / "mf"
+    folder.mkdir(parents=True)
+    for i in range(funds):
+        own = days[rng.integers(0, len(days) // 3):]
+        navs = 10 * np.exp(np.cumsum(rng.normal(0.0004, 0.012, len(own))))
+        with open(folder / f"{FIRST_CODE + i}.csv", "w") as f:
+            f.write("date,price\n")
+            f.writelines(f"{d},{p:.4f}\n" for d, p in zip(own.astype(str), navs))
+    return days
+
+
+def _write_navall(path: Path, funds: int, day: np.datetime64, rng: np.random.Generator) -> None:
+    date = day.astype(object).strftime("%d-%b-%Y")
+    with open(path, "w") as f:
+        f.write("Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date\n\n")
+        f.write("Open Ended Schemes(Equity Scheme - Flexi Cap Fund)\n\nBench Mutual Fund\n\n")
+        f.writelines(f"{FIRST_CODE + i};INF000000000;-;Bench Fund {i} - Direct - Growth;{rng.uniform(10, 100):.4f};{date}\n"
+                     for i in range(funds))
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--funds", type=int, default=500)
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_dir, store_dir = Path(tmp) / "prices", Path(tmp) / "store"
+        days = _write_history(csv_dir, args.funds, args.years, rng)
+
+        store = PriceStore(str(store_dir))
+        start = time.perf_counter()
+        stats = store.ingest_directory(str(csv_dir))
+        size = sum(p.stat().st_size for p in store_dir.rglob("*") if p.is_file())
+        print(f"initial ingest: {stats['appended']} points from {stats['instruments']} CSVs in "
+              f"{time.perf_counter() - start:.2f} s, {size / 2**20:.1f} MB on disk\n")
+
+        navall = Path(tmp) / "NAVAll.txt"
+        _write_navall(navall, args.funds, days[-1] + 3, rng)
+        start = time.perf_counter()
+        stats = store.ingest_amfi(str(navall))
+        print(f"daily NAVAll ingest: {stats['appended']} new NAVs in {(time.perf_counter() - start) * 1000:.0f} ms")
+        start = time.perf_counter()
+        stats = store.ingest_amfi(str(navall))
+        print(f"same file again: {stats['appended']} new, {stats['skipped']} skipped in "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+        reader = PriceStore(str(store_dir))
+        key, path = f"mf/{FIRST_CODE}", csv_dir / "mf" / f"{FIRST_CODE}.csv"
+        year_ago = days[-1] - 365
+
+        def from_csv():
+            dates, navs = read_price_csv(path)
+            return navs[dates >= year_ago]
+
+        _report("1 fund, last year: csv", _timed(from_csv, args.repeat))
+        _report("1 fund, last year: store", _timed(lambda: reader.series(key, year_ago), args.repeat))
+        _report("panel, all: csv", _timed(lambda: PricePanel.load(str(csv_dir), [AssetType.MF]), args.repeat))
+        _report("panel, all: store", _timed(lambda: PricePanel.from_store(reader), args.repeat))
+        five_years = days[-1] - 5 * 365
+        _report("panel, 5 years: store",
+                _timed(lambda: PricePanel.from_store(reader, start=five_years), args.repeat))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
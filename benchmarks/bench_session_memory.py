@@ -0,0 +1,161 @@
+"""
+Per-session memory of guest_data: nested dicts vs slotted records
+(models.session), at 1k and 10k simulated sessions.
+
+Each session is built the way the pages build it (snapshot form, asset
+and debt forms, goal form, then the analysis) with --assets / --debts /
+--goals rows. Memory is the tracemalloc growth while all sessions are
+alive, divided by the number of sessions.
+
+Also times a content hash per session: GuestData.fingerprint() vs the
+sorted-JSON digest the dicts would need for the same cache key.
+
+Usage:
+    python -m benchmarks.bench_session_memory --sessions 1000 10000
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.session import Asset, Goal, GuestData, Liability, Snapshot
+from services.calculator import FinancialCalculator
+
+ASSET_TYPES = ["Cash", "Fixed Deposit", "Mutual Fund", "Stocks", "Gold", "Other"]
+DEBT_TYPES = ["Credit Card", "Personal Loan", "Home Loan", "Car Loan", "Other"]
+CATEGORIES = ["Emergency", "Short-term (< 3 years)", "Medium-term (3-5 years)", "Long-term (5+ years)", "Retirement"]
+
+
+def _dict_session(rng: random.Random, assets: int, debts: int, goals: int) -> Dict[str, Any]:
+    today = datetime.now()
+    data = {'snapshot': {}, 'assets': [], 'liabilities': [], 'goals': [], 'plan': None}
+    data['snapshot'] = {
+        'monthly_income': rng.randrange(30_000, 500_000, 1000),
+        'monthly_expenses': rng.randrange(20_000, 300_000, 1000),
+        'current_savings': rng.randrange(0, 2_000_000, 5000),
+    }
+    for i in range(assets):
+        data['assets'].append({
+            'type': rng.choice(ASSET_TYPES).lower().replace(' ', '_'),
+            'name': f"Asset {i}",
+            'value': rng.randrange(1000, 500_000, 1000),
+        })
+    for i in range(debts):
+        data['liabilities'].append({
+            'type': rng.choice(DEBT_TYPES).lower().replace(' ', '_'),
+            'name': f"Debt {i}",
+            'outstanding': rng.randrange(1000, 500_000, 1000),
+            'interest_rate': rng.choice([8.5, 12.0, 18.0, 36.0]) / 100,
+        })
+    for i in range(goals):
+        months = rng.randrange(6, 120)
+        data['goals'].append({
+            'name': f"Goal {i}",
+            'target_amount': rng.randrange(50_000, 5_000_000, 10_000),
+            'current_progress': 0,
+            'target_date': (today + timedelta(days=months * 30)).strftime("%Y-%m-%d"),
+            'category': rng.choice(CATEGORIES),
+            'required_monthly': 0,
+            'created_at': today.strftime("%Y-%m-%d"),
+        })
+    data['analysis'] = FinancialCalculator.analyze_financial_health(
+        data['snapshot'], data['assets'], data['liabilities'])
+    return data
+
+
+def _record_session(rng: random.Random, assets: int, debts: int, goals: int) -> GuestData:
+    today = datetime.now()
+    data = GuestData.new()
+    data['snapshot'] = Snapshot(
+        monthly_income=rng.randrange(30_000, 500_000, 1000),
+        monthly_expenses=rng.randrange(20_000, 300_000, 1000),
+        current_savings=rng.randrange(0, 2_000_000, 5000),
+    )
+    for i in range(assets):
+        data['assets'].append(Asset(
+            type=rng.choice(ASSET_TYPES).lower().replace(' ', '_'),
+            name=f"Asset {i}",
+            value=rng.randrange(1000, 500_000, 1000),
+        ))
+    for i in range(debts):
+        data['liabilities'].append(Liability(
+            type=rng.choice(DEBT_TYPES).lower().replace(' ', '_'),
+            name=f"Debt {i}",
+            outstanding=rng.randrange(1000, 500_000, 1000),
+            interest_rate=rng.choice([8.5, 12.0, 18.0, 36.0]) / 100,
+        ))
+    for i in range(goals):
+        months = rng.randrange(6, 120)
+        data['goals'].append(Goal(
+            name=f"Goal {i}",
+            target_amount=rng.randrange(50_000, 5_000_000, 10_000),
+            current_progress=0,
+            target_date=(today + timedelta(days=months * 30)).strftime("%Y-%m-%d"),
+            category=rng.choice(CATEGORIES),
+            required_monthly=0,
+            created_at=today.strftime("%Y-%m-%d"),
+        ))
+    data['analysis'] = FinancialCalculator.analyze_financial_health(
+        data['snapshot'], data['assets'], data['liabilities'])
+    return data
+
+
+def _measure(build: Callable[[random.Random], Any], sessions: int) -> Tuple[List[Any], int]:
+    """Build sessions under tracemalloc; returns them (kept alive) and the bytes allocated."""
+    rng = random.Random(0)
+    build(rng)  # warm caches (interned strings, calculator) outside the measurement
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    built = [build(rng) for _ in range(sessions)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return built, grown
+
+
+def _json_digest(data: Dict[str, Any]) -> str:
+    payload = json.dumps({k: v for k, v in data.items() if k != 'plan'}, sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _hash_us(fn: Callable[[Any], Any], sessions: List[Any]) -> float:
+    start = time.perf_counter()
+    for session in sessions:
+        fn(session)
+    return (time.perf_counter() - start) * 1e6 / len(sessions)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--assets", type=int, default=8)
+    parser.add_argument("--debts", type=int, default=3)
+    parser.add_argument("--goals", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    shape = (args.assets, args.debts, args.goals)
+    print(f"per session: {args.assets} assets, {args.debts} debts, {args.goals} goals, analysis\n")
+    print(f"{'sessions':>9} {'model':<10} {'total':>10} {'per session':>12} {'hash / session':>15}")
+    for count in args.sessions:
+        dicts, dict_bytes = _measure(lambda rng: _dict_session(rng, *shape), count)
+        dict_hash = _hash_us(_json_digest, dicts)
+        del dicts
+        records, record_bytes = _measure(lambda rng: _record_session(rng, *shape), count)
+        record_hash = _hash_us(GuestData.fingerprint, records)
+        del records
+
+        for name, size, hash_us in (("dicts", dict_bytes, dict_hash), ("records", record_bytes, record_hash)):
+            print(f"{count:>9} {name:<10} {size / 2**20:>7.1f} MB {size / count / 1024:>9.2f} KB "
+                  f"{hash_us:>12.1f} us")
+        print(f"{'':>9} {'saved':<10} {(dict_bytes - record_bytes) / 2**20:>7.1f} MB "
+              f"{(1 - record_bytes / dict_bytes) * 100:>10.0f} %\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
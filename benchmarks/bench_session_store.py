@@ -0,0 +1,120 @@
+"""
+Session store backends: payload size, render-thread save cost and
+cold-replica page loads (services.session_store).
+
+For each backend (memory, sqlite file, kv server in a separate process):
+
+- save: queueing every section of a session with write-behind put() vs
+  writing them synchronously (put + flush), per session
+- load: what a page on a fresh replica reads - the dashboard's four
+  sections vs all six - per session
+
+Also compares the encoded size of a session with pickle and JSON of the
+equivalent dicts.
+
+Usage:
+    python -m benchmarks.bench_session_store --sessions 1000
+"""
+import argparse
+import json
+import pickle
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from benchmarks.bench_session_memory import _record_session
+from benchmarks.bench_vector_index import _report
+from services.session_store import (SECTIONS, KVBackend, MemoryBackend, SessionStore, SQLiteBackend,
+                                    encode_section)
+
+ROOT = Path(__file__).resolve().parent.parent
+DASHBOARD_SECTIONS = ("snapshot", "assets", "liabilities", "analysis")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_kv(address: str) -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, "-m", "services.session_store", "serve", "--address", address],
+                            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    host, port = address.rsplit(":", 1)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, int(port)), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError("KV server did not start")
+
+
+def _timed(fn: Callable[[int], None], count: int) -> List[float]:
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _bench_backend(name: str, backend, sessions: list) -> None:
+    # Long flush interval: the writer thread stays out of the measurement
+    store = SessionStore(backend, flush_seconds=3600)
+
+    def put(i: int) -> None:
+        for section, value in sessions[i].items():
+            store.put(f"wb{i}", section, value)
+
+    def put_sync(i: int) -> None:
+        for section, value in sessions[i].items():
+            store.put(f"s{i}", section, value)
+        store.flush()
+
+    _report(f"{name} save, write-behind", _timed(put, len(sessions)))
+    store.flush()
+    _report(f"{name} save, synchronous", _timed(put_sync, len(sessions)))
+    _report(f"{name} load, dashboard", _timed(lambda i: store.load(f"s{i}", DASHBOARD_SECTIONS), len(sessions)))
+    _report(f"{name} load, all sections", _timed(lambda i: store.load(f"s{i}", SECTIONS), len(sessions)))
+    store.close()
+    backend.close()
+    print()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    sessions = [_record_session(rng, 8, 3, 5) for _ in range(args.sessions)]
+
+    sample = sessions[0]
+    encoded = sum(len(encode_section(section, value)) for section, value in sample.items())
+    print(f"bytes per session: store {encoded}, "
+          f"pickle {len(pickle.dumps(sample.to_dict()))}, json {len(json.dumps(sample.to_dict()))}\n")
+
+    address = f"127.0.0.1:{_free_port()}"
+    server = _start_kv(address)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, backend in (("memory", MemoryBackend()),
+                                  ("sqlite", SQLiteBackend(str(Path(tmp) / "sessions.sqlite"))),
+                                  ("kv", KVBackend(address))):
+                _bench_backend(name, backend, sessions)
+    finally:
+        server.terminate()
+        server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
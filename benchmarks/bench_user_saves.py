@@ -0,0 +1,140 @@
+"""
+Logged-in onboarding saves: synchronous DataService calls vs the
+write-behind writer (services.user_data_writer).
+
+Replays one user's onboarding on a throwaway SQLite database: a snapshot
+submit, --assets asset adds and --debts debt adds (each edit sends the
+whole list, as the page does), then "Generate analysis" (assets,
+liabilities and plan). Reports the render-thread time per edit, the
+number of DB transactions, and the rows inserted into the collections.
+
+Usage:
+    python -m benchmarks.bench_user_saves --assets 30 --debts 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from benchmarks.bench_vector_index import _report
+
+Edit = Tuple[str, object]
+
+
+def _edits(assets: int, debts: int) -> List[Edit]:
+    from models.session import Asset, Liability, Snapshot
+
+    edits: List[Edit] = [("snapshot", Snapshot(monthly_income=150_000, monthly_expenses=80_000, current_savings=200_000))]
+    asset_rows, debt_rows = [], []
+    for i in range(assets):
+        asset_rows.append(Asset(type="mutual_fund", name=f"Fund {i}", value=10_000 + i))
+        edits.append(("assets", list(asset_rows)))
+    for i in range(debts):
+        debt_rows.append(Liability(type="credit_card", name=f"Card {i}", outstanding=20_000 + i, interest_rate=0.36))
+        edits.append(("liabilities", list(debt_rows)))
+    plan = {"rule_version": "1.0.0", "top_actions": [], "buckets": {}, "strategy_type": "maintain"}
+    edits += [("assets", list(asset_rows)), ("liabilities", list(debt_rows)), ("plan", plan)]
+    return edits
+
+
+def _new_user() -> str:
+    from models.database import get_db
+    from models.user import User
+
+    db = next(get_db())
+    try:
+        user = User(email=f"bench-{time.time_ns()}@example.com", name="Bench", password_hash="x")
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def _count_inserts(fn: Callable[[], None]) -> Tuple[int, int]:
+    """(transactions committed, collection rows inserted) while fn runs."""
+    from sqlalchemy import event
+
+    from models.database import get_engine
+
+    counts = {"commits": 0, "rows": 0}
+
+    def on_commit(conn):
+        counts["commits"] += 1
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO assets") or statement.startswith("INSERT INTO liabilities"):
+            counts["rows"] += len(parameters) if executemany else 1
+
+    engine = get_engine()
+    event.listen(engine, "commit", on_commit)
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "commit", on_commit)
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return counts["commits"], counts["rows"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=30)
+    parser.add_argument("--debts", type=int, default=10)
+    parser.add_argument("--quiet", type=float, default=0.5, help="writer quiet period (s)")
+    args = parser.parse_args(argv)
+
+    # Throwaway database; must be set before config/models are imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    import models.user, models.financial, models.plans  # noqa: F401,E401  (register tables)
+    from models.database import init_db
+    from services.data_service import DataService
+    from services.user_data_writer import UserDataWriter
+
+    init_db()
+    edits = _edits(args.assets, args.debts)
+    sync_saves = {
+        "snapshot": DataService.save_snapshot,
+        "assets": DataService.save_assets,
+        "liabilities": DataService.save_liabilities,
+        "plan": DataService.save_plan,
+    }
+
+    user_id = _new_user()
+    sync_ms: List[float] = []
+
+    def run_sync() -> None:
+        for section, value in edits:
+            start = time.perf_counter()
+            sync_saves[section](user_id, value)
+            sync_ms.append((time.perf_counter() - start) * 1000)
+
+    sync_commits, sync_rows = _count_inserts(run_sync)
+
+    user_id = _new_user()
+    writer = UserDataWriter(quiet_seconds=args.quiet, max_delay_seconds=args.quiet * 10)
+    behind_ms: List[float] = []
+
+    def run_write_behind() -> None:
+        for section, value in edits:
+            start = time.perf_counter()
+            writer.submit(user_id, section, value)
+            behind_ms.append((time.perf_counter() - start) * 1000)
+        writer.flush_user(user_id, wait=True)
+
+    behind_commits, behind_rows = _count_inserts(run_write_behind)
+    writer.close()
+
+    print(f"{len(edits)} edits ({args.assets} assets, {args.debts} debts)\n")
+    _report("synchronous, per edit", sync_ms)
+    print(f"{'':<28} {sync_commits} transactions, {sync_rows} asset/debt rows inserted")
+    _report("write-behind, per edit", behind_ms)
+    print(f"{'':<28} {behind_commits} transactions, {behind_rows} asset/debt rows inserted")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Benchmark the memory-mapped VectorIndex against chromadb on the same corpus.
+
+Measures cold start (fresh process: import + open + first query), warm
+query latency and the resident memory each approach needs. Quantized
+indexes (int8, binary) also report recall@k against exact float32 search
+and the bytes a worker keeps resident for the first pass. chromadb is
+optional; its section is skipped if it is not installed.
+
+Usage:
+    python -m benchmarks.bench_vector_index --count 20000 --dim 384
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from benchmarks.loadtest import percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_COLD_START_SCRIPT = """
+import sys, time, json
+t0 = time.perf_counter()
+import numpy as np
+from services.rag.vector_index import VectorIndex
+t1 = time.perf_counter()
+index = VectorIndex.open(sys.argv[1])
+t2 = time.perf_counter()
+query = np.random.default_rng(1).standard_normal(index.dim).astype(np.float32)
+index.search(query, 5)
+t3 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "open_ms": (t2 - t1) * 1000,
+                  "first_query_ms": (t3 - t2) * 1000}))
+"""
+
+
+def _latencies(fn, queries: np.ndarray) -> List[float]:
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def recall_at_k(expected: List[List[int]], found: List[List[int]]) -> float:
+    """Mean fraction of the exact top-k rows that a search returned."""
+    hits = [len(set(e) & set(f)) / len(e) for e, f in zip(expected, found) if e]
+    return sum(hits) / len(hits) if hits else 0.0
+
+
+def _report(name: str, samples: List[float]) -> None:
+    print(f"{name:<28} p50={percentile(samples, 50):7.3f} ms  p95={percentile(samples, 95):7.3f} ms  "
+          f"p99={percentile(samples, 99):7.3f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--query-noise", type=float, default=1.0, help="query distance from its anchor row")
+    args = parser.parse_args(argv)
+
+    from services.rag.vector_index import VectorIndex
+
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((args.count, args.dim)).astype(np.float32)
+    # A query resembles some chunk: isotropic noise around random rows, unlike
+    # pure random queries whose top-k are near-ties no quantizer can separate
+    anchors = corpus[rng.integers(0, args.count, args.queries)]
+    queries = (anchors + args.query_noise * rng.standard_normal(anchors.shape)).astype(np.float32)
+    metadata = [{"id": f"chunk-{i}", "source": "synthetic"} for i in range(args.count)]
+
+    workdir = Path(tempfile.mkdtemp())
+    print(f"corpus: {args.count} x {args.dim}, {args.queries} queries, k={args.k}\n")
+
+    for dtype in ("float32", "float16"):
+        path = workdir / f"index-{dtype}"
+        VectorIndex.build(str(path), corpus, metadata, dtype=dtype)
+
+        cold = subprocess.run([sys.executable, "-c", _COLD_START_SCRIPT, str(path)], cwd=ROOT,
+                              capture_output=True, text=True, check=True)
+        timings = json.loads(cold.stdout)
+        print(f"[mmap {dtype}] cold start: open {timings['open_ms']:.2f} ms + first query "
+              f"{timings['first_query_ms']:.2f} ms (numpy/module import {timings['import_ms']:.1f} ms)")
+        print(f"[mmap {dtype}] file size: {(path / 'vectors.npy').stat().st_size / 2**20:.1f} MB")
+
+        index = VectorIndex.open(str(path))
+        _report(f"mmap {dtype} query", _latencies(lambda q: index.search(q, args.k), queries))
+        print()
+
+    exact_index = VectorIndex.open(str(workdir / "index-float32"))
+    expected = [[row for row, _ in exact_index.search(q, args.k)] for q in queries]
+    for quantization in ("int8", "binary"):
+        path = workdir / f"index-{quantization}"
+        index = VectorIndex.build(str(path), corpus, metadata, dtype="float16", quantization=quantization)
+        found = [[row for row, _ in index.search(q, args.k)] for q in queries]
+        first_pass = sum(f.stat().st_size for f in path.glob("*.npy") if f.name != "vectors.npy")
+        print(f"[{quantization}] first-pass resident size: {first_pass / 2**20:.1f} MB "
+              f"(float32: {(workdir / 'index-float32' / 'vectors.npy').stat().st_size / 2**20:.1f} MB), "
+              f"recall@{args.k} vs float32: {recall_at_k(expected, found):.3f}")
+        _report(f"{quantization} + rescore query", _latencies(lambda q: index.search(q, args.k), queries))
+        print()
+
+    try:
+        import chromadb
+    except ImportError:
+        print("chromadb not installed; skipping comparison")
+        return 0
+
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=str(workdir / "chroma"))
+    collection = client.get_or_create_collection("bench", metadata={"hnsw:space": "cosine"})
+    batch = 5000
+    for offset in range(0, args.count, batch):
+        collection.add(
+            ids=[m["id"] for m in metadata[offset:offset + batch]],
+            embeddings=corpus[offset:offset + batch].tolist(),
+        )
+    print(f"[chromadb] build: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    reopened = chromadb.PersistentClient(path=str(workdir / "chroma")).get_collection("bench")
+    reopened.query(query_embeddings=[queries[0].tolist()], n_results=args.k)
+    print(f"[chromadb] reopen + first query: {(time.perf_counter() - start) * 1000:.1f} ms")
+    _report("chromadb query",
+            _latencies(lambda q: reopened.query(query_embeddings=[q.tolist()], n_results=args.k), queries))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Local stand-in for an OpenAI/OpenRouter-compatible chat completions server.
+
+Deterministic: the reply is derived from a hash of the request messages,
+so the same prompt always yields the same tokens. Latency is configurable
+(time to first token + per-token delay) to model a real backend without
+any network access or API key.
+
+Supports POST /v1/chat/completions with "stream": true (SSE chunks ending
+in "data: [DONE]") and false (a single JSON body).
+
+Usage:
+    python -m benchmarks.fake_llm --port 8089 --ttft-ms 150 --token-ms 15
+    LLM_ENABLED=true LLM_BASE_URL=http://127.0.0.1:8089/v1 streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+MODEL_NAME = "fake-llm-1"
+
+_WORDS = (
+    "this keeps your plan safe by covering surprises first so that debt and "
+    "investments are not disturbed when income stops or an expense appears "
+    "paying expensive debt early returns more than most investments and lowers "
+    "monthly stress while steady saving builds the habit that funds every goal"
+).split()
+
+
+def fake_reply(messages: List[dict], max_tokens: int) -> List[str]:
+    """Deterministic token list for a conversation."""
+    seed = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).digest()
+    count = min(max_tokens, 40 + seed[0] % 40)
+    tokens = []
+    for i in range(count):
+        word = _WORDS[(seed[i % len(seed)] + i * 7) % len(_WORDS)]
+        tokens.append(f"- {word}" if i % 12 == 0 else f" {word}")
+        if i % 12 == 11:
+            tokens.append("\n")
+    return tokens
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    ttft = 0.1
+    token_delay = 0.01
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        tokens = fake_reply(body.get("messages", []), int(body.get("max_tokens") or 300))
+        model = body.get("model") or MODEL_NAME
+        created = int(time.time())
+        time.sleep(self.ttft)
+
+        if not body.get("stream"):
+            time.sleep(self.token_delay * len(tokens))
+            payload = json.dumps({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}],
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in tokens:
+                self._chunk({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                             "model": model, "choices": [{"index": 0, "delta": {"content": token}}]})
+                time.sleep(self.token_delay)
+            self._chunk({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                         "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            self._write(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (timeout or cancelled stream)
+            self.close_connection = True
+
+    def _chunk(self, data: dict) -> None:
+        self._write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+    def _write(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int = 0, ttft_ms: float = 100.0, token_ms: float = 10.0,
+          background: bool = True) -> ThreadingHTTPServer:
+    """
+    Start the stand-in server.
+
+    Args:
+        port: Port on 127.0.0.1 (0 picks a free one; see server.server_port)
+        ttft_ms: Delay before the first token
+        token_ms: Delay between tokens
+        background: Serve from a daemon thread and return immediately
+
+    Returns:
+        The running server
+    """
+    handler = type("Handler", (_Handler,), {"ttft": ttft_ms / 1000, "token_delay": token_ms / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--ttft-ms", type=float, default=100.0, help="time to first token")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="delay between tokens")
+    args = parser.parse_args(argv)
+
+    print(f"Fake LLM listening on http://127.0.0.1:{args.port}/v1 (model {MODEL_NAME})")
+    try:
+        serve(args.port, args.ttft_ms, args.token_ms, background=False)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Import-time profile and cold-start budget for app.py and every page.
+
+For each script, the module-level imports are replayed in a fresh
+interpreter under `python -X importtime`, after `import streamlit`
+(already loaded by the server before any page runs). The report lists the
+page's total import time and the heaviest modules it pulls in, by
+cumulative and self time.
+
+--check compares the median total over --repeat runs against
+PAGE_IMPORT_BUDGETS_MS and exits 1 when a page is over budget, so it can
+run in CI.
+
+Usage:
+    python -m benchmarks.importtime                 # report
+    python -m benchmarks.importtime --check         # budget gate
+    python -m benchmarks.importtime --page pages/2_dashboard.py --top 25
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Max import time (ms, median of --repeat cold runs) on top of streamlit.
+# About 3x a dev laptop, so CI noise passes but a heavy import moved back to
+# module level (sqlalchemy + httpx via the explanation stack is ~200 ms) fails.
+PAGE_IMPORT_BUDGETS_MS: Dict[str, float] = {
+    "app.py": 150,
+    "pages/1_onboarding.py": 150,
+    "pages/2_dashboard.py": 200,
+    "pages/3_goals.py": 200,
+}
+
+BASELINE = "import streamlit"
+_MARKER = "--page-imports--"
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def page_imports(path: Path) -> List[str]:
+    """Module-level import statements of a script, as source lines."""
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """
+    Parse `-X importtime` output.
+
+    Lines look like "import time:  self [us] | cumulative | imported package",
+    with the package indented two spaces per nesting level.
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        module = name.rstrip()
+        depth = (len(module) - len(module.lstrip(" "))) // 2
+        records.append(ImportRecord(module.strip(), depth, int(self_us), int(cumulative_us)))
+    return records
+
+
+def profile(path: Path) -> List[ImportRecord]:
+    """Imports performed by path's module-level import statements (after BASELINE)."""
+    code = "\n".join([BASELINE, f"import sys; sys.stderr.write({_MARKER!r} + '\\n')", *page_imports(path)])
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{path}: {result.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(result.stderr.split(_MARKER, 1)[1])
+
+
+def total_ms(records: List[ImportRecord]) -> float:
+    """Wall import time: the sum of top-level (depth 0) cumulative times."""
+    base = min((r.depth for r in records), default=0)
+    return sum(r.cumulative_us for r in records if r.depth == base) / 1000
+
+
+def report(name: str, records: List[ImportRecord], top: int) -> None:
+    print(f"{name}: {total_ms(records):.1f} ms in {len(records)} modules")
+    by_package: Dict[str, int] = {}
+    for r in records:
+        by_package[r.module.split(".")[0]] = by_package.get(r.module.split(".")[0], 0) + r.self_us
+    heaviest = sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    print("  by top-level package (self time):")
+    for package, us in heaviest:
+        print(f"    {us / 1000:8.1f} ms  {package}")
+    print("  by module (cumulative):")
+    for r in sorted(records, key=lambda r: -r.cumulative_us)[:top]:
+        print(f"    {r.cumulative_us / 1000:8.1f} ms  {r.module}")
+    print()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page", action="append", help="script to profile (default: app.py and pages/*.py)")
+    parser.add_argument("--top", type=int, default=10, help="modules to list per page")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a page exceeds its budget")
+    parser.add_argument("--repeat", type=int, default=5, help="cold runs per page for --check")
+    args = parser.parse_args(argv)
+
+    pages = args.page or ["app.py"] + sorted(str(p.relative_to(ROOT)) for p in ROOT.glob("pages/[0-9]*.py"))
+    if not args.check:
+        for page in pages:
+            report(page, profile(ROOT / page), args.top)
+        return 0
+
+    failed = False
+    for page in pages:
+        median = statistics.median(total_ms(profile(ROOT / page)) for _ in range(args.repeat))
+        budget = PAGE_IMPORT_BUDGETS_MS.get(page)
+        over = budget is not None and median > budget
+        failed |= over
+        limit = f"{budget:.0f} ms" if budget is not None else "no budget"
+        print(f"{'FAIL' if over else 'ok':<4} {page:<24} {median:7.1f} ms  (budget {limit})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
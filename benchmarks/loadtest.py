@@ -0,0 +1,335 @@
+"""
+Load-generation harness for the Streamlit pages and the service layer.
+
+Simulates concurrent users walking the onboarding -> dashboard -> goals
+journey and reports throughput, latency percentiles per step and the
+CPU / RSS cost per simulated session, for sizing Streamlit nodes.
+
+Two modes:
+- pages:    drives pages/*.py through Streamlit's AppTest (same script
+            runner the server uses, minus the websocket transport)
+- services: calls FinancialCalculator / DataService / AuthService directly
+            against a throwaway SQLite database
+
+Usage:
+    python -m benchmarks.loadtest --users 20 --think-time 0.5
+    python -m benchmarks.loadtest --mode services --users 50 --iterations 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ROOT / "pages"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: Samples (unsorted)
+        pct: Percentile in 0-100
+
+    Returns:
+        Sample at the requested percentile (0.0 for no samples)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import resource
+        # ru_maxrss is peak, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Recorder:
+    """Thread-safe collector of per-step latencies."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def timed(self, step: str, fn: Callable[[], Any]) -> Any:
+        """Run fn, recording its wall time under step (errors are counted, not raised)."""
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            with self._lock:
+                self.errors[step] += 1
+            print(f"[{step}] {type(e).__name__}: {e}", file=sys.stderr)
+            return None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.samples[step].append(elapsed)
+        return result
+
+
+def _think(think_time: float) -> None:
+    if think_time > 0:
+        time.sleep(random.uniform(0.5, 1.5) * think_time)
+
+
+# ----------------------------------------------------------------------
+# Page journey (Streamlit AppTest)
+# ----------------------------------------------------------------------
+
+def _widget(widgets, label: str, index: int = 0):
+    """Find the index-th widget whose label starts with label."""
+    matches = [w for w in widgets if w.label.startswith(label)]
+    if len(matches) <= index:
+        raise LookupError(f"No widget labelled {label!r}")
+    return matches[index]
+
+
+def _check(at) -> None:
+    """Raise if the script run produced an exception element."""
+    if len(at.exception):
+        raise RuntimeError(at.exception[0].value)
+
+
+def page_journey(recorder: Recorder, assets: int, debts: int, goals: int,
+                 think_time: float, timeout: float) -> None:
+    """
+    One user: snapshot -> assets/debts -> analysis -> dashboard -> goals.
+
+    Session state is handed from page to page the way st.switch_page would
+    keep it within one browser session.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    def run(at):
+        at.run(timeout=timeout)
+        _check(at)
+        return at
+
+    onboarding = AppTest.from_file(str(PAGES / "1_onboarding.py"), default_timeout=timeout)
+    recorder.timed("onboarding.load", lambda: run(onboarding))
+    _think(think_time)
+
+    _widget(onboarding.number_input, "💵 Monthly Income").set_value(random.randrange(40_000, 300_000, 1000))
+    _widget(onboarding.number_input, "💸 Monthly Expenses").set_value(random.randrange(20_000, 150_000, 1000))
+    _widget(onboarding.number_input, "💰 Existing Savings").set_value(random.randrange(0, 1_000_000, 5000))
+    _widget(onboarding.button, "➡️ Next").click()
+    recorder.timed("onboarding.snapshot_submit", lambda: run(onboarding))
+    _think(think_time)
+
+    for i in range(assets):
+        _widget(onboarding.text_input, "Name", 0).input(f"Asset {i}")
+        _widget(onboarding.number_input, "Value").set_value(random.randrange(1000, 500_000, 1000))
+        _widget(onboarding.button, "➕ Add Asset").click()
+        recorder.timed("onboarding.add_asset", lambda: run(onboarding))
+        _think(think_time)
+
+    for i in range(debts):
+        _widget(onboarding.text_input, "Name", 1).input(f"Debt {i}")
+        _widget(onboarding.number_input, "Outstanding").set_value(random.randrange(1000, 500_000, 1000))
+        _widget(onboarding.button, "➕ Add Debt").click()
+        recorder.timed("onboarding.add_debt", lambda: run(onboarding))
+        _think(think_time)
+
+    _widget(onboarding.button, "📊 Generate").click()
+    recorder.timed("onboarding.generate_analysis", lambda: onboarding.run(timeout=timeout))
+    guest_data = onboarding.session_state["guest_data"]
+    if not guest_data.get("analysis"):
+        raise RuntimeError("analysis was not generated")
+    _think(think_time)
+
+    dashboard = AppTest.from_file(str(PAGES / "2_dashboard.py"), default_timeout=timeout)
+    dashboard.session_state["guest_data"] = guest_data
+    recorder.timed("dashboard.view", lambda: run(dashboard))
+    _think(think_time)
+
+    goals_page = AppTest.from_file(str(PAGES / "3_goals.py"), default_timeout=timeout)
+    goals_page.session_state["guest_data"] = guest_data
+    recorder.timed("goals.view", lambda: run(goals_page))
+    for i in range(goals):
+        _widget(goals_page.text_input, "Goal Name").input(f"Goal {i}")
+        _widget(goals_page.number_input, "Target Amount").set_value(random.randrange(50_000, 5_000_000, 10_000))
+        _widget(goals_page.button, "Add Goal").click()
+        recorder.timed("goals.add_goal", lambda: run(goals_page))
+        _think(think_time)
+
+
+# ----------------------------------------------------------------------
+# Service journey (direct calls)
+# ----------------------------------------------------------------------
+
+def service_journey(recorder: Recorder, assets: int, debts: int, goals: int,
+                    think_time: float, timeout: float) -> None:
+    """One user through the service layer: register, save, analyse, read back."""
+    from services.auth_service import AuthService
+    from services.calculator import FinancialCalculator
+    from services.data_service import DataService
+
+    email = f"load-{threading.get_ident()}-{random.getrandbits(48):x}@example.com"
+    user = recorder.timed("auth.register", lambda: AuthService.register_user(email, "load-test-pass", "Load Test"))
+    if not user:
+        return
+    user_id = user["user_id"]
+    recorder.timed("auth.login", lambda: AuthService.login_user(email, "load-test-pass"))
+    _think(think_time)
+
+    snapshot = {
+        'monthly_income': random.randrange(40_000, 300_000, 1000),
+        'monthly_expenses': random.randrange(20_000, 150_000, 1000),
+        'current_savings': random.randrange(0, 1_000_000, 5000),
+    }
+    asset_rows = [{'type': 'mutual_fund', 'name': f"Asset {i}", 'value': random.randrange(1000, 500_000, 1000)}
+                  for i in range(assets)]
+    debt_rows = [{'type': 'credit_card', 'name': f"Debt {i}", 'outstanding': random.randrange(1000, 500_000, 1000),
+                  'interest_rate': random.choice([0.09, 0.14, 0.36])} for i in range(debts)]
+    goal_rows = [{'name': f"Goal {i}", 'target_amount': random.randrange(50_000, 5_000_000, 10_000),
+                  'target_date': '2030-01-01', 'category': 'Long-term (5+ years)'} for i in range(goals)]
+
+    recorder.timed("data.save_snapshot", lambda: DataService.save_snapshot(user_id, snapshot))
+    recorder.timed("data.save_assets", lambda: DataService.save_assets(user_id, asset_rows))
+    recorder.timed("data.save_liabilities", lambda: DataService.save_liabilities(user_id, debt_rows))
+    _think(think_time)
+
+    recorder.timed("calculator.analyze", lambda: FinancialCalculator.analyze_financial_health(snapshot, asset_rows, debt_rows))
+    recorder.timed("data.save_goals", lambda: DataService.save_goals(user_id, goal_rows))
+    _think(think_time)
+
+    recorder.timed("data.load_user_data", lambda: DataService.load_user_data(user_id))
+    first = recorder.timed("data.get_assets", lambda: DataService.get_assets(user_id))
+    if first:
+        recorder.timed("data.get_assets_not_modified", lambda: DataService.get_assets(user_id, first['etag']))
+
+
+# ----------------------------------------------------------------------
+# Runner / report
+# ----------------------------------------------------------------------
+
+def run_load(mode: str, users: int, iterations: int, assets: int, debts: int, goals: int,
+             think_time: float, timeout: float) -> Dict[str, Any]:
+    """
+    Run users * iterations journeys concurrently (one thread per user).
+
+    Returns:
+        Report dict with throughput, per-step percentiles and per-session cost
+    """
+    journey = page_journey if mode == "pages" else service_journey
+    recorder = Recorder()
+
+    def user_loop():
+        for _ in range(iterations):
+            try:
+                journey(recorder, assets, debts, goals, think_time, timeout)
+            except Exception as e:
+                with recorder._lock:
+                    recorder.errors["journey"] += 1
+                print(f"[journey] {type(e).__name__}: {e}", file=sys.stderr)
+
+    rss_before = _rss_bytes()
+    cpu_before = time.process_time()
+    wall_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        for future in [pool.submit(user_loop) for _ in range(users)]:
+            future.result()
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_before
+    rss_after = _rss_bytes()
+
+    sessions = users * iterations
+    steps = {}
+    for step, samples in sorted(recorder.samples.items()):
+        steps[step] = {
+            'count': len(samples),
+            'mean_ms': statistics.fmean(samples) * 1000,
+            'p50_ms': percentile(samples, 50) * 1000,
+            'p95_ms': percentile(samples, 95) * 1000,
+            'p99_ms': percentile(samples, 99) * 1000,
+        }
+    total_steps = sum(s['count'] for s in steps.values())
+
+    return {
+        'mode': mode,
+        'users': users,
+        'sessions': sessions,
+        'wall_seconds': wall,
+        'throughput_sessions_per_s': sessions / wall if wall else 0.0,
+        'throughput_steps_per_s': total_steps / wall if wall else 0.0,
+        'cpu_seconds': cpu,
+        'cpu_seconds_per_session': cpu / sessions if sessions else 0.0,
+        'rss_start_mb': rss_before / 2**20,
+        'rss_end_mb': rss_after / 2**20,
+        'rss_per_session_kb': (rss_after - rss_before) / sessions / 1024 if sessions else 0.0,
+        'steps': steps,
+        'errors': dict(recorder.errors),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a human-readable load test report."""
+    print(f"\nmode={report['mode']} users={report['users']} sessions={report['sessions']} "
+          f"wall={report['wall_seconds']:.2f}s")
+    print(f"throughput: {report['throughput_sessions_per_s']:.2f} sessions/s, "
+          f"{report['throughput_steps_per_s']:.1f} steps/s")
+    print(f"cpu: {report['cpu_seconds']:.2f}s total, {report['cpu_seconds_per_session'] * 1000:.1f} ms/session")
+    print(f"rss: {report['rss_start_mb']:.1f} MB -> {report['rss_end_mb']:.1f} MB "
+          f"({report['rss_per_session_kb']:.1f} KB/session)")
+    print(f"\n{'step':<34}{'n':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for step, s in report['steps'].items():
+        print(f"{step:<34}{s['count']:>6}{s['mean_ms']:>10.1f}{s['p50_ms']:>10.1f}"
+              f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+    if report['errors']:
+        print(f"\nerrors: {report['errors']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["pages", "services"], default="pages")
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--iterations", type=int, default=1, help="journeys per user")
+    parser.add_argument("--assets", type=int, default=3, help="assets added per journey")
+    parser.add_argument("--debts", type=int, default=2, help="debts added per journey")
+    parser.add_argument("--goals", type=int, default=2, help="goals added per journey")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between user actions")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per script-run timeout (pages mode)")
+    args = parser.parse_args(argv)
+
+    if args.mode == "services":
+        # Throwaway database; must be set before config/models are imported
+        db_path = Path(tempfile.mkdtemp()) / "loadtest.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        import models.user, models.financial, models.plans  # noqa: F401  (register tables)
+        from models.database import init_db
+        init_db()
+    else:
+        # Import Streamlit up front so its import cost is not billed to sessions
+        from streamlit.testing.v1 import AppTest  # noqa: F401
+
+    report = run_load(args.mode, args.users, args.iterations, args.assets, args.debts,
+                      args.goals, args.think_time, args.timeout)
+    print_report(report)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
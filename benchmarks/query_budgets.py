@@ -0,0 +1,117 @@
+"""
+Query budget check: every page run must stay within PAGE_QUERY_BUDGETS.
+
+Drives each page through Streamlit's AppTest on a throwaway SQLite
+database - landing, then onboarding, dashboard and goals both as a guest
+and logged in (with the account saved by onboarding) - and profiles
+every script run with query_budget(). Logged-in
+saves are write-behind, so each logged-in run is also flushed inside its
+block: the statements an edit causes are billed to the run that made it.
+
+Exits 1 if any run is over budget (for CI), printing its statement report.
+
+Usage:
+    python -m benchmarks.query_budgets
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from benchmarks.loadtest import PAGES, ROOT, _widget
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per script-run timeout")
+    args = parser.parse_args(argv)
+
+    # Throwaway database; must be set before config/models are imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'budgets.db'}"
+    import models.user, models.financial, models.plans  # noqa: F401,E401  (register tables)
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks.bench_user_saves import _new_user
+    from models.database import init_db
+    from services.user_data_writer import get_user_data_writer
+    from utils.query_profiler import PAGE_QUERY_BUDGETS, QueryBudgetExceeded, query_budget
+
+    init_db()
+    failures: List[str] = []
+
+    def run(page: str, step: str, at, act: Callable[[], None] = lambda: None, user_id: Optional[str] = None):
+        act()
+        label = f"{page}: {step}"
+        try:
+            with query_budget(PAGE_QUERY_BUDGETS[page], label=label, all_threads=True) as profile:
+                at.run(timeout=args.timeout)
+                if user_id:
+                    get_user_data_writer().flush_user(user_id, wait=True)
+        except QueryBudgetExceeded as e:
+            failures.append(str(e))
+            print(f"FAIL {label}")
+            return
+        print(f"ok   {label:<36} {profile.count:>3} statements  (budget {PAGE_QUERY_BUDGETS[page]})")
+
+    os.chdir(ROOT)
+    run("landing", "load", AppTest.from_file(str(ROOT / "app.py"), default_timeout=args.timeout))
+
+    sessions = {}  # who -> (user_id, guest_data after onboarding)
+    for user_id in (None, _new_user()):
+        who = "logged in" if user_id else "guest"
+        at = AppTest.from_file(str(PAGES / "1_onboarding.py"), default_timeout=args.timeout)
+        if user_id:
+            at.session_state["user_id"] = user_id
+        run("onboarding", f"load ({who})", at, user_id=user_id)
+
+        def snapshot():
+            _widget(at.number_input, "💵 Monthly Income").set_value(150_000)
+            _widget(at.number_input, "💸 Monthly Expenses").set_value(80_000)
+            _widget(at.number_input, "💰 Existing Savings").set_value(200_000)
+            _widget(at.button, "➡️ Next").click()
+
+        def asset():
+            _widget(at.text_input, "Name", 0).input("Index fund")
+            _widget(at.number_input, "Value").set_value(250_000)
+            _widget(at.button, "➕ Add Asset").click()
+
+        def debt():
+            _widget(at.text_input, "Name", 1).input("Credit card")
+            _widget(at.number_input, "Outstanding").set_value(40_000)
+            _widget(at.button, "➕ Add Debt").click()
+
+        run("onboarding", f"snapshot ({who})", at, snapshot, user_id)
+        run("onboarding", f"add asset ({who})", at, asset, user_id)
+        run("onboarding", f"add debt ({who})", at, debt, user_id)
+        run("onboarding", f"generate ({who})", at, lambda: _widget(at.button, "📊 Generate").click(), user_id)
+        sessions[who] = (user_id, at.session_state["guest_data"])
+
+    for who, (user_id, guest_data) in sessions.items():
+        def page(name: str):
+            at = AppTest.from_file(str(PAGES / name), default_timeout=args.timeout)
+            at.session_state["guest_data"] = guest_data
+            if user_id:
+                at.session_state["user_id"] = user_id
+            return at
+
+        run("dashboard", f"view ({who})", page("2_dashboard.py"), user_id=user_id)
+
+        goals = page("3_goals.py")
+        run("goals", f"view ({who})", goals, user_id=user_id)
+
+        def goal():
+            _widget(goals.text_input, "Goal Name").input("House")
+            _widget(goals.number_input, "Target Amount").set_value(2_500_000)
+            _widget(goals.button, "Add Goal").click()
+
+        run("goals", f"add goal ({who})", goals, goal, user_id)
+
+    for failure in failures:
+        print(f"\n{failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
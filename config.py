@@ -25,6 +25,19 @@ class Settings(BaseSettings):
     # AI/ML APIs (for future RAG implementation)
     OPENROUTER_API_KEY: Optional[str] = None
     HUGGINGFACE_API_KEY: Optional[str] = None
+    RAG_INDEX_DIR: str = "./data/rag_index"  # Memory-mapped embedding index
+    RAG_INDEX_QUANTIZATION: Optional[str] = None  # "int8" or "binary" first pass with exact rescoring
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # sentence-transformers name, or "hashing" (offline)
+    EMBEDDING_CACHE_PATH: str = "./data/embedding_cache.sqlite"
+    EMBEDDING_CACHE_MAX_MB: int = 256  # LRU-trimmed above this size (0 = unbounded)
+    EXPLANATION_CACHE_SIMILARITY: float = 0.92  # Min cosine to reuse an answer to a similar question
+    LLM_ENABLED: bool = False  # Show "Why this?" explanations
+    LLM_BASE_URL: str = "https://openrouter.ai/api/v1"  # Any OpenAI-compatible endpoint
+    LLM_MODEL: str = "mistralai/mistral-7b-instruct"
+    LLM_MAX_CONCURRENCY: int = 8  # Requests on the wire per process
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    MODEL_WARMUP_ENABLED: bool = True  # Load embedding models in the background at process start
+    MODEL_IDLE_UNLOAD_SECONDS: Optional[float] = None  # Unload models unused this long (None = never)
     
     # Email (Optional - for notifications)
     SMTP_HOST: Optional[str] = None
@@ -32,6 +45,46 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     
+    # Observability
+    METRICS_ENABLED: bool = False
+    METRICS_PORT: Optional[int] = None  # Serve /metrics on this port when set
+    QUERY_PROFILING_ENABLED: bool = False  # Profile SQL per page rerun, log N+1 / budget overruns
+    QUERY_BUDGET_STRICT: bool = False  # Raise instead of log when a page exceeds its query budget
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 0.01  # Fraction of traces kept regardless of latency
+    TRACE_SLOW_MS: Optional[float] = 500.0  # Always keep traces slower than this
+    TRACE_EXPORT_FORMAT: str = "jsonl"  # "jsonl" (span per line) or "otlp" (OTLP/JSON per line)
+    TRACE_EXPORT_PATH: str = "./traces.jsonl"
+    
+    # Audit trail (RecommendationLog) writer
+    AUDIT_BATCH_SIZE: int = 100  # Flush when this many records are buffered...
+    AUDIT_FLUSH_SECONDS: float = 2.0  # ...or this long after the last flush
+    AUDIT_MAX_QUEUE: int = 10000  # Beyond this, records go straight to the spill file
+    AUDIT_SPILL_PATH: str = "./data/audit_spill.jsonl"  # Append-only fallback while the DB is down
+    AUDIT_DEAD_LETTER_PATH: str = "./data/audit_rejected.jsonl"  # Records the DB refused (not retried)
+    
+    # Retention (recommendation_logs, financial_snapshots)
+    ARCHIVE_HOT_MONTHS: int = 3  # Older rows move to monthly tables
+    ARCHIVE_COLD_MONTHS: int = 12  # Older months move to Parquet files
+    ARCHIVE_DIR: str = "./data/archive"
+    ARCHIVE_COMPRESSION: str = "zstd"
+    
+    # Guest session store (services.session_store)
+    SESSION_STORE: str = "memory"  # "memory" (one process), "sqlite" (processes on this host) or "kv" (networked)
+    SESSION_STORE_PATH: str = "./data/sessions.sqlite"
+    SESSION_STORE_KV_ADDRESS: str = "127.0.0.1:6390"  # python -m services.session_store serve
+    SESSION_TTL_SECONDS: int = 86400  # Idle guest sessions expire after this
+    SESSION_FLUSH_SECONDS: float = 0.5  # Write-behind interval
+    
+    # Logged-in onboarding saves (services.user_data_writer)
+    USER_SAVE_QUIET_SECONDS: float = 2.0  # Save once edits pause this long...
+    USER_SAVE_MAX_DELAY_SECONDS: float = 10.0  # ...or this long after the first unsaved edit
+    USER_SAVE_MAX_ATTEMPTS: int = 5  # Failed saves of the same edits before they are dropped
+    
+    # Backtests (services.backtest)
+    PRICE_DATA_DIR: str = "./data/prices"  # <asset type>/<instrument>.csv with date,price
+    PRICE_STORE_DIR: str = "./data/price_store"  # Memory-mapped series (python -m services.price_store)
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
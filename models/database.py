@@ -3,48 +3,90 @@ SQLAlchemy database setup with environment-based configuration.
 Supports both SQLite (local) and PostgreSQL (production).
 
 Updated import paths for standalone Streamlit architecture.
+
+The engine is created on first use (get_engine(), get_db(), init_db()),
+not at import: models can be imported, and pages that never touch the
+database load, without reading settings or building a pool.
 """
-from sqlalchemy import create_engine
+import threading
+
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from config import settings
-
-# Create engine based on environment
-if settings.ENV == "production" and "postgresql" in settings.DATABASE_URL:
-    # PostgreSQL configuration
-    engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
-    )
-else:
-    # SQLite configuration (local development)
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False},  # Needed for SQLite
-        pool_pre_ping=True
-    )
-
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# Create SessionLocal class (bound to the engine by get_engine())
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Create Base class for models
 Base = declarative_base()
 
 
+def _create_engine():
+    from sqlalchemy import create_engine
+
+    from config import settings
+    from utils import query_profiler
+    from utils.metrics import instrument_engine
+
+    # Create engine based on environment
+    if settings.ENV == "production" and "postgresql" in settings.DATABASE_URL:
+        # PostgreSQL configuration
+        engine = create_engine(
+            settings.DATABASE_URL,
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20
+        )
+    else:
+        # SQLite configuration (local development)
+        engine = create_engine(
+            settings.DATABASE_URL,
+            connect_args={"check_same_thread": False},  # Needed for SQLite
+            pool_pre_ping=True
+        )
+
+    # Pool checkout metrics (no-op unless METRICS_ENABLED)
+    instrument_engine(engine)
+
+    # Statement profiling; hooked only when profiling is enabled
+    query_profiler.register(engine)
+    return engine
+
+
+def get_engine():
+    """Process-shared engine, created on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = _create_engine()
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def __getattr__(name):
+    # `from models.database import engine` keeps working, building it on demand
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_db():
     """
     Dependency function to get database session.
-    
+
     Usage:
         with get_db() as db:
             # Use db session
             db.query(User).all()
-    
+
     Yields:
         Database session
     """
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -54,4 +96,4 @@ def get_db():
 
 def init_db():
     """Initialize database - create all tables."""
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
@@ -0,0 +1,248 @@
+"""
+Typed, slotted records for per-session state (st.session_state.guest_data).
+
+Every connected session used to hold its snapshot, assets, liabilities,
+goals and analysis as nested dicts. These records keep the same keys in
+__slots__ instead: no per-object __dict__ or hash table, so an asset row
+is ~70 bytes instead of ~200, and category / type strings are interned so
+sessions share one copy (see benchmarks/bench_session_memory.py).
+
+Records read like the dicts they replace (record['name'],
+record.get('value', 0), 'analysis' in guest_data, **record), so services
+that take dicts accept them unchanged. A field that was never set behaves
+like a missing key.
+
+Leaf records (Snapshot, Asset, Liability, Goal, Metrics, Scores, Analysis)
+are values: replace them rather than modifying them. They hash and compare
+by content, and GuestData.fingerprint() combines them into a cheap
+structural hash for caching derived results. Hashes are per process
+(string hashing is randomized), so never persist them.
+"""
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_UNSET = ...  # stands in for a missing field in astuple() (hash keys, serialized rows)
+
+
+class _Record:
+    """Slotted record with read-only mapping access."""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _interned: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(cls.__slots__)
+
+    def __init__(self, **fields: Any):
+        for name, value in fields.items():
+            if name not in self._fields:
+                raise TypeError(f"{type(self).__name__} has no field {name!r}")
+            if name in self._interned and type(value) is str:
+                value = sys.intern(value)
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build a record from a dict with the same keys (records pass through)."""
+        if isinstance(data, cls):
+            return data
+        return cls(**data)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._fields:
+            return default
+        return getattr(self, key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._fields and hasattr(self, key)
+
+    def keys(self) -> List[str]:
+        return [name for name in self._fields if hasattr(self, name)]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(name, getattr(self, name)) for name in self.keys()]
+
+    def values(self) -> List[Any]:
+        return [getattr(self, name) for name in self.keys()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict copy (nested records converted too)."""
+        return {name: to_plain(value) for name, value in self.items()}
+
+    def astuple(self) -> Tuple[Any, ...]:
+        """Field values in schema order, ... for fields that are not set."""
+        return tuple(getattr(self, name, _UNSET) for name in self._fields)
+
+    @classmethod
+    def fromtuple(cls, values: Tuple[Any, ...]):
+        """Inverse of astuple()."""
+        record = cls.__new__(cls)
+        for name, value in zip(cls._fields, values):
+            if value is not _UNSET:
+                if name in cls._interned and type(value) is str:
+                    value = sys.intern(value)
+                object.__setattr__(record, name, value)
+        return record
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __hash__(self) -> int:
+        return hash(self.astuple())
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.items())
+        return f"{type(self).__name__}({fields})"
+
+
+def to_plain(value: Any) -> Any:
+    """value with records (also inside lists and dicts) converted to dicts."""
+    if isinstance(value, _Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    return value
+
+
+class Snapshot(_Record):
+    __slots__ = ("monthly_income", "monthly_expenses", "current_savings")
+
+
+class Asset(_Record):
+    __slots__ = ("type", "name", "value")
+    _interned = frozenset({"type"})
+
+
+class Liability(_Record):
+    __slots__ = ("type", "name", "outstanding", "interest_rate")
+    _interned = frozenset({"type"})
+
+
+class Goal(_Record):
+    __slots__ = ("name", "target_amount", "current_progress", "target_date", "category",
+                 "required_monthly", "created_at", "priority")
+    _interned = frozenset({"category"})
+
+
+class Metrics(_Record):
+    __slots__ = ("net_worth", "total_assets", "total_liabilities", "savings_rate",
+                 "emergency_months", "dti_ratio", "monthly_surplus")
+
+
+class Scores(_Record):
+    __slots__ = ("emergency_fund", "savings", "debt", "overall_health")
+
+
+class Analysis(_Record):
+    """FinancialCalculator.analyze_financial_health() result."""
+
+    __slots__ = ("metrics", "scores", "version")
+    _interned = frozenset({"version"})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Analysis":
+        if isinstance(data, cls):
+            return data
+        return cls(**{
+            **data,
+            'metrics': Metrics.from_dict(data['metrics']),
+            'scores': Scores.from_dict(data['scores']),
+        })
+
+
+class GuestData(_Record):
+    """
+    Per-session container (st.session_state.guest_data).
+
+    Unlike the leaf records it is mutable: pages assign fields
+    (guest_data['analysis'] = ...) and append to / pop from its lists.
+    """
+
+    __slots__ = ("snapshot", "assets", "liabilities", "goals", "plan", "analysis")
+
+    @classmethod
+    def new(cls) -> "GuestData":
+        """Empty session state, as onboarding starts it."""
+        return cls(snapshot=Snapshot(), assets=[], liabilities=[], goals=[], plan=None)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GuestData":
+        """
+        Convert nested dicts (e.g. DataService.load_user_data()) to records.
+
+        Args:
+            data: Dict with any of snapshot, assets, liabilities, goals, plan, analysis
+
+        Returns:
+            GuestData with records in place of the nested dicts
+        """
+        if isinstance(data, cls):
+            return data
+        fields = dict(data)
+        if 'snapshot' in fields:
+            fields['snapshot'] = Snapshot.from_dict(fields['snapshot'] or {})
+        for name, record in (('assets', Asset), ('liabilities', Liability), ('goals', Goal)):
+            if name in fields:
+                fields[name] = [record.from_dict(item) for item in fields[name]]
+        if fields.get('analysis'):
+            fields['analysis'] = Analysis.from_dict(fields['analysis'])
+        return cls(**fields)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == 'snapshot':
+            value = Snapshot.from_dict(value)
+        elif key == 'analysis' and value is not None:
+            value = Analysis.from_dict(value)
+        elif key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def fingerprint(self) -> int:
+        """
+        Structural hash of the inputs to derived results (snapshot, assets,
+        liabilities, goals, analysis). Equal content gives an equal hash in
+        this process; costs one tuple hash per row, no serialization.
+        """
+        return hash((
+            self.get('snapshot'),
+            tuple(self.get('assets', ())),
+            tuple(self.get('liabilities', ())),
+            tuple(self.get('goals', ())),
+            self.get('analysis'),
+        ))
+
+    # Mutable container: compared by identity, hashed via fingerprint()
+    __eq__ = object.__eq__
+    __hash__ = None
+
+
+def as_guest_data(data: Optional[Dict[str, Any]]) -> GuestData:
+    """GuestData for data (dicts are converted; None gives an empty one)."""
+    if data is None:
+        return GuestData.new()
+    return GuestData.from_dict(data)
@@ -4,6 +4,12 @@ Part of multi-page app with sidebar enabled.
 """
 import streamlit as st
 
+from models.session import Asset, Liability, Snapshot
+from utils.guest_session import load_guest_data, save_guest_data
+from utils.instrumentation import begin_page, end_page
+
+_instrumentation = begin_page("onboarding")
+
 # Page config
 st.set_page_config(
     page_title="Get Started - Finance Coach",
@@ -12,20 +18,33 @@ st.set_page_config(
     initial_sidebar_state="expanded"  # Show sidebar on app pages
 )
 
-# Initialize session state for guest mode
-if 'guest_data' not in st.session_state:
-    st.session_state.guest_data = {
-        'snapshot': {},
-        'assets': [],
-        'liabilities': [],
-        'goals': [],
-        'plan': None
-    }
+# Guest data for this session (from the shared session store on a new replica)
+load_guest_data(('snapshot', 'assets', 'liabilities', 'goals'))
 
 # Check if user is logged in
 if 'user_id' not in st.session_state:
     st.session_state.user_id = None
 
+
+# Logged-in edits are saved write-behind: queued per user and written by a
+# background thread once they pause, so submits never wait on the database
+
+
+def _persist(section: str):
+    if st.session_state.user_id:
+        from services.user_data_writer import get_user_data_writer
+        value = st.session_state.guest_data[section]
+        get_user_data_writer().submit(st.session_state.user_id, section,
+                                      list(value) if isinstance(value, list) else value)
+
+
+def _flush_saves():
+    # Leaving the page: save queued edits now (still off the render thread)
+    if st.session_state.user_id:
+        from services.user_data_writer import get_user_data_writer
+        get_user_data_writer().flush_user(st.session_state.user_id)
+
+
 # Sidebar
 with st.sidebar:
     st.title("💰 Finance AI Coach")
@@ -36,79 +55,184 @@ with st.sidebar:
     st.button("📝 Get Started", use_container_width=True, disabled=True, key="current_page")
     
     if st.button("📊 Dashboard", use_container_width=True, key="nav_dash"):
+        _flush_saves()
         st.switch_page("pages/2_dashboard.py")
     
     if st.button("🎯 Goals", use_container_width=True, key="nav_goals"):
+        _flush_saves()
         st.switch_page("pages/3_goals.py")
 
 # Main content
 st.title("📝 Let's Analyze Your Finances")
 st.markdown("Answer a few quick questions to get your personalized financial analysis.")
 
-# Financial Snapshot
-st.markdown("### Step 1: Financial Snapshot")
-
-with st.form("snapshot_form"):
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        monthly_income = st.number_input(
-            "💵 Monthly Income (₹)",
-            min_value=0,
-            value=st.session_state.guest_data['snapshot'].get('monthly_income', 0),
-            step=1000,
-            help="Your total monthly income (salary, business income, etc.)"
-        )
-        
-        monthly_expenses = st.number_input(
-            "💸 Monthly Expenses (₹)",
-            min_value=0,
-            value=st.session_state.guest_data['snapshot'].get('monthly_expenses', 0),
-            step=1000,
-            help="Your total monthly spending (rent, bills, groceries, etc.)"
-        )
+# Each step is a fragment: submitting a form or deleting a row reruns only
+# that fragment, not the whole page (which re-sent every asset and debt row).
+
+
+def _add_asset():
+    name, value = st.session_state.asset_name, st.session_state.asset_value
+    if name and value > 0:
+        st.session_state.guest_data['assets'].append(Asset(
+            type=st.session_state.asset_type.lower().replace(' ', '_'),
+            name=name,
+            value=value
+        ))
+        st.session_state.asset_added = name
+        _persist('assets')
+
+
+def _add_debt():
+    name, outstanding = st.session_state.debt_name, st.session_state.debt_outstanding
+    if name and outstanding > 0:
+        st.session_state.guest_data['liabilities'].append(Liability(
+            type=st.session_state.debt_type.lower().replace(' ', '_'),
+            name=name,
+            outstanding=outstanding,
+            interest_rate=st.session_state.debt_interest_rate / 100
+        ))
+        st.session_state.debt_added = name
+        _persist('liabilities')
+
+
+def _remove(kind: str, idx: int):
+    items = st.session_state.guest_data[kind]
+    if idx < len(items):
+        items.pop(idx)
+        _persist(kind)
+
+
+@st.fragment
+def snapshot_form():
+    st.markdown("### Step 1: Financial Snapshot")
     
-    with col2:
-        # Calculate and show monthly surplus
-        monthly_surplus = monthly_income - monthly_expenses
+    with st.form("snapshot_form"):
+        col1, col2 = st.columns(2)
         
-        st.markdown("#### 💡 Calculated")
-        st.metric(
-            "Monthly Surplus",
-            f"₹{monthly_surplus:,.0f}",
-            delta="Available for savings/goals" if monthly_surplus > 0 else "Budget deficit",
-            delta_color="normal" if monthly_surplus >= 0 else "inverse"
-        )
+        with col1:
+            monthly_income = st.number_input(
+                "💵 Monthly Income (₹)",
+                min_value=0,
+                value=st.session_state.guest_data['snapshot'].get('monthly_income', 0),
+                step=1000,
+                help="Your total monthly income (salary, business income, etc.)"
+            )
+            
+            monthly_expenses = st.number_input(
+                "💸 Monthly Expenses (₹)",
+                min_value=0,
+                value=st.session_state.guest_data['snapshot'].get('monthly_expenses', 0),
+                step=1000,
+                help="Your total monthly spending (rent, bills, groceries, etc.)"
+            )
         
-        st.markdown("")
-        existing_savings = st.number_input(
-            "💰 Existing Savings Balance (₹)",
-            min_value=0,
-            value=st.session_state.guest_data['snapshot'].get('current_savings', 0),
-            step=5000,
-            help="Total money you already have saved (bank accounts, FDs, liquid funds)"
-        )
-    
-    submitted = st.form_submit_button("➡️ Next: Add Assets & Debts", use_container_width=True, type="primary")
-    
-    if submitted:
-        if monthly_income == 0:
-            st.error("Please enter your monthly income")
-        else:
-            st.session_state.guest_data['snapshot'] = {
-                'monthly_income': monthly_income,
-                'monthly_expenses': monthly_expenses,
-                'current_savings': existing_savings,
-            }
+        with col2:
+            # Calculate and show monthly surplus
+            monthly_surplus = monthly_income - monthly_expenses
             
-            # Save to database if logged in
-            if st.session_state.user_id:
-                from services.data_service import DataService
-                DataService.save_snapshot(st.session_state.user_id, st.session_state.guest_data['snapshot'])
+            st.markdown("#### 💡 Calculated")
+            st.metric(
+                "Monthly Surplus",
+                f"₹{monthly_surplus:,.0f}",
+                delta="Available for savings/goals" if monthly_surplus > 0 else "Budget deficit",
+                delta_color="normal" if monthly_surplus >= 0 else "inverse"
+            )
             
-            st.success("✅ Snapshot saved!")
-            st.session_state.onboarding_step = 2
-            st.rerun()
+            st.markdown("")
+            existing_savings = st.number_input(
+                "💰 Existing Savings Balance (₹)",
+                min_value=0,
+                value=st.session_state.guest_data['snapshot'].get('current_savings', 0),
+                step=5000,
+                help="Total money you already have saved (bank accounts, FDs, liquid funds)"
+            )
+        
+        submitted = st.form_submit_button("➡️ Next: Add Assets & Debts", use_container_width=True, type="primary")
+        
+        if submitted:
+            if monthly_income == 0:
+                st.error("Please enter your monthly income")
+            else:
+                st.session_state.guest_data['snapshot'] = Snapshot(
+                    monthly_income=monthly_income,
+                    monthly_expenses=monthly_expenses,
+                    current_savings=existing_savings,
+                )
+                
+                _persist('snapshot')
+                
+                st.success("✅ Snapshot saved!")
+                # Step 2 lives outside this fragment; show it with one full rerun
+                if st.session_state.get('onboarding_step', 1) < 2:
+                    st.session_state.onboarding_step = 2
+                    st.rerun()
+    
+    save_guest_data()
+
+
+@st.fragment
+def asset_list():
+    st.markdown("Add your investments and assets")
+    
+    with st.form("asset_form"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.selectbox("Type", ["Cash", "Fixed Deposit", "Mutual Fund", "Stocks", "Gold", "Other"], key="asset_type")
+        with col2:
+            st.text_input("Name", placeholder="e.g., HDFC Equity Fund", key="asset_name")
+        with col3:
+            st.number_input("Value (₹)", min_value=0, step=1000, key="asset_value")
+        
+        st.form_submit_button("➕ Add Asset", on_click=_add_asset)
+    
+    if st.session_state.get('asset_added'):
+        st.success(f"✅ Added {st.session_state.pop('asset_added')}")
+    
+    # Show existing assets
+    if st.session_state.guest_data['assets']:
+        st.markdown("**Your Assets:**")
+        for idx, asset in enumerate(st.session_state.guest_data['assets']):
+            col1, col2, col3 = st.columns([3, 2, 1])
+            col1.write(f"**{asset['name']}** ({asset['type']})")
+            col2.write(f"₹{asset['value']:,.0f}")
+            col3.button("🗑️", key=f"del_asset_{idx}", on_click=_remove, args=('assets', idx))
+    
+    save_guest_data()
+
+
+@st.fragment
+def debt_list():
+    st.markdown("Add your loans and credit card debt")
+    
+    with st.form("liability_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.selectbox("Type", ["Credit Card", "Personal Loan", "Home Loan", "Car Loan", "Other"], key="debt_type")
+            st.text_input("Name", placeholder="e.g., HDFC Credit Card", key="debt_name")
+        with col2:
+            st.number_input("Outstanding (₹)", min_value=0, step=1000, key="debt_outstanding")
+            st.number_input("Interest Rate (%)", min_value=0.0, max_value=100.0, value=12.0, key="debt_interest_rate")
+        
+        st.form_submit_button("➕ Add Debt", on_click=_add_debt)
+    
+    if st.session_state.get('debt_added'):
+        st.success(f"✅ Added {st.session_state.pop('debt_added')}")
+    
+    # Show existing debts
+    if st.session_state.guest_data['liabilities']:
+        st.markdown("**Your Debts:**")
+        for idx, debt in enumerate(st.session_state.guest_data['liabilities']):
+            col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+            col1.write(f"**{debt['name']}**")
+            col2.write(f"₹{debt['outstanding']:,.0f}")
+            col3.write(f"{debt['interest_rate']*100:.1f}% APR")
+            col4.button("🗑️", key=f"del_debt_{idx}", on_click=_remove, args=('liabilities', idx))
+    
+    save_guest_data()
+
+
+# Financial Snapshot
+snapshot_form()
 
 # Assets & Liabilities
 if st.session_state.get('onboarding_step', 1) >= 2:
@@ -118,72 +242,10 @@ if st.session_state.get('onboarding_step', 1) >= 2:
     tab1, tab2 = st.tabs(["💰 Assets", "💳 Debts"])
     
     with tab1:
-        st.markdown("Add your investments and assets")
-        
-        with st.form("asset_form"):
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                asset_type = st.selectbox("Type", ["Cash", "Fixed Deposit", "Mutual Fund", "Stocks", "Gold", "Other"])
-            with col2:
-                asset_name = st.text_input("Name", placeholder="e.g., HDFC Equity Fund")
-            with col3:
-                asset_value = st.number_input("Value (₹)", min_value=0, step=1000)
-            
-            if st.form_submit_button("➕ Add Asset"):
-                if asset_name and asset_value > 0:
-                    st.session_state.guest_data['assets'].append({
-                        'type': asset_type.lower().replace(' ', '_'),
-                        'name': asset_name,
-                        'value': asset_value
-                    })
-                    st.success(f"✅ Added {asset_name}")
-                    st.rerun()
-        
-        # Show existing assets
-        if st.session_state.guest_data['assets']:
-            st.markdown("**Your Assets:**")
-            for idx, asset in enumerate(st.session_state.guest_data['assets']):
-                col1, col2, col3 = st.columns([3, 2, 1])
-                col1.write(f"**{asset['name']}** ({asset['type']})")
-                col2.write(f"₹{asset['value']:,.0f}")
-                if col3.button("🗑️", key=f"del_asset_{idx}"):
-                    st.session_state.guest_data['assets'].pop(idx)
-                    st.rerun()
+        asset_list()
     
     with tab2:
-        st.markdown("Add your loans and credit card debt")
-        
-        with st.form("liability_form"):
-            col1, col2 = st.columns(2)
-            with col1:
-                debt_type = st.selectbox("Type", ["Credit Card", "Personal Loan", "Home Loan", "Car Loan", "Other"])
-                debt_name = st.text_input("Name", placeholder="e.g., HDFC Credit Card")
-            with col2:
-                outstanding = st.number_input("Outstanding (₹)", min_value=0, step=1000)
-                interest_rate = st.number_input("Interest Rate (%)", min_value=0.0, max_value=100.0, value=12.0)
-            
-            if st.form_submit_button("➕ Add Debt"):
-                if debt_name and outstanding > 0:
-                    st.session_state.guest_data['liabilities'].append({
-                        'type': debt_type.lower().replace(' ', '_'),
-                        'name': debt_name,
-                        'outstanding': outstanding,
-                        'interest_rate': interest_rate / 100
-                    })
-                    st.success(f"✅ Added {debt_name}")
-                    st.rerun()
-        
-        # Show existing debts
-        if st.session_state.guest_data['liabilities']:
-            st.markdown("**Your Debts:**")
-            for idx, debt in enumerate(st.session_state.guest_data['liabilities']):
-                col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
-                col1.write(f"**{debt['name']}**")
-                col2.write(f"₹{debt['outstanding']:,.0f}")
-                col3.write(f"{debt['interest_rate']*100:.1f}% APR")
-                if col4.button("🗑️", key=f"del_debt_{idx}"):
-                    st.session_state.guest_data['liabilities'].pop(idx)
-                    st.rerun()
+        debt_list()
     
     # Generate analysis button
     st.markdown("---")
@@ -200,16 +262,39 @@ if st.session_state.get('onboarding_step', 1) >= 2:
         
         st.session_state.guest_data['analysis'] = analysis
         
-        # Save to database if logged in
+        # Save to database if logged in (the plan ID is assigned here, so it
+        # is known before the queued save runs)
         if st.session_state.user_id:
-            from services.data_service import DataService
-            DataService.save_assets(st.session_state.user_id, st.session_state.guest_data['assets'])
-            DataService.save_liabilities(st.session_state.user_id, st.session_state.guest_data['liabilities'])
+            import uuid
+
+            from services.plan_generator import PlanGenerator
+            from services.user_data_writer import get_user_data_writer
+            plan = PlanGenerator.generate_plan(
+                st.session_state.guest_data['snapshot'],
+                st.session_state.guest_data['assets'],
+                st.session_state.guest_data['liabilities'],
+                st.session_state.guest_data.get('goals', []),
+                analysis=analysis
+            )
+            _persist('assets')
+            _persist('liabilities')
+            st.session_state.plan_id = str(uuid.uuid4())
+            get_user_data_writer().submit(st.session_state.user_id, 'plan',
+                                          {**plan, 'plan_id': st.session_state.plan_id})
         
         st.success("✅ Analysis complete!")
         if st.session_state.user_id:
-            st.info("💾 Data saved to your account!")
+            # Written behind this run; only claim success once nothing is queued
+            if get_user_data_writer().pending(st.session_state.user_id):
+                st.info("💾 Saving your data to your account...")
+            else:
+                st.info("💾 Data saved to your account!")
         st.balloons()
         
         # Navigate to dashboard
+        save_guest_data()
+        _flush_saves()
         st.switch_page("pages/2_dashboard.py")
+
+save_guest_data()
+end_page("onboarding", _instrumentation)
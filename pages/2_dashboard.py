@@ -2,8 +2,17 @@
 Enhanced Dashboard with Plotly Charts and Recommendations
 """
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
+
+from services import llm_gateway
+from services.plan_generator import PlanGenerator
+from services.rag import model_registry
+
+from utils import charts
+from utils.guest_session import load_guest_data, save_guest_data
+from utils.instrumentation import begin_page, end_page
+
+_instrumentation = begin_page("dashboard")
+model_registry.start_warmup()
 
 st.set_page_config(
     page_title="Dashboard - Finance Coach",
@@ -29,8 +38,11 @@ with st.sidebar:
 # Main content
 st.title("📊 Your Financial Dashboard")
 
+# Top actions don't depend on goals, so this page never loads them
+load_guest_data(('snapshot', 'assets', 'liabilities', 'analysis'))
+
 # Check if analysis exists
-if 'guest_data' not in st.session_state or not st.session_state.guest_data.get('analysis'):
+if not st.session_state.guest_data.get('analysis'):
     st.warning("⚠️ No analysis data available. Please complete the onboarding first!")
     if st.button("📝 Go to Onboarding"):
         st.switch_page("pages/1_onboarding.py")
@@ -88,79 +100,25 @@ else:
     with chart_col1:
         st.markdown("#### 📊 Income vs Expenses")
         
-        # Income vs Expenses Bar Chart
-        fig_income_expense = go.Figure()
-        fig_income_expense.add_trace(go.Bar(
-            name='Monthly',
-            x=['Income', 'Expenses', 'Surplus'],
-            y=[snapshot['monthly_income'], snapshot['monthly_expenses'], metrics['monthly_surplus']],
-            marker_color=['#10b981', '#ef4444', '#6366f1']
-        ))
-        fig_income_expense.update_layout(
-            height=300,
-            showlegend=False,
-            yaxis_title="Amount (₹)",
-            template="plotly_white"
+        st.plotly_chart(
+            charts.income_expense_chart(snapshot['monthly_income'], snapshot['monthly_expenses'],
+                                        metrics['monthly_surplus']),
+            use_container_width=True
         )
-        st.plotly_chart(fig_income_expense, use_container_width=True)
     
     with chart_col2:
         st.markdown("#### 💼 Assets vs Liabilities")
         
-        # Assets vs Liabilities Pie Chart
-        fig_assets_liab = go.Figure(data=[go.Pie(
-            labels=['Assets', 'Liabilities'],
-            values=[metrics['total_assets'], metrics['total_liabilities']],
-            marker_colors=['#10b981', '#ef4444'],
-            hole=0.4
-        )])
-        fig_assets_liab.update_layout(
-            height=300,
-            showlegend=True,
-            template="plotly_white"
+        st.plotly_chart(
+            charts.assets_liabilities_chart(metrics['total_assets'], metrics['total_liabilities']),
+            use_container_width=True
         )
-        st.plotly_chart(fig_assets_liab, use_container_width=True)
     
     # Health Scores with Visual Gauge
     st.markdown("---")
     st.markdown("### 📈 Financial Health Scores")
     
-    score_col1, score_col2, score_col3, score_col4 = st.columns(4)
-    
-    def create_gauge(value, title):
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=value,
-            title={'text': title},
-            gauge={
-                'axis': {'range': [None, 100]},
-                'bar': {'color': "#6366f1"},
-                'steps': [
-                    {'range': [0, 33], 'color': "#fecaca"},
-                    {'range': [33, 66], 'color': "#fde68a"},
-                    {'range': [66, 100], 'color': "#bbf7d0"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 75
-                }
-            }
-        ))
-        fig.update_layout(height=200, margin=dict(l=20, r=20, t=40, b=20))
-        return fig
-    
-    with score_col1:
-        st.plotly_chart(create_gauge(scores['emergency_fund'], "Emergency Fund"), use_container_width=True)
-    
-    with score_col2:
-        st.plotly_chart(create_gauge(scores['savings'], "Savings Rate"), use_container_width=True)
-    
-    with score_col3:
-        st.plotly_chart(create_gauge(scores['debt'], "Debt Health"), use_container_width=True)
-    
-    with score_col4:
-        st.plotly_chart(create_gauge(scores['overall_health'], "Overall Health"), use_container_width=True)
+    st.plotly_chart(charts.health_gauges(scores), use_container_width=True)
     
     # Overall Health Summary
     st.markdown("---")
@@ -178,55 +136,22 @@ else:
     st.markdown("---")
     st.markdown("### 🎯 Your Top 3 Priorities")
     
-    recommendations = []
-    
-    # Priority 1: Emergency Fund
-    if metrics['emergency_months'] < 3:
-        target_emergency = snapshot['monthly_expenses'] * 3
-        gap = target_emergency - snapshot['current_savings']
-        months_needed = gap / metrics['monthly_surplus'] if metrics['monthly_surplus'] > 0 else 0
-        recommendations.append({
-            'priority': 1,
-            'title': '🚨 Build Emergency Fund',
-            'description': f"You need **₹{gap:,.0f} more** to reach 3 months of expenses",
-            'action': f"Save ₹{gap/6:,.0f}/month for 6 months" if gap > 0 else "Maintain current level",
-            'impact': f"Achieve in {months_needed:.0f} months at current savings rate" if months_needed > 0 else "Already achieved!"
-        })
-    
-    # Priority 2: High-Interest Debt
-    high_interest_debts = [d for d in st.session_state.guest_data['liabilities'] if d['interest_rate'] > 0.15]
-    if high_interest_debts:
-        total_high_interest = sum(d['outstanding'] for d in high_interest_debts)
-        recommendations.append({
-            'priority': 2,
-            'title': '💳 Pay Off High-Interest Debt',
-            'description': f"You have **₹{total_high_interest:,.0f}** in high-interest debt (>15% APR)",
-            'action': f"Focus extra ₹{metrics['monthly_surplus']*0.7:,.0f}/month on highest interest debt",
-            'impact': f"Save thousands in interest payments"
-        })
-    
-    # Priority 3: Increase Savings Rate
-    if metrics['savings_rate'] < 20:
-        target_rate = 20
-        target_savings = snapshot['monthly_income'] * (target_rate / 100)
-        gap = target_savings - (snapshot['monthly_income'] - snapshot['monthly_expenses'])
-        recommendations.append({
-            'priority': 3,
-            'title': '📊 Increase Savings Rate',
-            'description': f"Current: **{metrics['savings_rate']:.1f}%**, Target: **{target_rate}%**",
-            'action': f"Reduce expenses by ₹{gap:,.0f}/month",
-            'impact': f"Save an additional ₹{gap*12:,.0f}/year"
-        })
-    
-    # If financially healthy, suggest investment goals
-    if not recommendations and scores['overall_health'] >= 75:
-        recommendations.append({
-            'priority': 1,
-            'title': '🚀 Invest for Growth',
-            'description': "Your financial foundation is strong!",
-            'action': f"Invest ₹{metrics['monthly_surplus']*0.8:,.0f}/month in mutual funds or index funds",
-            'impact': "Build long-term wealth and achieve financial freedom faster"
-        })
+    # The plan only depends on the session's inputs: regenerate it when
+    # their structural hash changes, not on every rerun
+    fingerprint = st.session_state.guest_data.fingerprint()
+    cached_plan = st.session_state.get('dashboard_plan')
+    if cached_plan and cached_plan[0] == fingerprint:
+        plan = cached_plan[1]
+    else:
+        plan = PlanGenerator.generate_plan(
+            snapshot,
+            st.session_state.guest_data['assets'],
+            st.session_state.guest_data['liabilities'],
+            analysis=analysis
+        )
+        st.session_state.dashboard_plan = (fingerprint, plan)
+    recommendations = plan['top_actions']
+    explain_loading = model_registry.is_loading()
     
     # Display recommendations
     for rec in recommendations[:3]:  # Top 3 only
@@ -234,6 +159,27 @@ else:
             st.markdown(f"**Situation:** {rec['description']}")
             st.markdown(f"**Action:** {rec['action']}")
             st.markdown(f"**Impact:** {rec['impact']}")
+            
+            if llm_gateway.is_configured() and st.button(
+                "💬 Why this?", key=f"why_{rec['type']}", disabled=explain_loading,
+                help="Loading the explanation model..." if explain_loading else None
+            ):
+                # Retrieval, cache and audit stack load on the first click, not at page import
+                from services.rag import explain
+                explanation = explain.stream_explanation(
+                    rec, metrics,
+                    user_id=st.session_state.get('user_id'),
+                    plan_id=st.session_state.get('plan_id')
+                )
+                placeholder = st.empty()
+                text = ""
+                try:
+                    for token in explanation:
+                        text += token
+                        placeholder.markdown(text + "▌")
+                    placeholder.markdown(text)
+                except (llm_gateway.LLMError, RuntimeError):
+                    placeholder.warning("Explanation is unavailable right now. Please try again shortly.")
     
     # Breakdown
     st.markdown("---")
@@ -275,3 +221,6 @@ else:
     st.markdown("---")
     if st.button("🎯 Set Financial Goals Based on This Analysis", use_container_width=True, type="primary"):
         st.switch_page("pages/3_goals.py")
+
+save_guest_data()
+end_page("dashboard", _instrumentation)
@@ -1,9 +1,18 @@
 """
 Enhanced Goals Page with Projections and Timeline
 """
+import math
+
 import streamlit as st
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
+
+from models.session import Goal
+from services.calculator import FinancialCalculator
+from utils import charts
+from utils.guest_session import load_guest_data, save_guest_data
+from utils.instrumentation import begin_page, end_page
+
+_instrumentation = begin_page("goals")
 
 st.set_page_config(
     page_title="Goals - Finance Coach",
@@ -11,11 +20,10 @@ st.set_page_config(
     layout="wide",
 )
 
-# Initialize goals in session state
-if 'guest_data' not in st.session_state:
-    st.session_state.guest_data = {'goals': []}
-if 'goals' not in st.session_state.guest_data:
-    st.session_state.guest_data['goals'] = []
+GOALS_PER_PAGE = 20
+
+# Guest data for this session (from the shared session store on a new replica)
+load_guest_data(('snapshot', 'goals', 'analysis'))
 
 # Sidebar
 with st.sidebar:
@@ -83,63 +91,63 @@ with st.expander("➕ Add New Goal", expanded=len(st.session_state.guest_data['g
         
         if st.form_submit_button("Add Goal", use_container_width=True, type="primary"):
             if goal_name and target_amount > 0:
-                st.session_state.guest_data['goals'].append({
-                    'name': goal_name,
-                    'target_amount': target_amount,
-                    'current_progress': current_progress,
-                    'target_date': (datetime.now() + timedelta(days=months*30)).strftime("%Y-%m-%d"),
-                    'category': category,
-                    'required_monthly': required_monthly if 'required_monthly' in locals() else 0,
-                    'created_at': datetime.now().strftime("%Y-%m-%d")
-                })
+                st.session_state.guest_data['goals'].append(Goal(
+                    name=goal_name,
+                    target_amount=target_amount,
+                    current_progress=current_progress,
+                    target_date=(datetime.now() + timedelta(days=months*30)).strftime("%Y-%m-%d"),
+                    category=category,
+                    required_monthly=required_monthly if 'required_monthly' in locals() else 0,
+                    created_at=datetime.now().strftime("%Y-%m-%d")
+                ))
                 st.success(f"✅ Added goal: {goal_name}")
-                st.rerun()
             else:
                 st.error("Please enter goal name and target amount")
 
+def _delete_goal(idx: int):
+    goals = st.session_state.guest_data['goals']
+    if idx < len(goals):
+        goals.pop(idx)
+
+
 # Show existing goals
 if st.session_state.guest_data['goals']:
+    goals = st.session_state.guest_data['goals']
     st.markdown("---")
     st.markdown("### Your Active Goals")
     
+    # Projections for every goal in one pass (chart + cards read from these arrays)
+    projection = FinancialCalculator.project_goals(goals, monthly_surplus)
+    
     # Goals summary chart
-    if len(st.session_state.guest_data['goals']) > 1:
-        fig = go.Figure()
-        
-        for goal in st.session_state.guest_data['goals']:
-            progress_pct = (goal.get('current_progress', 0) / goal['target_amount'] * 100) if goal['target_amount'] > 0 else 0
-            
-            fig.add_trace(go.Bar(
-                name=goal['name'],
-                x=[goal['name']],
-                y=[goal['target_amount']],
-                text=[f"₹{goal['target_amount']:,.0f}"],
-                textposition='auto',
-                marker_color='lightgray',
-                showlegend=False
-            ))
-            
-            fig.add_trace(go.Bar(
-                name=f"{goal['name']} Progress",
-                x=[goal['name']],
-                y=[goal.get('current_progress', 0)],
-                text=[f"₹{goal.get('current_progress', 0):,.0f}"],
-                textposition='auto',
-                marker_color='#6366f1',
-                showlegend=False
-            ))
-        
-        fig.update_layout(
-            title="Goals Progress Overview",
-            barmode='overlay',
-            height=300,
-            yaxis_title="Amount (₹)",
-            template="plotly_white"
+    if len(goals) > 1:
+        st.plotly_chart(
+            charts.goals_overview_chart(
+                tuple(goal['name'] for goal in goals),
+                tuple(projection['target'].tolist()),
+                tuple(projection['progress'].tolist())
+            ),
+            use_container_width=True
         )
-        st.plotly_chart(fig, use_container_width=True)
     
-    # Individual goal cards
-    for idx, goal in enumerate(st.session_state.guest_data['goals']):
+    # Individual goal cards, one page at a time
+    pages = math.ceil(len(goals) / GOALS_PER_PAGE)
+    page = 1
+    if st.session_state.get('goals_page', 1) > pages:
+        # Deleting goals can leave the selected page past the end
+        st.session_state.goals_page = pages
+    if pages > 1:
+        page = st.number_input("Page", min_value=1, max_value=pages, key="goals_page")
+    start = (page - 1) * GOALS_PER_PAGE
+    end = min(start + GOALS_PER_PAGE, len(goals))
+    if pages > 1:
+        st.caption(f"Showing goals {start + 1}–{end} of {len(goals)} (page {page} of {pages})")
+    
+    for idx in range(start, end):
+        goal = goals[idx]
+        progress_pct = projection['progress_pct'][idx]
+        remaining = projection['remaining'][idx]
+        
         with st.container():
             col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
             
@@ -149,7 +157,6 @@ if st.session_state.guest_data['goals']:
                 st.caption(f"🗓️ Target Date: {goal['target_date']}")
             
             with col2:
-                progress_pct = (goal.get('current_progress', 0) / goal['target_amount'] * 100) if goal['target_amount'] > 0 else 0
                 st.metric("Progress", f"{progress_pct:.1f}%")
                 st.progress(min(progress_pct / 100, 1.0))
             
@@ -158,15 +165,12 @@ if st.session_state.guest_data['goals']:
                 st.caption(f"Target: ₹{goal['target_amount']:,.0f}")
             
             with col4:
-                if st.button("🗑️", key=f"del_goal_{idx}"):
-                    st.session_state.guest_data['goals'].pop(idx)
-                    st.rerun()
+                st.button("🗑️", key=f"del_goal_{idx}", on_click=_delete_goal, args=(idx,))
                 
                 if st.button("✏️", key=f"edit_goal_{idx}"):
                     st.info("Edit feature coming soon!")
             
             # Goal timeline projection
-            remaining = goal['target_amount'] - goal.get('current_progress', 0)
             required_monthly = goal.get('required_monthly', 0)
             
             if remaining > 0:
@@ -182,19 +186,15 @@ if st.session_state.guest_data['goals']:
                 
                 with proj_col3:
                     if monthly_surplus > 0:
-                        realistic_months = remaining / monthly_surplus
-                        realistic_date = (datetime.now() + timedelta(days=realistic_months*30)).strftime("%Y-%m-%d")
+                        realistic_date = str(projection['realistic_date'][idx])
                         st.caption("⏱️ Realistic Completion")
                         st.write(f"**{realistic_date}**")
                         
                         # Show if achievable
-                        target_date_obj = datetime.strptime(goal['target_date'], "%Y-%m-%d")
-                        realistic_date_obj = datetime.strptime(realistic_date, "%Y-%m-%d")
-                        
-                        if realistic_date_obj <= target_date_obj:
+                        if projection['on_track'][idx]:
                             st.success("✅ On track!")
                         else:
-                            days_over = (realistic_date_obj - target_date_obj).days
+                            days_over = projection['days_over'][idx]
                             st.warning(f"⚠️ **Timeline Adjustment Needed**")
                             st.markdown(f"""
                                 Based on your monthly surplus of **₹{monthly_surplus:,.0f}**, 
@@ -248,3 +248,6 @@ else:
 st.markdown("---")
 if st.button("📊 View Financial Analysis", use_container_width=True):
     st.switch_page("pages/2_dashboard.py")
+
+save_guest_data()
+end_page("goals", _instrumentation)
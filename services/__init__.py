@@ -3,10 +3,18 @@
 Services layer for standalone Streamlit architecture.
 
 This module contains business logic separated from UI and data layers:
+- archive: Monthly partitioning and Parquet archival of audit logs and snapshots
+- audit_log: Buffered background writer for RecommendationLog audit records
 - auth_service: User authentication and session management
+- backtest: Vectorized SIP, lump-sum and value-averaging backtests over aligned price series
 - calculator: Financial calculations (net worth, debt ratios, etc.)
-- plan_generator: Personalized action plan generation
-- rule_engine: Deterministic financial rules and logic
+- data_service: CRUD and conditional reads for snapshots, assets, liabilities, goals, plans
+- guest_migration: One-transaction migration of guest session data into an account on signup/login
+- llm_gateway: Coalescing, concurrency-limited async client for the explanation LLM
+- plan_generator: Deterministic rule engine and personalized action plan generation
+- price_store: Memory-mapped, append-only NAV/price series with incremental AMFI/CSV ingest
+- session_store: Shared guest session store (memory, SQLite, networked KV) with write-behind
+- user_data_writer: Debounced write-behind saves of logged-in users' onboarding edits
 
 Following clean architecture principles for maintainability.
 """
@@ -0,0 +1,513 @@
+"""
+Month-partitioned retention for recommendation_logs and financial_snapshots.
+
+Both tables are append-mostly and grow with every onboarding submit and
+every "Why this?". Rows move through three tiers:
+
+- hot: the live table, holding the last ARCHIVE_HOT_MONTHS months
+- warm: one table per month, <table>_pYYYYMM. On Postgres,
+  recommendation_logs can be natively partitioned by range on created_at
+  (see postgres_partition_ddl()), and these are its partitions. Everywhere
+  else (SQLite, and financial_snapshots, which plans.snapshot_id
+  references and Postgres cannot point a foreign key at a partitioned
+  table) they are shadow tables that rotate() moves rows into.
+- cold: months older than ARCHIVE_COLD_MONTHS are written to
+  ARCHIVE_DIR/<table>/<YYYYMM>.parquet (zstd, sorted by user and time)
+  and their warm table is dropped. ARCHIVE_DIR/index.json lists every
+  archive with its row count, created_at range and checksum.
+
+Snapshots still referenced by a plan, and each user's latest snapshot,
+always stay hot. query_range() reads a created_at range across all three
+tiers, opening only the warm tables and archives whose month overlaps it.
+
+Usage:
+    python -m services.archive              # rotate + archive
+    python -m services.archive --dry-run    # show what would move
+    python -m services.archive --postgres-ddl  # print the partitioning migration
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (JSON, Column, DateTime, Integer, MetaData, Numeric, Table, and_, delete, exists, func,
+                        insert, inspect, select, text, true)
+from sqlalchemy.engine import Connection, Engine
+
+from config import settings
+from models.database import get_engine
+from models.financial import FinancialSnapshot
+from models.plans import Plan, RecommendationLog
+from models.user import User  # noqa: F401  (registers users for foreign keys)
+
+logger = logging.getLogger(__name__)
+
+TABLES = {
+    "recommendation_logs": RecommendationLog.__table__,
+    "financial_snapshots": FinancialSnapshot.__table__,
+}
+# Tables that may be natively partitioned on Postgres (no inbound foreign keys)
+NATIVE_PARTITIONABLE = ("recommendation_logs",)
+INDEX_FILE = "index.json"
+ROW_GROUP_SIZE = 65536
+
+Month = Tuple[int, int]
+
+
+# -- months ------------------------------------------------------------
+
+def month_start(month: Month) -> datetime:
+    return datetime(month[0], month[1], 1)
+
+
+def next_month(month: Month) -> Month:
+    year, mon = month
+    return (year + 1, 1) if mon == 12 else (year, mon + 1)
+
+
+def months_ago(months: int, today: Optional[date] = None) -> Month:
+    """First month that is still within `months` of today (the retention cutoff)."""
+    today = today or datetime.utcnow().date()
+    index = today.year * 12 + today.month - 1 - months
+    return (index // 12, index % 12 + 1)
+
+
+def month_label(month: Month) -> str:
+    return f"{month[0]:04d}{month[1]:02d}"
+
+
+def partition_name(table: str, month: Month) -> str:
+    return f"{table}_p{month_label(month)}"
+
+
+def _parse_partition(table: str, name: str) -> Optional[Month]:
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+# -- warm tier -----------------------------------------------------------
+
+def _shadow(table: Table, name: str) -> Table:
+    """Same columns as table, no constraints or indexes (one month is small)."""
+    columns = [Column(c.name, c.type, primary_key=c.primary_key) for c in table.columns]
+    return Table(name, MetaData(), *columns)
+
+
+def is_native_partitioned(conn: Connection, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :t"
+    ), {"t": table}).first() is not None
+
+
+def warm_partitions(conn: Connection, table: str) -> Dict[Month, str]:
+    """Month -> warm table name (shadow tables or native partitions)."""
+    found = {}
+    for name in inspect(conn).get_table_names():
+        month = _parse_partition(table, name)
+        if month is not None:
+            found[month] = name
+    return dict(sorted(found.items()))
+
+
+def _eligible(table: Table):
+    """Rows of table that may leave the hot tier (beyond the age cutoff)."""
+    if table.name != "financial_snapshots":
+        return None
+    latest = table.alias("latest")
+    return and_(
+        ~exists().where(Plan.__table__.c.snapshot_id == table.c.id),
+        table.c.created_at < select(func.max(latest.c.created_at))
+        .where(latest.c.user_id == table.c.user_id).scalar_subquery(),
+    )
+
+
+def rotate(table_name: str, hot_months: Optional[int] = None, dry_run: bool = False,
+           engine: Optional[Engine] = None, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Move rows older than hot_months from the hot table into monthly shadow tables.
+
+    No-op for a natively partitioned table (rows are already in their month).
+
+    Returns:
+        Shadow table name -> rows moved
+    """
+    engine = engine or get_engine()
+    table = TABLES[table_name]
+    cutoff = month_start(months_ago(settings.ARCHIVE_HOT_MONTHS if hot_months is None else hot_months, today))
+    eligible = _eligible(table)
+    moved: Dict[str, int] = {}
+
+    with engine.begin() as conn:
+        if is_native_partitioned(conn, table_name):
+            return moved
+        condition = table.c.created_at < cutoff
+        if eligible is not None:
+            condition = and_(condition, eligible)
+        oldest = conn.execute(select(func.min(table.c.created_at)).where(condition)).scalar()
+        if oldest is None:
+            return moved
+
+        month = (oldest.year, oldest.month)
+        while month_start(month) < cutoff:
+            in_month = and_(condition, table.c.created_at >= month_start(month),
+                            table.c.created_at < month_start(next_month(month)))
+            count = conn.execute(select(func.count()).select_from(table).where(in_month)).scalar()
+            if count:
+                name = partition_name(table_name, month)
+                if not dry_run:
+                    shadow = _shadow(table, name)
+                    shadow.create(conn, checkfirst=True)
+                    conn.execute(insert(shadow).from_select(
+                        [c.name for c in table.columns], select(*table.columns).where(in_month)))
+                    conn.execute(delete(table).where(in_month))
+                moved[name] = count
+            month = next_month(month)
+
+    for name, count in moved.items():
+        logger.info("%s %d rows into %s", "Would move" if dry_run else "Moved", count, name)
+    return moved
+
+
+def ensure_partitions(months_ahead: int = 3, engine: Optional[Engine] = None,
+                      today: Optional[date] = None) -> List[str]:
+    """
+    Create upcoming monthly partitions of natively partitioned tables (Postgres).
+
+    Returns:
+        Names of partitions created
+    """
+    engine = engine or get_engine()
+    created = []
+    with engine.begin() as conn:
+        for table_name in NATIVE_PARTITIONABLE:
+            if not is_native_partitioned(conn, table_name):
+                continue
+            existing = warm_partitions(conn, table_name)
+            month = months_ago(0, today)
+            for _ in range(months_ahead + 1):
+                if month not in existing:
+                    name = partition_name(table_name, month)
+                    conn.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {table_name} "
+                        f"FOR VALUES FROM ('{month_start(month):%Y-%m-%d}') TO ('{month_start(next_month(month)):%Y-%m-%d}')"
+                    ))
+                    created.append(name)
+                month = next_month(month)
+    return created
+
+
+def postgres_partition_ddl(table_name: str = "recommendation_logs", first_month: Optional[Month] = None,
+                           months_ahead: int = 3, today: Optional[date] = None) -> str:
+    """
+    Migration converting table_name into a range-partitioned table on created_at.
+
+    The primary key becomes (id, created_at), since Postgres requires the
+    partition key in every unique constraint. Printed for review rather
+    than run automatically.
+    """
+    if table_name not in NATIVE_PARTITIONABLE:
+        raise ValueError(f"{table_name} is referenced by foreign keys and cannot be natively partitioned")
+    table = TABLES[table_name]
+    old = f"{table_name}_unpartitioned"
+    last = months_ago(-months_ahead, today)
+    month = first_month or months_ago(settings.ARCHIVE_COLD_MONTHS, today)
+
+    lines = [
+        "BEGIN;",
+        f"ALTER TABLE {table_name} RENAME TO {old};",
+        f"CREATE TABLE {table_name} (LIKE {old} INCLUDING DEFAULTS INCLUDING CHECK) PARTITION BY RANGE (created_at);",
+        f"ALTER TABLE {table_name} ADD PRIMARY KEY (id, created_at);",
+    ]
+    for fk in table.foreign_keys:
+        ondelete = f" ON DELETE {fk.ondelete}" if fk.ondelete else ""
+        lines.append(f"ALTER TABLE {table_name} ADD FOREIGN KEY ({fk.parent.name}) "
+                     f"REFERENCES {fk.column.table.name} ({fk.column.name}){ondelete};")
+    for index in table.indexes:
+        columns = ", ".join(c.name for c in index.columns)
+        lines.append(f"CREATE INDEX ON {table_name} ({columns});")
+    while month <= last:
+        lines.append(f"CREATE TABLE {partition_name(table_name, month)} PARTITION OF {table_name} "
+                     f"FOR VALUES FROM ('{month_start(month):%Y-%m-%d}') "
+                     f"TO ('{month_start(next_month(month)):%Y-%m-%d}');")
+        month = next_month(month)
+    lines += [
+        f"CREATE TABLE {table_name}_default PARTITION OF {table_name} DEFAULT;",
+        f"INSERT INTO {table_name} SELECT * FROM {old};",
+        f"DROP TABLE {old};",
+        "COMMIT;",
+    ]
+    return "\n".join(lines)
+
+
+# -- cold tier -----------------------------------------------------------
+
+def _arrow_schema(table: Table):
+    import pyarrow as pa
+
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Numeric):
+            arrow_type = pa.decimal128(column.type.precision or 18, column.type.scale or 2)
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        else:
+            # Strings, enums and JSON (stored as its text)
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable or column.primary_key))
+    return pa.schema(fields)
+
+
+def _to_arrow(table: Table, rows: List[Dict[str, Any]]):
+    import pyarrow as pa
+
+    json_columns = [c.name for c in table.columns if isinstance(c.type, JSON)]
+    for row in rows:
+        for name in json_columns:
+            if row[name] is not None:
+                row[name] = json.dumps(row[name])
+    rows.sort(key=lambda r: (r["user_id"], r["created_at"]))
+    return pa.Table.from_pylist(rows, schema=_arrow_schema(table))
+
+
+def _from_arrow(table: Table, arrow_table) -> List[Dict[str, Any]]:
+    json_columns = [c.name for c in table.columns if isinstance(c.type, JSON)]
+    rows = arrow_table.to_pylist()
+    for row in rows:
+        for name in json_columns:
+            if row[name] is not None:
+                row[name] = json.loads(row[name])
+    return rows
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArchiveIndex:
+    """ARCHIVE_DIR/index.json: one entry per (table, month) archive file."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.ARCHIVE_DIR)
+        self.path = self.root / INDEX_FILE
+        self.entries: List[Dict[str, Any]] = []
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))["archives"]
+
+    def find(self, table: str, month: Optional[Month] = None) -> List[Dict[str, Any]]:
+        label = month_label(month) if month else None
+        return [e for e in self.entries if e["table"] == table and (label is None or e["month"] == label)]
+
+    def overlapping(self, table: str, start: Optional[datetime], end: Optional[datetime]) -> List[Dict[str, Any]]:
+        """Archives of table holding any row with start <= created_at < end."""
+        return [
+            e for e in self.find(table)
+            if (start is None or datetime.fromisoformat(e["max_created_at"]) >= start)
+            and (end is None or datetime.fromisoformat(e["min_created_at"]) < end)
+        ]
+
+    def put(self, entry: Dict[str, Any]) -> None:
+        self.entries = [e for e in self.entries if (e["table"], e["month"]) != (entry["table"], entry["month"])]
+        self.entries.append(entry)
+        self.entries.sort(key=lambda e: (e["table"], e["month"]))
+        self.save()
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"archives": self.entries}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _write_archive(table: Table, month: Month, rows: List[Dict[str, Any]], index: ArchiveIndex) -> Dict[str, Any]:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    arrow_table = _to_arrow(table, rows)
+    path = index.root / table.name / f"{month_label(month)}.parquet"
+    if path.exists():
+        # Month archived before (e.g. a snapshot freed by a deleted plan): merge,
+        # letting this run's copy of any row win so a retried export is idempotent
+        existing = pq.read_table(path, schema=arrow_table.schema)
+        existing = existing.filter(pc.invert(pc.is_in(existing["id"], value_set=arrow_table["id"])))
+        arrow_table = pa.concat_tables([existing, arrow_table])
+        arrow_table = arrow_table.sort_by([("user_id", "ascending"), ("created_at", "ascending")])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(arrow_table, tmp, compression=settings.ARCHIVE_COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+    if pq.read_metadata(tmp).num_rows != arrow_table.num_rows:
+        tmp.unlink()
+        raise RuntimeError(f"Archive {path} failed verification")
+    os.replace(tmp, path)
+
+    created = arrow_table["created_at"]
+    entry = {
+        "table": table.name,
+        "month": month_label(month),
+        "path": str(path.relative_to(index.root)),
+        "rows": arrow_table.num_rows,
+        "bytes": path.stat().st_size,
+        "min_created_at": pc.min(created).as_py().isoformat(),
+        "max_created_at": pc.max(created).as_py().isoformat(),
+        "sha256": _sha256(path),
+        "archived_at": datetime.utcnow().isoformat(timespec="seconds"),
+    }
+    index.put(entry)
+    return entry
+
+
+def archive(table_name: str, cold_months: Optional[int] = None, dry_run: bool = False,
+            engine: Optional[Engine] = None, root: Optional[str] = None,
+            today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Export warm months older than cold_months to Parquet and drop their tables.
+
+    Each month is written and verified, then recorded in the index, before
+    its table is dropped (native partitions are detached first).
+
+    Returns:
+        Index entries written (or, with dry_run, the months that would be)
+    """
+    engine = engine or get_engine()
+    table = TABLES[table_name]
+    cutoff = months_ago(settings.ARCHIVE_COLD_MONTHS if cold_months is None else cold_months, today)
+    index = ArchiveIndex(root)
+    written = []
+
+    with engine.connect() as conn:
+        partitions = warm_partitions(conn, table_name)
+        native = is_native_partitioned(conn, table_name)
+
+    for month, name in partitions.items():
+        if month >= cutoff:
+            continue
+        shadow = _shadow(table, name)
+        with engine.begin() as conn:
+            rows = [dict(r._mapping) for r in conn.execute(select(shadow))]
+            if dry_run:
+                written.append({"table": table_name, "month": month_label(month), "rows": len(rows)})
+                continue
+            if rows:
+                entry = _write_archive(table, month, rows, index)
+                written.append(entry)
+                logger.info("Archived %d rows of %s to %s", len(rows), name, entry["path"])
+            if native:
+                conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+            shadow.drop(conn)
+    return written
+
+
+# -- reads -----------------------------------------------------------------
+
+def query_range(table_name: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                user_id: Optional[str] = None, engine: Optional[Engine] = None,
+                root: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Rows of table_name with start <= created_at < end across hot, warm and cold tiers.
+
+    Args:
+        table_name: "recommendation_logs" or "financial_snapshots"
+        start: Inclusive lower bound (None = unbounded)
+        end: Exclusive upper bound (None = unbounded)
+        user_id: Only this user's rows
+
+    Returns:
+        Row dicts ordered by created_at
+    """
+    import pyarrow.parquet as pq
+
+    engine = engine or get_engine()
+    table = TABLES[table_name]
+
+    def where(t: Table):
+        conditions = []
+        if start is not None:
+            conditions.append(t.c.created_at >= start)
+        if end is not None:
+            conditions.append(t.c.created_at < end)
+        if user_id is not None:
+            conditions.append(t.c.user_id == user_id)
+        return and_(true(), *conditions)
+
+    def overlaps(month: Month) -> bool:
+        return ((start is None or month_start(next_month(month)) > start)
+                and (end is None or month_start(month) < end))
+
+    with engine.connect() as conn:
+        rows = [dict(r._mapping) for r in conn.execute(select(table).where(where(table)))]
+        # Native partitions are already covered by selecting from the parent
+        if not is_native_partitioned(conn, table_name):
+            for month, name in warm_partitions(conn, table_name).items():
+                if overlaps(month):
+                    shadow = _shadow(table, name)
+                    rows += [dict(r._mapping) for r in conn.execute(select(shadow).where(where(shadow)))]
+
+    index = ArchiveIndex(root)
+    filters = []
+    if start is not None:
+        filters.append(("created_at", ">=", start))
+    if end is not None:
+        filters.append(("created_at", "<", end))
+    if user_id is not None:
+        filters.append(("user_id", "=", user_id))
+    for entry in index.overlapping(table_name, start, end):
+        arrow_table = pq.read_table(index.root / entry["path"], filters=filters or None)
+        rows += _from_arrow(table, arrow_table)
+
+    rows.sort(key=lambda r: r["created_at"])
+    return rows
+
+
+def run(dry_run: bool = False, engine: Optional[Engine] = None, root: Optional[str] = None,
+        today: Optional[date] = None) -> Dict[str, Any]:
+    """Rotate and archive every table; returns a per-table summary."""
+    summary: Dict[str, Any] = {"partitions_created": [] if dry_run else ensure_partitions(engine=engine, today=today)}
+    for table_name in TABLES:
+        summary[table_name] = {
+            "rotated": rotate(table_name, dry_run=dry_run, engine=engine, today=today),
+            "archived": archive(table_name, dry_run=dry_run, engine=engine, root=root, today=today),
+        }
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would move without changing anything")
+    parser.add_argument("--postgres-ddl", action="store_true",
+                        help="print the migration that natively partitions recommendation_logs")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.postgres_ddl:
+        # Start at the oldest row so nothing is left in the default partition
+        with get_engine().connect() as conn:
+            oldest = conn.execute(select(func.min(RecommendationLog.__table__.c.created_at))).scalar()
+        print(postgres_partition_ddl(first_month=(oldest.year, oldest.month) if oldest else None))
+        return 0
+
+    summary = run(dry_run=args.dry_run)
+    for table_name in TABLES:
+        rotated = summary[table_name]["rotated"]
+        archived = summary[table_name]["archived"]
+        print(f"{table_name}: {sum(rotated.values())} rows to {len(rotated)} monthly tables, "
+              f"{sum(e['rows'] for e in archived)} rows in {len(archived)} months archived")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
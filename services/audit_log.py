@@ -0,0 +1,238 @@
+"""
+Buffered, asynchronous writer for RecommendationLog audit records.
+
+Explanations are served from the request path; writing their provenance
+row synchronously would add a DB commit to every "Why this?". Instead:
+
+- record() appends to an in-memory buffer and returns immediately
+- a daemon thread flushes the buffer as one batched insert when it holds
+  AUDIT_BATCH_SIZE records or AUDIT_FLUSH_SECONDS have passed
+- if the insert fails (DB down), the batch is appended to AUDIT_SPILL_PATH
+  as JSON lines and replayed before the next successful flush
+- if the database rejects the batch (e.g. a plan_id that was never saved),
+  its rows are inserted one by one and the rejected ones are moved to
+  AUDIT_DEAD_LETTER_PATH, so one bad record neither blocks its batch nor
+  is retried forever
+- if the buffer overflows AUDIT_MAX_QUEUE, records go straight to the
+  spill file rather than blocking or being dropped
+- remaining records are flushed at interpreter exit
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.data_service import REJECTED_DATA_ERRORS, DataService
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """Batches RecommendationLog rows and writes them from a background thread."""
+
+    def __init__(self, batch_size: Optional[int] = None, flush_seconds: Optional[float] = None,
+                 spill_path: Optional[str] = None, max_queue: Optional[int] = None,
+                 dead_letter_path: Optional[str] = None, save=None):
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_seconds = flush_seconds or settings.AUDIT_FLUSH_SECONDS
+        self.spill_path = Path(spill_path or settings.AUDIT_SPILL_PATH)
+        self.max_queue = max_queue or settings.AUDIT_MAX_QUEUE
+        self.dead_letter_path = Path(dead_letter_path or settings.AUDIT_DEAD_LETTER_PATH)
+        self._save = save or DataService.save_recommendation_logs
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._replaying_path = self.spill_path.with_name(self.spill_path.name + ".replaying")
+        self._closed = False
+        self.written = 0
+        self.spilled = 0
+        self.rejected = 0
+
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, user_id: str, rule_version: str, plan_id: Optional[str] = None,
+               source_ids: Optional[List[str]] = None, model_version: Optional[str] = None,
+               context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Queue one audit record; never blocks on the database.
+
+        Args:
+            user_id: User ID
+            rule_version: Rule engine version the action came from
+            plan_id: Plan the action belongs to, if saved
+            source_ids: Retrieved document IDs the explanation was grounded on
+            model_version: LLM model that produced the text (as reported by the backend)
+            context: Extra context (action type, cache match, ...)
+
+        Returns:
+            ID the row will be stored under
+        """
+        row = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "plan_id": plan_id,
+            "rule_version": rule_version,
+            "explanation_source_ids": source_ids or [],
+            "model_version": model_version,
+            "context_data": context,
+            "created_at": datetime.utcnow(),
+        }
+        with self._cond:
+            if self._closed or len(self._buffer) >= self.max_queue:
+                overflow = True
+            else:
+                overflow = False
+                self._buffer.append(row)
+                if len(self._buffer) >= self.batch_size:
+                    self._cond.notify()
+        if overflow:
+            self._spill([row])
+        return row["id"]
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_seconds
+                while not self._closed and len(self._buffer) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._buffer = self._buffer, []
+                closed = self._closed
+            self._write(batch)
+            if closed:
+                return
+
+    def _save_batch(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert rows, falling back to one at a time if the batch is rejected.
+
+        Returns:
+            Rows not written because the database is unavailable (to spill);
+            rejected rows are dead-lettered instead
+        """
+        try:
+            if not self._save(rows):
+                return rows
+            self.written += len(rows)
+            return []
+        except REJECTED_DATA_ERRORS:
+            pass
+        for i, row in enumerate(rows):
+            try:
+                if not self._save([row]):
+                    return rows[i:]
+                self.written += 1
+            except REJECTED_DATA_ERRORS as e:
+                self._dead_letter(row, e)
+        return []
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if batch:
+            unsaved = self._save_batch(batch)
+            if unsaved:
+                self._spill(unsaved)
+                return
+        # The DB is reachable again (or was never down): replay earlier spills
+        if self.spill_path.exists() or self._replaying_path.exists():
+            self._replay()
+
+    # -- spill file ----------------------------------------------------
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        with self._spill_lock:
+            try:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n")
+                self.spilled += len(rows)
+                logger.warning("Spilled %d audit records to %s", len(rows), self.spill_path)
+            except OSError as e:
+                logger.error("Dropping %d audit records, spill failed: %s", len(rows), e)
+
+    def _dead_letter(self, row: Dict[str, Any], error: BaseException) -> None:
+        with self._spill_lock:
+            try:
+                self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({**row, "created_at": row["created_at"].isoformat(),
+                                        "error": str(error).splitlines()[0]}) + "\n")
+                self.rejected += 1
+                logger.error("Audit record %s rejected, moved to %s", row["id"], self.dead_letter_path)
+            except OSError as e:
+                logger.error("Dropping rejected audit record %s, dead-letter write failed: %s", row["id"], e)
+
+    def _replay(self) -> None:
+        if not self._replay_lock.acquire(blocking=False):
+            return
+        try:
+            # A leftover .replaying file is from a run that stopped mid-replay
+            if not self._replaying_path.exists():
+                with self._spill_lock:
+                    try:
+                        os.replace(self.spill_path, self._replaying_path)
+                    except FileNotFoundError:
+                        return
+            with open(self._replaying_path, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            for row in rows:
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+
+            written = self.written
+            for start in range(0, len(rows), self.batch_size):
+                unsaved = self._save_batch(rows[start:start + self.batch_size])
+                if unsaved:
+                    # Still failing: put this and the remaining batches back
+                    self._spill(unsaved + rows[start + self.batch_size:])
+                    break
+            replayed = self.written - written
+            self._replaying_path.unlink()
+            if replayed:
+                logger.info("Replayed %d spilled audit records from %s", replayed, self.spill_path)
+        finally:
+            self._replay_lock.release()
+
+    # -- lifecycle -----------------------------------------------------
+
+    def flush(self) -> None:
+        """Write everything buffered so far from the calling thread."""
+        with self._cond:
+            pending = self._buffer
+            self._buffer = []
+        self._write(pending)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush remaining records and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+
+_writer: Optional[AuditLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> AuditLogWriter:
+    """Process-shared writer, flushed at interpreter exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditLogWriter()
+                atexit.register(_writer.close)
+    return _writer
@@ -11,8 +11,10 @@ from sqlalchemy.orm import Session
 from models.database import get_db, init_db
 from models.user import User, UserProfile
 from utils.security import hash_password, verify_password
+from utils.metrics import instrument_class
 
 
+@instrument_class("auth_service")
 class AuthService:
     """Authentication service for user management."""
     
@@ -0,0 +1,391 @@
+"""
+Vectorized backtests of SIP, lump-sum and value-averaging investing.
+
+Historical NAV/price series are read from local CSV files, one per
+instrument, grouped by asset type:
+
+    <PRICE_DATA_DIR>/<asset type>/<instrument>.csv    date,price  (YYYY-MM-DD)
+
+e.g. mf/parag_parikh_flexi_cap.csv, etf/niftybees.csv, gold/gold_inr.csv,
+or, for thousands of funds, from the memory-mapped price store
+(services.price_store) with PricePanel.from_store(), which reads only the
+requested date range. Fixed deposits have no market price;
+add_fixed_deposit() adds an accrual index for a given rate instead.
+
+PricePanel aligns all series on the union of their dates (prices carried
+forward over holidays, NaN before an instrument's first price) and
+samples a monthly grid: the last price on or before each month's
+investment day. Backtester.run() simulates a strategy for every
+instrument and every start month at once on (instruments, starts,
+months) arrays, in instrument blocks of at most BLOCK_ELEMENTS values:
+
+- lump_sum: the whole amount in the first month
+- sip: the same amount every month
+- value_averaging: buy whatever brings the holding up to a target path
+  growing at target_growth a year (amount per month plus growth); never
+  sells, so a month above target buys nothing
+
+Per (instrument, start) it returns the final value, the amount invested,
+the annualized money-weighted return (CAGR for a lump sum; XIRR of the
+monthly flows otherwise) and the max drawdown of value / invested.
+rolling_returns() gives annualized returns over every window of a given
+length, the usual way fund returns are compared.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import settings
+from models.financial import AssetType
+from services.price_store import PriceStore, get_price_store, read_price_csv
+from utils.metrics import instrument_class
+from utils.tracing import trace_class
+
+# Asset types with a price history worth backtesting
+BACKTEST_ASSET_TYPES = (AssetType.MF, AssetType.ETF, AssetType.STOCK, AssetType.GOLD, AssetType.FD)
+
+STRATEGIES = ("lump_sum", "sip", "value_averaging")
+
+# Max values per (instruments, starts, months) temporary; bounds a block to
+# ~BLOCK_ELEMENTS * 8 bytes per array
+BLOCK_ELEMENTS = 4_000_000
+
+# Newton iterations for the money-weighted return; converges in < 10
+# for monthly flows, the cap only guards against bad data
+IRR_MAX_ITERATIONS = 50
+IRR_TOLERANCE = 1e-10
+
+
+def _union_dates(all_dates: List[np.ndarray]) -> np.ndarray:
+    """Sorted union of many date arrays, by marking days in their span (no sort)."""
+    all_dates = [dates for dates in all_dates if len(dates)]
+    if not all_dates:
+        return np.array([], dtype="datetime64[D]")
+    first = min(dates[0] for dates in all_dates).astype(np.int64)
+    last = max(dates[-1] for dates in all_dates).astype(np.int64)
+    seen = np.zeros(last - first + 1, dtype=bool)
+    for dates in all_dates:
+        seen[dates.astype(np.int64) - first] = True
+    return (np.flatnonzero(seen) + first).astype("datetime64[D]")
+
+
+def forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Carry the last price forward over NaN gaps along axis 1 (leading NaNs stay)."""
+    filled = np.where(np.isnan(prices), 0, np.arange(prices.shape[1]))
+    np.maximum.accumulate(filled, axis=1, out=filled)
+    return prices[np.arange(prices.shape[0])[:, None], filled]
+
+
+class PricePanel:
+    """Daily prices of many instruments aligned on one date axis."""
+
+    def __init__(self, dates: np.ndarray, prices: np.ndarray, instruments: Sequence[str],
+                 asset_types: Sequence[AssetType]):
+        """
+        Args:
+            dates: Sorted trading dates, datetime64[D] (days,)
+            prices: float64 (instruments, days), NaN before an instrument's first price
+            instruments: Instrument names, one per row
+            asset_types: AssetType of each row
+        """
+        self.dates = dates
+        self.prices = prices
+        self.instruments = list(instruments)
+        self.asset_types = list(asset_types)
+
+    @classmethod
+    def from_series(cls, series: Dict[str, Any]) -> "PricePanel":
+        """
+        Align separate series on the union of their dates.
+
+        Args:
+            series: instrument -> (asset type, dates, prices)
+        """
+        names = list(series)
+        all_dates = [np.asarray(series[name][1], dtype="datetime64[D]") for name in names]
+        dates = _union_dates(all_dates)
+        prices = np.full((len(names), len(dates)), np.nan)
+        for row, (name, own_dates) in enumerate(zip(names, all_dates)):
+            prices[row, np.searchsorted(dates, own_dates)] = series[name][2]
+        return cls(dates, forward_fill(prices), names, [AssetType(series[name][0]) for name in names])
+
+    @classmethod
+    def load(cls, directory: Optional[str] = None,
+             asset_types: Sequence[AssetType] = BACKTEST_ASSET_TYPES) -> "PricePanel":
+        """
+        Load every <asset type>/<instrument>.csv under directory.
+
+        Args:
+            directory: Root of the price files (default: PRICE_DATA_DIR)
+            asset_types: Subdirectories to read
+
+        Returns:
+            Panel with instruments named "<asset type>/<file stem>"
+        """
+        root = Path(directory or settings.PRICE_DATA_DIR)
+        series = {}
+        for asset_type in asset_types:
+            for path in sorted((root / asset_type.value).glob("*.csv")):
+                dates, prices = read_price_csv(path)
+                series[f"{asset_type.value}/{path.stem}"] = (asset_type, dates, prices)
+        return cls.from_series(series)
+
+    @classmethod
+    def from_store(cls, store: Optional[PriceStore] = None, instruments: Optional[Sequence[str]] = None,
+                   asset_types: Sequence[AssetType] = BACKTEST_ASSET_TYPES, start: Optional[Any] = None,
+                   end: Optional[Any] = None) -> "PricePanel":
+        """
+        Panel from the price store (services.price_store), reading only [start, end].
+
+        Args:
+            store: Store to read (default: the shared one at PRICE_STORE_DIR)
+            instruments: Store keys (default: every instrument of asset_types)
+            asset_types: Asset types to include when instruments is None
+            start: First date (inclusive)
+            end: Last date (inclusive)
+        """
+        store = store or get_price_store()
+        if instruments is None:
+            instruments = [key for asset_type in asset_types for key in store.instruments(asset_type.value)]
+        series = {}
+        for key in instruments:
+            dates, prices = store.series(key, start, end)
+            series[key] = (store.info(key)["asset_type"], dates, prices)
+        return cls.from_series(series)
+
+    def select(self, instruments: Optional[Sequence[str]] = None,
+               asset_types: Optional[Sequence[AssetType]] = None) -> "PricePanel":
+        """Panel with only the given instruments and/or asset types."""
+        rows = [row for row, (name, asset_type) in enumerate(zip(self.instruments, self.asset_types))
+                if (instruments is None or name in instruments)
+                and (asset_types is None or asset_type in asset_types)]
+        return PricePanel(self.dates, self.prices[rows], [self.instruments[r] for r in rows],
+                          [self.asset_types[r] for r in rows])
+
+    def add_fixed_deposit(self, name: str, annual_rate: float, compounding: int = 4) -> "PricePanel":
+        """
+        Panel with a fixed deposit added as an accrual index on this panel's dates.
+
+        Args:
+            name: Instrument name (e.g. "fd/sbi_5y")
+            annual_rate: Interest rate as decimal (0.07 = 7%)
+            compounding: Times a year interest is compounded (4 for most bank FDs)
+        """
+        years = (self.dates - self.dates[0]).astype(np.float64) / 365.25
+        accrual = (1 + annual_rate / compounding) ** (compounding * years)
+        return PricePanel(self.dates, np.vstack([self.prices, accrual]), self.instruments + [name],
+                          self.asset_types + [AssetType.FD])
+
+    def monthly(self, day: int = 1):
+        """
+        Prices on each month's investment day (last price on or before it).
+
+        Args:
+            day: Day of month the investment is made (1-28)
+
+        Returns:
+            (month dates datetime64[D] (months,), prices (instruments, months))
+        """
+        if not len(self.dates):
+            return np.array([], dtype="datetime64[D]"), np.empty((len(self.instruments), 0))
+        months = np.arange(self.dates[0].astype("datetime64[M]"), self.dates[-1].astype("datetime64[M]") + 1)
+        grid = months.astype("datetime64[D]") + (day - 1)
+        positions = np.searchsorted(self.dates, grid, side="right") - 1
+        keep = (positions >= 0) & (grid <= self.dates[-1])  # not a month still in progress
+        grid, positions = grid[keep], positions[keep]
+        return grid, self.prices[:, positions]
+
+
+def _holdings(strategy: str, window: np.ndarray, amount: float, target_growth: float):
+    """
+    Units held and cash invested in each month of each window.
+
+    Args:
+        window: Prices (instruments, starts, horizon + 1); the last month
+            is only valued, not invested in
+
+    Returns:
+        (units, flows), both shaped like window
+    """
+    horizon = window.shape[-1] - 1
+    buy_prices = window[..., :horizon]
+    flows = np.zeros_like(window)
+    if strategy == "lump_sum":
+        units = np.broadcast_to(amount / window[..., :1], window.shape)
+        flows[..., 0] = amount
+        return units, flows
+    if strategy == "sip":
+        units = np.cumsum(amount / buy_prices, axis=-1)
+        flows[..., :horizon] = amount
+    else:
+        growth = (1 + target_growth) ** (1 / 12) - 1
+        target = amount * np.cumsum((1 + growth) ** np.arange(horizon))
+        units = np.maximum.accumulate(target / buy_prices, axis=-1)
+        bought = np.diff(units, axis=-1, prepend=0)
+        flows[..., :horizon] = bought * buy_prices
+    units = np.concatenate([units, units[..., -1:]], axis=-1)
+    return units, flows
+
+
+def money_weighted_return(flows: np.ndarray, final_value: np.ndarray) -> np.ndarray:
+    """
+    Annualized return r with sum(flow_k * (1 + r) ** years_left_k) = final value.
+
+    Args:
+        flows: Non-negative monthly investments (..., months); the final
+            value is taken one month after the last one
+        final_value: Value at the end (...)
+
+    Returns:
+        r for each leading index (CAGR for a single flow; -1 for a total loss)
+    """
+    months = flows.shape[-1]
+    years = (months - np.arange(months)) / 12.0
+    invested = flows.sum(axis=-1)
+    mean_years = np.einsum("...k,k->...", flows, years) / invested
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_growth = np.log(final_value / invested) / mean_years
+        solvable = np.isfinite(log_growth)
+        x = np.where(solvable, log_growth, 0.0)
+        for _ in range(IRR_MAX_ITERATIONS):
+            growth = np.exp(x[..., None] * years)
+            f = (flows * growth).sum(axis=-1) - final_value
+            slope = (flows * years * growth).sum(axis=-1)
+            step = np.where(solvable, f / slope, 0.0)
+            x -= step
+            if np.nanmax(np.abs(step), initial=0.0) < IRR_TOLERANCE:
+                break
+    rate = np.where(solvable, np.expm1(x), np.nan)
+    return np.where((final_value <= 0) & (invested > 0), -1.0, rate)
+
+
+@trace_class("backtest")
+@instrument_class("backtest")
+class Backtester:
+    """Vectorized strategy backtests over a PricePanel."""
+
+    @staticmethod
+    def run(panel: PricePanel, strategy: str = "sip", amount: float = 10000.0, horizon_months: int = 60,
+            start_dates: Optional[Sequence[Any]] = None, day: int = 1,
+            target_growth: float = 0.12) -> Dict[str, Any]:
+        """
+        Backtest one strategy for every instrument and start month.
+
+        Args:
+            panel: Prices to test on
+            strategy: One of STRATEGIES
+            amount: Lump sum, SIP instalment, or value-averaging monthly step
+            horizon_months: Months from the first investment to valuation
+            start_dates: Months to start in (any date within the month);
+                default every month with horizon_months of history after it
+            day: Day of month investments are made
+            target_growth: Annual growth of the value-averaging target path
+
+        Returns:
+            Dictionary with instruments, start_dates (datetime64[D]) and
+            (instruments, starts) arrays: final_value, invested, cagr
+            (money-weighted, annualized) and max_drawdown (fraction of
+            value / invested); NaN where an instrument has no price at the start
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        if horizon_months < 1:
+            raise ValueError("horizon_months must be at least 1")
+
+        grid, monthly = panel.monthly(day)
+        last_start = len(grid) - horizon_months
+        if start_dates is None:
+            starts = np.arange(max(last_start, 0))
+        else:
+            wanted = np.asarray(start_dates, dtype="datetime64[M]")
+            starts = np.searchsorted(grid.astype("datetime64[M]"), wanted)
+            if np.any(starts >= last_start) or np.any(grid[np.minimum(starts, len(grid) - 1)].astype(
+                    "datetime64[M]") != wanted):
+                raise ValueError(f"Start dates need {horizon_months} months of prices after them")
+
+        shape = (len(panel.instruments), len(starts))
+        result = {name: np.full(shape, np.nan) for name in ("final_value", "invested", "cagr", "max_drawdown")}
+        offsets = starts[:, None] + np.arange(horizon_months + 1)
+        block = max(1, BLOCK_ELEMENTS // max(offsets.size, 1))
+
+        for first in range(0, shape[0], block):
+            window = monthly[first:first + block][:, offsets]
+            valid = np.isfinite(window).all(axis=-1) & (window > 0).all(axis=-1)
+            window = np.where(valid[..., None], window, 1.0)
+
+            units, flows = _holdings(strategy, window, amount, target_growth)
+            values = units * window
+            invested = np.cumsum(flows, axis=-1)
+            growth = values / invested
+            drawdown = 1 - growth / np.maximum.accumulate(growth, axis=-1)
+
+            rows = slice(first, first + block)
+            final_value = np.where(valid, values[..., -1], np.nan)
+            result["final_value"][rows] = final_value
+            result["invested"][rows] = np.where(valid, invested[..., -1], np.nan)
+            result["cagr"][rows] = np.where(
+                valid, money_weighted_return(flows[..., :horizon_months], values[..., -1]), np.nan)
+            result["max_drawdown"][rows] = np.where(valid, drawdown.max(axis=-1), np.nan)
+
+        return {'instruments': list(panel.instruments), 'start_dates': grid[starts], **result}
+
+    @staticmethod
+    def compare(panel: PricePanel, amount: float = 10000.0, horizon_months: int = 60,
+                strategies: Sequence[str] = STRATEGIES, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Summary per instrument and strategy across all start months.
+
+        Args:
+            panel: Prices to test on
+            amount: See run()
+            horizon_months: See run()
+            strategies: Strategies to run
+            **kwargs: Passed to run()
+
+        Returns:
+            One dict per (instrument, strategy): median, worst and best
+            cagr, median max_drawdown, and the share of starts that lost money
+        """
+        rows = []
+        for strategy in strategies:
+            result = Backtester.run(panel, strategy, amount, horizon_months, **kwargs)
+            with np.errstate(invalid="ignore"):
+                loss = np.where(np.isnan(result["final_value"]), np.nan,
+                                result["final_value"] < result["invested"])
+            for row, name in enumerate(result["instruments"]):
+                cagr = result["cagr"][row]
+                if np.isnan(cagr).all():
+                    continue
+                rows.append({
+                    'instrument': name,
+                    'strategy': strategy,
+                    'starts': int(np.isfinite(cagr).sum()),
+                    'median_cagr': float(np.nanmedian(cagr)),
+                    'worst_cagr': float(np.nanmin(cagr)),
+                    'best_cagr': float(np.nanmax(cagr)),
+                    'median_max_drawdown': float(np.nanmedian(result["max_drawdown"][row])),
+                    'loss_probability': float(np.nanmean(loss[row])),
+                })
+        return rows
+
+    @staticmethod
+    def rolling_returns(panel: PricePanel, window_months: int = 12, day: int = 1) -> Dict[str, Any]:
+        """
+        Annualized price return over every window of window_months.
+
+        Args:
+            panel: Prices to test on
+            window_months: Window length (12 = 1-year rolling returns)
+            day: Day of month the windows start and end on
+
+        Returns:
+            Dictionary with instruments, start_dates (datetime64[D]) and
+            returns (instruments, windows), NaN where a window lacks prices
+        """
+        grid, monthly = panel.monthly(day)
+        windows = max(len(grid) - window_months, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = monthly[:, window_months:window_months + windows] / monthly[:, :windows]
+            returns = ratio ** (12.0 / window_months) - 1
+        return {'instruments': list(panel.instruments), 'start_dates': grid[:windows], 'returns': returns}
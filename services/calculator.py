@@ -10,10 +10,18 @@ Implements deterministic financial calculations:
 
 All calculations are versioned and deterministic for auditability.
 """
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 from decimal import Decimal
 
+import numpy as np
 
+from utils.metrics import instrument_class
+from utils.tracing import trace_class
+
+
+@trace_class("calculator")
+@instrument_class("calculator")
 class FinancialCalculator:
     """Deterministic financial calculations service."""
     
@@ -152,3 +160,49 @@ class FinancialCalculator:
             },
             'version': FinancialCalculator.VERSION
         }
+    
+    @staticmethod
+    def project_goals(goals: List[Dict], monthly_surplus: float, now: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+        """
+        Progress and completion projections for all goals in one pass.
+        
+        Realistic completion assumes the whole monthly surplus goes to each
+        goal (30-day months), matching the single-goal projection on the
+        goal form.
+        
+        Args:
+            goals: Goal dictionaries (target_amount, current_progress, target_date as YYYY-MM-DD)
+            monthly_surplus: Monthly income minus expenses
+            now: Projection start (default: current time)
+            
+        Returns:
+            Arrays aligned with goals: target, progress, remaining, progress_pct,
+            target_date, realistic_date (datetime64[D], NaT when the surplus is
+            not positive), on_track and days_over
+        """
+        now = np.datetime64(now or datetime.now(), 's')
+        target = np.array([g['target_amount'] for g in goals], dtype=float)
+        progress = np.array([g.get('current_progress', 0) for g in goals], dtype=float)
+        remaining = target - progress
+        
+        progress_pct = np.divide(progress * 100, target, out=np.zeros_like(target), where=target > 0)
+        target_date = np.array([g['target_date'] for g in goals], dtype='datetime64[D]')
+        
+        if monthly_surplus > 0:
+            seconds = np.maximum(remaining, 0) / monthly_surplus * 30 * 86400
+            realistic_date = (now + seconds.astype('timedelta64[s]')).astype('datetime64[D]')
+            days_over = (realistic_date - target_date).astype(int)
+        else:
+            realistic_date = np.full(len(goals), np.datetime64('NaT'), dtype='datetime64[D]')
+            days_over = np.zeros(len(goals), dtype=int)
+        
+        return {
+            'target': target,
+            'progress': progress,
+            'remaining': remaining,
+            'progress_pct': progress_pct,
+            'target_date': target_date,
+            'realistic_date': realistic_date,
+            'on_track': days_over <= 0,
+            'days_over': days_over,
+        }
@@ -2,15 +2,253 @@
 Data service for CRUD operations on financial data.
 Handles both guest mode (session state) and persistent storage (database).
 """
-from typing import Optional, List, Dict, Any
+import logging
+from collections import Counter
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.orm import Session
 from datetime import datetime
+from decimal import Decimal
 
 from models.database import get_db
-from models.financial import FinancialSnapshot, Asset, Liability, Goal
+from models.financial import (
+    FinancialSnapshot, Asset, Liability, Goal, AssetType, LiabilityType, GoalCategory
+)
+from models.plans import Plan, RecommendationLog
 from models.user import User
+from utils.metrics import instrument_class, record_error
+from utils.tracing import trace_class
+from utils.versioning import make_etag, etag_matches
 
+# The rows themselves were refused (constraint violation, bad value):
+# retrying them unchanged cannot succeed, unlike a lost connection
+REJECTED_DATA_ERRORS = (IntegrityError, DataError)
 
+logger = logging.getLogger(__name__)
+
+
+def _enum_value(value: Any) -> Any:
+    """Return the plain value of an enum member (or the value unchanged)."""
+    return getattr(value, 'value', value)
+
+
+# Onboarding form labels that differ from the enum values
+_ASSET_TYPE_ALIASES = {
+    'fixed_deposit': AssetType.FD,
+    'mutual_fund': AssetType.MF,
+    'stocks': AssetType.STOCK,
+}
+
+
+def _asset_type(value: str) -> AssetType:
+    """Map an onboarding asset type ('mutual_fund', 'mf', ...) to AssetType."""
+    if value in _ASSET_TYPE_ALIASES:
+        return _ASSET_TYPE_ALIASES[value]
+    try:
+        return AssetType(value)
+    except ValueError:
+        return AssetType.OTHER
+
+
+def _liability_type(value: str) -> LiabilityType:
+    """Map an onboarding debt type to LiabilityType."""
+    try:
+        return LiabilityType(value)
+    except ValueError:
+        return LiabilityType.OTHER
+
+
+def _goal_category(value: Optional[str]) -> Optional[GoalCategory]:
+    """Map a goals-page category label ('Short-term (< 3 years)') to GoalCategory."""
+    if not value:
+        return None
+    key = value.split('(')[0].strip().lower().replace('-', '_').replace(' ', '_')
+    try:
+        return GoalCategory(key)
+    except ValueError:
+        return None
+
+
+def _to_float(value: Any) -> float:
+    """Convert Numeric/Decimal columns to float for session-state dicts."""
+    return float(value) if value is not None else 0.0
+
+
+def _snapshot_to_dict(snapshot: FinancialSnapshot) -> Dict[str, Any]:
+    return {
+        'monthly_income': _to_float(snapshot.monthly_income),
+        'monthly_expenses': _to_float(snapshot.monthly_expenses),
+        'current_savings': _to_float(snapshot.current_savings),
+    }
+
+
+def _asset_to_dict(asset: Asset) -> Dict[str, Any]:
+    return {
+        'type': _enum_value(asset.type),
+        'name': asset.name,
+        'value': _to_float(asset.current_value)
+    }
+
+
+def _liability_to_dict(liability: Liability) -> Dict[str, Any]:
+    return {
+        'type': _enum_value(liability.type),
+        'name': liability.name,
+        'outstanding': _to_float(liability.outstanding_amount),
+        'interest_rate': _to_float(liability.interest_rate)
+    }
+
+
+def _goal_to_dict(goal: Goal) -> Dict[str, Any]:
+    return {
+        'category': _enum_value(goal.category),
+        'name': goal.name,
+        'target_amount': _to_float(goal.target_amount),
+        'target_date': goal.target_date.strftime('%Y-%m-%d') if goal.target_date else None,
+        'priority': goal.priority
+    }
+
+
+def _plan_to_dict(plan: Plan) -> Dict[str, Any]:
+    return {
+        'plan_id': plan.id,
+        'generated_at': plan.created_at.isoformat() if plan.created_at else None,
+        'strategy_type': plan.strategy_type,
+        'monthly_saving_target': _to_float(plan.monthly_saving_target),
+        'monthly_invest_target': _to_float(plan.monthly_invest_target),
+        'top_actions': plan.top_actions,
+        'buckets': plan.buckets,
+        'projections': plan.projections,
+        'confidence_score': _to_float(plan.confidence_score) if plan.confidence_score is not None else None,
+        'rule_version': plan.rule_version
+    }
+
+
+def _asset_row(asset_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'type': _asset_type(asset_data.get('type', 'other')),
+        'name': asset_data.get('name', 'Unnamed Asset'),
+        'current_value': asset_data.get('value', 0)
+    }
+
+
+def _liability_row(liability_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'type': _liability_type(liability_data.get('type', 'other')),
+        'name': liability_data.get('name', 'Unnamed Debt'),
+        'outstanding_amount': liability_data.get('outstanding', 0),
+        'interest_rate': liability_data.get('interest_rate', 0),
+        'minimum_payment': liability_data.get('minimum_payment', 0)
+    }
+
+
+def _goal_row(goal_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'category': _goal_category(goal_data.get('category')),
+        'name': goal_data.get('name', 'Unnamed Goal'),
+        'target_amount': goal_data.get('target_amount', 0),
+        'target_date': datetime.strptime(goal_data.get('target_date'), '%Y-%m-%d').date() if goal_data.get('target_date') else None
+    }
+
+
+def _row_key(values) -> Tuple[Any, ...]:
+    """Comparable form of column values (enum members and Decimals as stored)."""
+    key = []
+    for value in values:
+        value = _enum_value(value)
+        if isinstance(value, (int, float, Decimal)):
+            value = round(float(value), 4)
+        key.append(value)
+    return tuple(key)
+
+
+def _sync_rows(db: Session, model, user_id: str, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Make the user's rows of model equal rows, touching only the difference.
+    
+    Rows are matched by their column values (as a multiset): unchanged rows
+    keep their id and created_at, stale rows are deleted in one statement
+    and new rows inserted in one executemany.
+    
+    Args:
+        db: Session (the caller commits)
+        model: Asset, Liability or Goal
+        user_id: User ID
+        rows: Column dicts from _asset_row / _liability_row / _goal_row
+        
+    Returns:
+        (deleted, inserted) row counts
+    """
+    columns = list(rows[0]) if rows else []
+    wanted = Counter(_row_key(row.values()) for row in rows)
+    
+    stale = []
+    if columns:
+        existing = db.query(model.id, *[getattr(model, c) for c in columns]).filter(model.user_id == user_id)
+    else:
+        existing = db.query(model.id).filter(model.user_id == user_id)
+    for row in existing:
+        key = _row_key(row[1:])
+        if wanted[key] > 0:
+            wanted[key] -= 1
+        else:
+            stale.append(row.id)
+    
+    if stale:
+        db.query(model).filter(model.id.in_(stale)).delete(synchronize_session=False)
+    
+    new_rows = []
+    for row in rows:
+        key = _row_key(row.values())
+        if wanted[key] > 0:
+            wanted[key] -= 1
+            new_rows.append({'user_id': user_id, **row})
+    if new_rows:
+        db.execute(insert(model), new_rows)
+    return len(stale), len(new_rows)
+
+
+def _insert_plan(db: Session, user_id: str, plan_data: Dict[str, Any],
+                 snapshot_id: Optional[str] = None) -> Plan:
+    """
+    Add a Plan row for plan_data (the caller commits).
+    
+    The plan is linked to snapshot_id, or else to the user's latest snapshot.
+    """
+    if snapshot_id is None:
+        latest_snapshot = db.query(FinancialSnapshot.id).filter(
+            FinancialSnapshot.user_id == user_id
+        ).order_by(FinancialSnapshot.created_at.desc()).first()
+        snapshot_id = latest_snapshot.id if latest_snapshot else None
+    
+    plan = Plan(
+        user_id=user_id,
+        snapshot_id=snapshot_id,
+        strategy_type=plan_data.get('strategy_type'),
+        monthly_saving_target=plan_data.get('monthly_saving_target'),
+        monthly_invest_target=plan_data.get('monthly_invest_target'),
+        top_actions=plan_data.get('top_actions', []),
+        buckets=plan_data.get('buckets', {}),
+        projections=plan_data.get('projections'),
+        rule_version=plan_data['rule_version']
+    )
+    if plan_data.get('plan_id'):
+        plan.id = plan_data['plan_id']
+    db.add(plan)
+    return plan
+
+
+# Per-user collections read through DataService.get_collection()
+_COLLECTIONS = {
+    'assets': (Asset, _asset_to_dict),
+    'liabilities': (Liability, _liability_to_dict),
+    'goals': (Goal, _goal_to_dict),
+}
+
+
+@trace_class("data_service")
+@instrument_class("data_service")
 class DataService:
     """Service for managing financial data with dual mode: guest or persisted."""
     
@@ -29,18 +267,12 @@ class DataService:
         db = next(get_db())
         
         try:
-            # Check if snapshot already exists
-            existing = db.query(FinancialSnapshot).filter(
-                FinancialSnapshot.user_id == user_id
-            ).order_by(FinancialSnapshot.snapshot_date.desc()).first()
-            
             # Create new snapshot (versioned)
             snapshot = FinancialSnapshot(
                 user_id=user_id,
                 monthly_income=snapshot_data.get('monthly_income', 0),
                 monthly_expenses=snapshot_data.get('monthly_expenses', 0),
-                current_savings=snapshot_data.get('current_savings', 0),
-                snapshot_date=datetime.utcnow()
+                current_savings=snapshot_data.get('current_savings', 0)
             )
             
             db.add(snapshot)
@@ -49,7 +281,8 @@ class DataService:
             
         except Exception as e:
             db.rollback()
-            print(f"Error saving snapshot: {e}")
+            logger.error("Error saving snapshot: %s", e)
+            record_error("data_service", "save_snapshot")
             return False
         finally:
             db.close()
@@ -60,25 +293,15 @@ class DataService:
         db = next(get_db())
         
         try:
-            # Delete existing assets
-            db.query(Asset).filter(Asset.user_id == user_id).delete()
-            
-            # Add new assets
-            for asset_data in assets:
-                asset = Asset(
-                    user_id=user_id,
-                    asset_type=asset_data.get('type', 'other'),
-                    name=asset_data.get('name', 'Unnamed Asset'),
-                    value=asset_data.get('value', 0)
-                )
-                db.add(asset)
-            
+            # Replace the user's assets (only changed rows are written)
+            _sync_rows(db, Asset, user_id, [_asset_row(asset_data) for asset_data in assets])
             db.commit()
             return True
             
         except Exception as e:
             db.rollback()
-            print(f"Error saving assets: {e}")
+            logger.error("Error saving assets: %s", e)
+            record_error("data_service", "save_assets")
             return False
         finally:
             db.close()
@@ -89,27 +312,15 @@ class DataService:
         db = next(get_db())
         
         try:
-            # Delete existing liabilities
-            db.query(Liability).filter(Liability.user_id == user_id).delete()
-            
-            # Add new liabilities
-            for liability_data in liabilities:
-                liability = Liability(
-                    user_id=user_id,
-                    liability_type=liability_data.get('type', 'other'),
-                    name=liability_data.get('name', 'Unnamed Debt'),
-                    outstanding=liability_data.get('outstanding', 0),
-                    interest_rate=liability_data.get('interest_rate', 0),
-                    minimum_payment=liability_data.get('minimum_payment', 0)
-                )
-                db.add(liability)
-            
+            # Replace the user's liabilities (only changed rows are written)
+            _sync_rows(db, Liability, user_id, [_liability_row(liability_data) for liability_data in liabilities])
             db.commit()
             return True
             
         except Exception as e:
             db.rollback()
-            print(f"Error saving liabilities: {e}")
+            logger.error("Error saving liabilities: %s", e)
+            record_error("data_service", "save_liabilities")
             return False
         finally:
             db.close()
@@ -120,27 +331,149 @@ class DataService:
         db = next(get_db())
         
         try:
-            # Delete existing goals
-            db.query(Goal).filter(Goal.user_id == user_id).delete()
+            # Replace the user's goals (only changed rows are written)
+            _sync_rows(db, Goal, user_id, [_goal_row(goal_data) for goal_data in goals])
+            db.commit()
+            return True
+            
+        except Exception as e:
+            db.rollback()
+            logger.error("Error saving goals: %s", e)
+            record_error("data_service", "save_goals")
+            return False
+        finally:
+            db.close()
+    
+    @staticmethod
+    def save_plan(user_id: str, plan_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Persist a generated plan (see PlanGenerator.generate_plan).
+        
+        Plans are immutable; each call inserts a new version.
+        
+        Args:
+            user_id: User ID
+            plan_data: Plan dict with top_actions, buckets, projections and rule_version
+            
+        Returns:
+            New plan ID, or None if saving failed
+        """
+        db = next(get_db())
+        
+        try:
+            plan = _insert_plan(db, user_id, plan_data)
+            db.commit()
+            return plan.id
             
-            # Add new goals
-            for goal_data in goals:
-                goal = Goal(
+        except Exception as e:
+            db.rollback()
+            logger.error("Error saving plan: %s", e)
+            record_error("data_service", "save_plan")
+            return None
+        finally:
+            db.close()
+    
+    @staticmethod
+    def save_financial_data(user_id: str, snapshot: Optional[Dict[str, Any]] = None,
+                            assets: Optional[List[Dict[str, Any]]] = None,
+                            liabilities: Optional[List[Dict[str, Any]]] = None,
+                            goals: Optional[List[Dict[str, Any]]] = None,
+                            plan: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Save any subset of a user's financial data in one transaction.
+        
+        Sections left as None are not touched. The snapshot is inserted as a
+        new version before the plan, so the plan links to it; collections
+        only write rows that changed.
+        
+        Args:
+            user_id: User ID
+            snapshot: Dict with monthly_income, monthly_expenses, current_savings
+            assets: Full list of assets
+            liabilities: Full list of liabilities
+            goals: Full list of goals
+            plan: Plan dict (see save_plan); its 'plan_id', if set, is used as the ID
+            
+        Returns:
+            True if everything was committed, False if it failed for another
+            reason (e.g. the database is unreachable)
+            
+        Raises:
+            IntegrityError, DataError: A row was rejected (nothing is committed)
+        """
+        db = next(get_db())
+        
+        try:
+            if snapshot is not None:
+                db.add(FinancialSnapshot(
                     user_id=user_id,
-                    category=goal_data.get('category', 'other'),
-                    name=goal_data.get('name', 'Unnamed Goal'),
-                    target_amount=goal_data.get('target_amount', 0),
-                    current_amount=goal_data.get('current_progress', 0),
-                    target_date=datetime.strptime(goal_data.get('target_date'), '%Y-%m-%d') if goal_data.get('target_date') else None
-                )
-                db.add(goal)
+                    monthly_income=snapshot.get('monthly_income', 0),
+                    monthly_expenses=snapshot.get('monthly_expenses', 0),
+                    current_savings=snapshot.get('current_savings', 0)
+                ))
+                db.flush()
+            if assets is not None:
+                _sync_rows(db, Asset, user_id, [_asset_row(asset_data) for asset_data in assets])
+            if liabilities is not None:
+                _sync_rows(db, Liability, user_id, [_liability_row(liability_data) for liability_data in liabilities])
+            if goals is not None:
+                _sync_rows(db, Goal, user_id, [_goal_row(goal_data) for goal_data in goals])
+            if plan is not None:
+                _insert_plan(db, user_id, plan)
+            db.commit()
+            return True
             
+        except REJECTED_DATA_ERRORS as e:
+            db.rollback()
+            logger.error("Financial data rejected: %s", e)
+            record_error("data_service", "save_financial_data")
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.error("Error saving financial data: %s", e)
+            record_error("data_service", "save_financial_data")
+            return False
+        finally:
+            db.close()
+    
+    @staticmethod
+    def save_recommendation_logs(records: List[Dict[str, Any]]) -> bool:
+        """
+        Insert a batch of recommendation audit records in one transaction.
+        
+        Used by the buffered audit writer (services.audit_log); records carry
+        their own id and created_at (when the event happened, not when the
+        batch was flushed).
+        
+        Args:
+            records: Dicts with id, user_id, plan_id, rule_version,
+                explanation_source_ids, model_version, context_data, created_at
+            
+        Returns:
+            True if the batch was committed, False if it failed for another
+            reason (e.g. the database is unreachable)
+            
+        Raises:
+            IntegrityError, DataError: A record was rejected (nothing is committed)
+        """
+        if not records:
+            return True
+        db = next(get_db())
+        
+        try:
+            db.execute(insert(RecommendationLog), records)
             db.commit()
             return True
             
+        except REJECTED_DATA_ERRORS as e:
+            db.rollback()
+            logger.error("Recommendation log batch rejected: %s", e)
+            record_error("data_service", "save_recommendation_logs")
+            raise
         except Exception as e:
             db.rollback()
-            print(f"Error saving goals: {e}")
+            logger.error("Error saving recommendation logs: %s", e)
+            record_error("data_service", "save_recommendation_logs")
             return False
         finally:
             db.close()
@@ -154,7 +487,7 @@ class DataService:
             # Get latest snapshot
             snapshot = db.query(FinancialSnapshot).filter(
                 FinancialSnapshot.user_id == user_id
-            ).order_by(FinancialSnapshot.snapshot_date.desc()).first()
+            ).order_by(FinancialSnapshot.created_at.desc()).first()
             
             # Get assets
             assets = db.query(Asset).filter(Asset.user_id == user_id).all()
@@ -166,39 +499,152 @@ class DataService:
             goals = db.query(Goal).filter(Goal.user_id == user_id).all()
             
             return {
-                'snapshot': {
-                    'monthly_income': snapshot.monthly_income if snapshot else 0,
-                    'monthly_expenses': snapshot.monthly_expenses if snapshot else 0,
-                    'current_savings': snapshot.current_savings if snapshot else 0,
-                } if snapshot else {},
-                'assets': [
-                    {
-                        'type': asset.asset_type,
-                        'name': asset.name,
-                        'value': asset.value
-                    } for asset in assets
-                ],
-                'liabilities': [
-                    {
-                        'type': liability.liability_type,
-                        'name': liability.name,
-                        'outstanding': liability.outstanding,
-                        'interest_rate': liability.interest_rate
-                    } for liability in liabilities
-                ],
-                'goals': [
-                    {
-                        'category': goal.category,
-                        'name': goal.name,
-                        'target_amount': goal.target_amount,
-                        'current_progress': goal.current_amount,
-                        'target_date': goal.target_date.strftime('%Y-%m-%d') if goal.target_date else None
-                    } for goal in goals
-                ]
+                'snapshot': _snapshot_to_dict(snapshot) if snapshot else {},
+                'assets': [_asset_to_dict(asset) for asset in assets],
+                'liabilities': [_liability_to_dict(liability) for liability in liabilities],
+                'goals': [_goal_to_dict(goal) for goal in goals]
             }
             
         except Exception as e:
-            print(f"Error loading user data: {e}")
+            logger.error("Error loading user data: %s", e)
+            record_error("data_service", "load_user_data")
             return {'snapshot': {}, 'assets': [], 'liabilities': [], 'goals': []}
         finally:
             db.close()
+    
+    # ------------------------------------------------------------------
+    # Conditional reads
+    #
+    # Each read returns {'etag', 'not_modified', 'data'}. Pass the etag from
+    # the previous response as if_none_match; when nothing changed the
+    # version check is the only query run and 'data' is None.
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def get_current_plan(user_id: str, if_none_match: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the latest generated plan (GET /plan/current).
+        
+        Plans are immutable once generated, so the newest plan id and its
+        timestamp identify the version. The version query selects only those
+        two columns; top_actions/buckets/projections JSON is loaded and
+        deserialized only when the client copy is stale.
+        
+        Args:
+            user_id: User ID
+            if_none_match: ETag from a previous read, if any
+            
+        Returns:
+            Dict with etag, not_modified flag and plan data (None if no plan
+            exists or not modified)
+        """
+        db = next(get_db())
+        
+        try:
+            latest = db.query(Plan.id, Plan.created_at).filter(
+                Plan.user_id == user_id
+            ).order_by(Plan.created_at.desc()).first()
+            
+            etag = make_etag('plan', latest.id if latest else None, latest.created_at if latest else None)
+            if etag_matches(etag, if_none_match):
+                return {'etag': etag, 'not_modified': True, 'data': None}
+            
+            data = None
+            if latest:
+                plan = db.query(Plan).filter(Plan.id == latest.id).one()
+                data = _plan_to_dict(plan)
+            
+            return {'etag': etag, 'not_modified': False, 'data': data}
+            
+        finally:
+            db.close()
+    
+    @staticmethod
+    def get_latest_snapshot(user_id: str, if_none_match: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the latest financial snapshot with a version token.
+        
+        Snapshots are versioned by insert, so the newest id is the version.
+        
+        Args:
+            user_id: User ID
+            if_none_match: ETag from a previous read, if any
+            
+        Returns:
+            Dict with etag, not_modified flag and snapshot data
+        """
+        db = next(get_db())
+        
+        try:
+            latest = db.query(FinancialSnapshot.id, FinancialSnapshot.created_at).filter(
+                FinancialSnapshot.user_id == user_id
+            ).order_by(FinancialSnapshot.created_at.desc()).first()
+            
+            etag = make_etag('snapshot', latest.id if latest else None, latest.created_at if latest else None)
+            if etag_matches(etag, if_none_match):
+                return {'etag': etag, 'not_modified': True, 'data': None}
+            
+            data = {}
+            if latest:
+                snapshot = db.query(FinancialSnapshot).filter(FinancialSnapshot.id == latest.id).one()
+                data = _snapshot_to_dict(snapshot)
+            
+            return {'etag': etag, 'not_modified': False, 'data': data}
+            
+        finally:
+            db.close()
+    
+    @staticmethod
+    def get_collection(user_id: str, section: str, if_none_match: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get a per-user collection (assets, liabilities or goals) with a version token.
+        
+        The version is derived from row count plus newest created_at/updated_at,
+        which changes on every insert, update or delete (saves replace rows).
+        
+        Args:
+            user_id: User ID
+            section: One of 'assets', 'liabilities', 'goals'
+            if_none_match: ETag from a previous read, if any
+            
+        Returns:
+            Dict with etag, not_modified flag and list of row dicts
+            
+        Raises:
+            ValueError: If section is unknown
+        """
+        if section not in _COLLECTIONS:
+            raise ValueError(f"Unknown section: {section}")
+        
+        model, to_dict = _COLLECTIONS[section]
+        db = next(get_db())
+        
+        try:
+            count, newest_created, newest_updated = db.query(
+                func.count(model.id), func.max(model.created_at), func.max(model.updated_at)
+            ).filter(model.user_id == user_id).one()
+            
+            etag = make_etag(section, count, newest_created, newest_updated)
+            if etag_matches(etag, if_none_match):
+                return {'etag': etag, 'not_modified': True, 'data': None}
+            
+            rows = db.query(model).filter(model.user_id == user_id).order_by(model.created_at).all()
+            return {'etag': etag, 'not_modified': False, 'data': [to_dict(row) for row in rows]}
+            
+        finally:
+            db.close()
+    
+    @staticmethod
+    def get_assets(user_id: str, if_none_match: Optional[str] = None) -> Dict[str, Any]:
+        """Get user assets with a version token."""
+        return DataService.get_collection(user_id, 'assets', if_none_match)
+    
+    @staticmethod
+    def get_liabilities(user_id: str, if_none_match: Optional[str] = None) -> Dict[str, Any]:
+        """Get user liabilities with a version token."""
+        return DataService.get_collection(user_id, 'liabilities', if_none_match)
+    
+    @staticmethod
+    def get_goals(user_id: str, if_none_match: Optional[str] = None) -> Dict[str, Any]:
+        """Get user goals with a version token."""
+        return DataService.get_collection(user_id, 'goals', if_none_match)
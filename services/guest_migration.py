@@ -0,0 +1,212 @@
+"""
+Guest-to-account migration on signup/login.
+
+Everything a guest built up in the session (snapshot, assets, liabilities,
+goals and, if they ran the analysis, a plan) is written to the account in
+one transaction, with a fixed number of statements however large the
+portfolio is: a lock on the user row, one SELECT per table, then at most
+one DELETE, one executemany UPDATE and one executemany INSERT per
+collection, plus the snapshot and plan inserts.
+
+Conflicts with data the account already has are resolved as follows:
+
+- snapshot: the guest snapshot becomes the latest version, unless it is
+  empty or equal to the account's latest one
+- assets and liabilities are matched by (type, name), goals by name
+  (case- and whitespace-insensitive); matched rows take the guest values
+- strategy="merge" (login) keeps account rows the guest does not have;
+  strategy="replace" (the guest chose to overwrite) deletes them
+- plan: generated again from the merged data, since the guest analysis
+  only saw the guest's half of it
+"""
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from models.database import get_db
+from models.financial import Asset, FinancialSnapshot, Goal, Liability
+from models.user import User
+from services.calculator import FinancialCalculator
+from services.data_service import (_asset_row, _asset_to_dict, _goal_row, _goal_to_dict, _insert_plan,
+                                   _liability_row, _liability_to_dict, _row_key, _snapshot_to_dict)
+from services.plan_generator import PlanGenerator
+from utils.metrics import instrument_class, record_error
+from utils.tracing import trace_class
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("merge", "replace")
+
+
+def _goal_columns(goal_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {**_goal_row(goal_data), 'priority': goal_data.get('priority')}
+
+
+# section -> (model, guest dict -> column dict, natural key columns, column dict -> session dict)
+_MIGRATED = {
+    'assets': (Asset, _asset_row, ('type', 'name'), _asset_to_dict),
+    'liabilities': (Liability, _liability_row, ('type', 'name'), _liability_to_dict),
+    'goals': (Goal, _goal_columns, ('name',), _goal_to_dict),
+}
+
+
+def _natural_key(columns: Dict[str, Any], key_columns: Tuple[str, ...]) -> Tuple[Any, ...]:
+    key = []
+    for column in key_columns:
+        value = columns[column]
+        if isinstance(value, str):
+            value = " ".join(value.split()).casefold()
+        key.append(_row_key([value])[0])
+    return tuple(key)
+
+
+def _merge_rows(db: Session, section: str, user_id: str, guest_rows: List[Dict[str, Any]],
+                replace: bool) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+    """
+    Merge the guest's rows of one collection into the account's.
+
+    Args:
+        db: Session (the caller commits)
+        section: Key of _MIGRATED
+        user_id: User ID
+        guest_rows: Guest section value (records or dicts)
+        replace: Delete account rows the guest does not have
+
+    Returns:
+        (counts of inserted/updated/kept/deleted rows, merged rows as session dicts)
+    """
+    model, to_columns, key_columns, to_session = _MIGRATED[section]
+    wanted = [to_columns(row) for row in guest_rows]
+    columns = list(to_columns({}))
+
+    existing = defaultdict(list)
+    for row in db.query(model.id, *[getattr(model, c) for c in columns]).filter(model.user_id == user_id):
+        values = dict(zip(columns, row[1:]))
+        existing[_natural_key(values, key_columns)].append((row.id, values))
+
+    now = datetime.utcnow()
+    inserts, updates, merged = [], [], []
+    unchanged = 0
+    for values in wanted:
+        matches = existing.get(_natural_key(values, key_columns))
+        if not matches:
+            inserts.append({'user_id': user_id, **values})
+        else:
+            row_id, current = matches.pop(0)
+            if _row_key(current.values()) == _row_key(values.values()):
+                unchanged += 1
+            else:
+                updates.append({'id': row_id, **values, 'updated_at': now})
+        merged.append(values)
+
+    leftover = [(row_id, values) for matches in existing.values() for row_id, values in matches]
+    if replace and leftover:
+        db.query(model).filter(model.id.in_([row_id for row_id, _ in leftover])).delete(synchronize_session=False)
+    if updates:
+        db.execute(update(model), updates)
+    if inserts:
+        db.execute(insert(model), inserts)
+    if not replace:
+        merged.extend(values for _, values in leftover)
+
+    counts = {
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'kept': unchanged + (0 if replace else len(leftover)),
+        'deleted': len(leftover) if replace else 0,
+    }
+    return counts, [to_session(SimpleNamespace(**values)) for values in merged]
+
+
+def _snapshot_columns(snapshot: Optional[Any]) -> Optional[Dict[str, Any]]:
+    """Snapshot column values, or None for a missing or all-zero snapshot."""
+    if not snapshot:
+        return None
+    columns = {field: snapshot.get(field) or 0
+               for field in ('monthly_income', 'monthly_expenses', 'current_savings')}
+    return columns if any(columns.values()) else None
+
+
+@trace_class("guest_migration")
+@instrument_class("guest_migration")
+class GuestMigrationService:
+    """Moves a guest session's data into an account."""
+
+    @staticmethod
+    def migrate(user_id: str, guest_data: Any, strategy: str = "merge",
+                generate_plan: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+        """
+        Write the guest's data to the account in one transaction.
+
+        Args:
+            user_id: ID of the account signed up for or logged into
+            guest_data: st.session_state.guest_data (GuestData or dict)
+            strategy: "merge" or "replace" (see module docstring)
+            generate_plan: Store a plan for the merged data; by default
+                only if the guest ran the analysis
+
+        Returns:
+            Dictionary with per-section counts, 'plan_id' (or None) and
+            'data': the account's merged snapshot, assets, liabilities,
+            goals and analysis as session dicts; None if nothing was written
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        if generate_plan is None:
+            generate_plan = 'analysis' in guest_data or bool(guest_data.get('plan'))
+
+        db = next(get_db())
+
+        try:
+            # Serializes concurrent migrations of the same account (double
+            # submit, two tabs); a no-op on SQLite, which locks the database
+            if db.query(User.id).filter(User.id == user_id).with_for_update().first() is None:
+                raise ValueError(f"Unknown user: {user_id}")
+
+            result: Dict[str, Any] = {'plan_id': None, 'data': {}}
+            latest = db.query(FinancialSnapshot).filter(
+                FinancialSnapshot.user_id == user_id
+            ).order_by(FinancialSnapshot.created_at.desc()).first()
+            snapshot_id = latest.id if latest else None
+            snapshot = _snapshot_to_dict(latest) if latest else None
+
+            guest_snapshot = _snapshot_columns(guest_data.get('snapshot'))
+            result['snapshot'] = guest_snapshot is not None and (
+                snapshot is None or _row_key(guest_snapshot.values()) != _row_key(snapshot.values()))
+            if result['snapshot']:
+                snapshot_id = str(uuid.uuid4())
+                db.add(FinancialSnapshot(id=snapshot_id, user_id=user_id, **guest_snapshot))
+                snapshot = {field: float(value) for field, value in guest_snapshot.items()}
+
+            for section in _MIGRATED:
+                result[section], result['data'][section] = _merge_rows(
+                    db, section, user_id, guest_data.get(section) or [], strategy == "replace")
+
+            if generate_plan and snapshot is not None:
+                data = result['data']
+                analysis = FinancialCalculator.analyze_financial_health(
+                    snapshot, data['assets'], data['liabilities'])
+                plan = PlanGenerator.generate_plan(
+                    snapshot, data['assets'], data['liabilities'], data['goals'], analysis=analysis)
+                result['plan_id'] = str(uuid.uuid4())
+                _insert_plan(db, user_id, {**plan, 'plan_id': result['plan_id']}, snapshot_id=snapshot_id)
+                data['analysis'] = analysis
+                data['plan'] = plan
+
+            db.commit()
+            result['data']['snapshot'] = snapshot
+            return result
+
+        except Exception as e:
+            db.rollback()
+            logger.error("Error migrating guest data: %s", e)
+            record_error("guest_migration", "migrate")
+            return None
+        finally:
+            db.close()
@@ -0,0 +1,297 @@
+"""
+Async gateway to an OpenAI-compatible chat completions API (OpenRouter by
+default, or the local stand-in in benchmarks/fake_llm.py).
+
+One gateway per process owns one event loop thread and one pooled
+httpx.AsyncClient, so every Streamlit session shares connections and
+limits:
+
+- identical in-flight prompts are coalesced: the second caller subscribes
+  to the first caller's request (including its token stream) instead of
+  sending another one
+- at most LLM_MAX_CONCURRENCY requests are on the wire; the rest queue
+- every request has a LLM_TIMEOUT_SECONDS deadline
+- complete_many() dedupes a batch and fans it out under the same limit
+  (chat completions have no multi-prompt endpoint)
+
+Streamlit scripts are synchronous; stream()/complete() bridge from the
+script thread into the gateway loop.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+
+
+class LLMError(Exception):
+    """Raised when the LLM backend fails, times out or is not configured."""
+
+
+def _prompt_key(model: str, messages: Messages, max_tokens: int, temperature: float) -> str:
+    payload = json.dumps([model, messages, max_tokens, temperature], sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _InFlight:
+    """One upstream request, broadcast to every caller that asked for the same prompt."""
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.model_version: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self._changed = asyncio.Condition()
+
+    async def publish(self, token: str) -> None:
+        async with self._changed:
+            self.tokens.append(token)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None) -> None:
+        async with self._changed:
+            self.error = error
+            self.done = True
+            self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.done or len(self.tokens) > position)
+                fresh = self.tokens[position:]
+                finished, error = self.done, self.error
+            for token in fresh:
+                yield token
+            position += len(fresh)
+            if finished and position >= len(self.tokens):
+                if error is not None:
+                    raise error
+                return
+
+
+# Slack on top of the request deadline before a stream consumer gives up
+STREAM_GRACE_SECONDS = 5.0
+
+
+class TokenStream:
+    """Synchronous iterator over a streamed completion; model_version is set once it ends."""
+
+    def __init__(self, tokens: "queue.Queue", timeout: float):
+        self._tokens = tokens
+        self._timeout = timeout
+        self.model_version: Optional[str] = None
+        self.coalesced = False
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            try:
+                item = self._tokens.get(timeout=self._timeout)
+            except queue.Empty:
+                raise LLMError(f"LLM stream stalled for {self._timeout:g}s") from None
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+class LLMGateway:
+    """Coalescing, concurrency-limited client for one chat completions endpoint."""
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 model: Optional[str] = None, max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.base_url = (base_url or settings.LLM_BASE_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else settings.OPENROUTER_API_KEY
+        self.model = model or settings.LLM_MODEL
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+
+        self._in_flight: Dict[str, _InFlight] = {}
+        self.upstream_requests = 0
+        self.coalesced_requests = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._run(self._setup())
+
+    async def _setup(self) -> None:
+        # Deferred: pages that only call is_configured() should not pay for httpx
+        import httpx
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url, headers=headers,
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+        )
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the loop thread."""
+        if self._loop.is_running():
+            self._run(self._client.aclose())
+            self._run(self._loop.shutdown_asyncgens())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    # -- upstream ------------------------------------------------------
+
+    async def _fetch(self, flight: _InFlight, body: Dict[str, Any]) -> None:
+        """Send one streaming request and publish its tokens to flight."""
+        import httpx
+
+        try:
+            # The deadline covers queueing for a slot as well as the request
+            async with asyncio.timeout(self.timeout):
+                async with self._semaphore:
+                    self.upstream_requests += 1
+                    async with self._client.stream("POST", "/chat/completions", json=body) as response:
+                        if response.status_code != 200:
+                            await response.aread()
+                            raise LLMError(f"LLM backend returned {response.status_code}: {response.text[:200]}")
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            chunk = json.loads(data)
+                            flight.model_version = chunk.get("model", flight.model_version)
+                            choices = chunk.get("choices") or [{}]
+                            token = (choices[0].get("delta") or {}).get("content")
+                            if token:
+                                await flight.publish(token)
+            await flight.finish()
+        except TimeoutError:
+            await flight.finish(LLMError(f"LLM request timed out after {self.timeout:g}s"))
+        except LLMError as e:
+            await flight.finish(e)
+        except (httpx.HTTPError, ValueError) as e:
+            await flight.finish(LLMError(f"LLM request failed: {e}"))
+        except Exception as e:
+            # e.g. an unexpected chunk shape; subscribers must still be released
+            logger.exception("Unexpected error in LLM request")
+            await flight.finish(LLMError(f"LLM request failed: {e!r}"))
+        finally:
+            if not flight.done:
+                # Cancelled (loop shutdown): release subscribers, then let it propagate
+                await flight.finish(LLMError("LLM request was cancelled"))
+
+    async def _subscribe(self, messages: Messages, max_tokens: int, temperature: float):
+        """Join the in-flight request for this prompt, starting one if needed."""
+        key = _prompt_key(self.model, messages, max_tokens, temperature)
+        flight = self._in_flight.get(key)
+        coalesced = flight is not None
+        if flight is None:
+            flight = self._in_flight[key] = _InFlight()
+            body = {"model": self.model, "messages": messages, "max_tokens": max_tokens,
+                    "temperature": temperature, "stream": True}
+            task = asyncio.ensure_future(self._fetch(flight, body))
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced_requests += 1
+        return flight, coalesced
+
+    async def _complete(self, messages: Messages, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        flight, coalesced = await self._subscribe(messages, max_tokens, temperature)
+        text = "".join([token async for token in flight.subscribe()])
+        return {"text": text, "model_version": flight.model_version, "coalesced": coalesced}
+
+    # -- public API (callable from any thread) -------------------------
+
+    def complete(self, messages: Messages, max_tokens: int = 300, temperature: float = 0.2) -> Dict[str, Any]:
+        """
+        Full completion for one prompt.
+
+        Returns:
+            Dict with text, model_version and coalesced (shared another
+            caller's request)
+
+        Raises:
+            LLMError: On backend errors or timeout
+        """
+        return self._run(self._complete(messages, max_tokens, temperature))
+
+    def complete_many(self, prompts: Sequence[Messages], max_tokens: int = 300,
+                      temperature: float = 0.2) -> List[Dict[str, Any]]:
+        """
+        Completions for a batch of prompts; duplicates are sent once.
+
+        Returns:
+            One result dict per prompt (an 'error' key instead of text on failure)
+        """
+        async def run():
+            results = await asyncio.gather(
+                *(self._complete(messages, max_tokens, temperature) for messages in prompts),
+                return_exceptions=True,
+            )
+            return [{"error": str(r)} if isinstance(r, BaseException) else r for r in results]
+        return self._run(run())
+
+    def stream(self, messages: Messages, max_tokens: int = 300, temperature: float = 0.2) -> TokenStream:
+        """
+        Stream tokens as they arrive.
+
+        Returns:
+            TokenStream to iterate in the calling thread; raises LLMError
+            mid-iteration on failure, or if no token arrives within the
+            request timeout
+        """
+        tokens: "queue.Queue" = queue.Queue()
+        # The request deadline bounds any gap between tokens
+        stream = TokenStream(tokens, self.timeout + STREAM_GRACE_SECONDS)
+
+        async def pump():
+            try:
+                flight, stream.coalesced = await self._subscribe(messages, max_tokens, temperature)
+                async for token in flight.subscribe():
+                    tokens.put(token)
+                stream.model_version = flight.model_version
+                tokens.put(None)
+            except BaseException as e:
+                tokens.put(e)
+
+        asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        return stream
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def is_configured() -> bool:
+    """Whether an LLM backend is set up (LLM_ENABLED and a key or a local base URL)."""
+    local = settings.LLM_BASE_URL.startswith(("http://127.0.0.1", "http://localhost"))
+    return settings.LLM_ENABLED and (local or bool(settings.OPENROUTER_API_KEY))
+
+
+def get_gateway() -> LLMGateway:
+    """Process-shared gateway built from settings."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                if not is_configured():
+                    raise LLMError("LLM backend is not configured (set LLM_ENABLED and OPENROUTER_API_KEY)")
+                _gateway = LLMGateway()
+    return _gateway
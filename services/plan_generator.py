@@ -0,0 +1,253 @@
+"""
+Plan generation pipeline: snapshot -> calculator -> rules -> buckets -> projections -> explanation.
+
+Implements the deterministic rule engine from docs/rule-engine.md and
+produces the fields stored on models.plans.Plan (top_actions, buckets,
+projections, targets, rule_version). Each stage runs in its own tracing
+span so slow plans can be broken down offline.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.calculator import FinancialCalculator
+from utils.metrics import instrument_class
+from utils.tracing import span, trace_class
+
+# Thresholds used by the rules
+EMERGENCY_TARGET_MONTHS = 3
+HIGH_INTEREST_RATE = 0.15  # APR as decimal
+TARGET_SAVINGS_RATE = 20  # Percent
+SHORT_TERM_GOAL_MONTHS = 36
+
+
+@trace_class("plan_generator")
+@instrument_class("plan_generator")
+class PlanGenerator:
+    """Deterministic plan generation service."""
+
+    RULE_VERSION = "1.0.0"  # Version for audit trail (Plan.rule_version)
+
+    @staticmethod
+    def generate_plan(
+        snapshot: Dict[str, Any],
+        assets: List[Dict[str, Any]],
+        liabilities: List[Dict[str, Any]],
+        goals: Optional[List[Dict[str, Any]]] = None,
+        analysis: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a full plan for a user.
+
+        Args:
+            snapshot: Financial snapshot with income/expenses/savings
+            assets: List of assets
+            liabilities: List of liabilities
+            goals: Optional list of goals (for buckets and projections)
+            analysis: Precomputed FinancialCalculator analysis, if available
+
+        Returns:
+            Dictionary with analysis, top_actions, buckets, projections,
+            monthly targets and rule_version
+        """
+        goals = goals or []
+
+        with span("plan.calculate", reused=analysis is not None):
+            if analysis is None:
+                analysis = FinancialCalculator.analyze_financial_health(snapshot, assets, liabilities)
+
+        with span("plan.rules") as s:
+            actions = PlanGenerator.apply_rules(snapshot, liabilities, analysis)
+            s.set_attribute("actions", len(actions))
+
+        with span("plan.buckets"):
+            buckets = PlanGenerator.allocate_buckets(snapshot, liabilities, goals)
+
+        with span("plan.projections", goals=len(goals)):
+            projections = PlanGenerator.project_goals(goals, analysis['metrics']['monthly_surplus'])
+
+        with span("plan.explanation"):
+            top_actions = [PlanGenerator.explain_action(action) for action in actions[:3]]
+
+        surplus = max(0.0, analysis['metrics']['monthly_surplus'])
+        invest_target = round(actions[0]['monthly_investment'], 2) if actions and actions[0]['type'] == 'invest_growth' else 0.0
+
+        return {
+            'analysis': analysis,
+            'top_actions': top_actions,
+            'buckets': buckets,
+            'projections': projections,
+            'monthly_saving_target': round(surplus - invest_target, 2),
+            'monthly_invest_target': invest_target,
+            'strategy_type': top_actions[0]['type'] if top_actions else 'maintain',
+            'rule_version': PlanGenerator.RULE_VERSION,
+            'calculator_version': analysis.get('version', FinancialCalculator.VERSION)
+        }
+
+    @staticmethod
+    def apply_rules(snapshot: Dict[str, Any], liabilities: List[Dict[str, Any]], analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Apply prioritization rules.
+
+        Returns:
+            Ordered list of actions with type, priority and the amounts the
+            explanation step needs
+        """
+        metrics = analysis['metrics']
+        scores = analysis['scores']
+        actions = []
+
+        # Priority 1: Emergency Fund
+        if metrics['emergency_months'] < EMERGENCY_TARGET_MONTHS:
+            target_emergency = snapshot['monthly_expenses'] * EMERGENCY_TARGET_MONTHS
+            gap = target_emergency - snapshot['current_savings']
+            months_needed = gap / metrics['monthly_surplus'] if metrics['monthly_surplus'] > 0 else 0
+            actions.append({
+                'type': 'emergency_fund',
+                'priority': 1,
+                'gap': gap,
+                'months_needed': months_needed
+            })
+
+        # Priority 2: High-Interest Debt
+        high_interest_debts = [d for d in liabilities if d['interest_rate'] > HIGH_INTEREST_RATE]
+        if high_interest_debts:
+            actions.append({
+                'type': 'high_interest_debt',
+                'priority': 2,
+                'total_high_interest': sum(d['outstanding'] for d in high_interest_debts),
+                'monthly_payment': metrics['monthly_surplus'] * 0.7
+            })
+
+        # Priority 3: Increase Savings Rate
+        if metrics['savings_rate'] < TARGET_SAVINGS_RATE:
+            target_savings = snapshot['monthly_income'] * (TARGET_SAVINGS_RATE / 100)
+            gap = target_savings - (snapshot['monthly_income'] - snapshot['monthly_expenses'])
+            actions.append({
+                'type': 'savings_rate',
+                'priority': 3,
+                'savings_rate': metrics['savings_rate'],
+                'gap': gap
+            })
+
+        # If financially healthy, suggest investment goals
+        if not actions and scores['overall_health'] >= 75:
+            actions.append({
+                'type': 'invest_growth',
+                'priority': 1,
+                'monthly_investment': metrics['monthly_surplus'] * 0.8
+            })
+
+        return actions
+
+    @staticmethod
+    def allocate_buckets(snapshot: Dict[str, Any], liabilities: List[Dict[str, Any]], goals: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """
+        Bucketize money per docs/rule-engine.md (keys match models.plans.BucketType).
+
+        Returns:
+            Dictionary of bucket type -> target and current amounts
+        """
+        buckets = {
+            'emergency': {
+                'target_amount': snapshot.get('monthly_expenses', 0) * EMERGENCY_TARGET_MONTHS,
+                'current_amount': snapshot.get('current_savings', 0)
+            },
+            'debt': {
+                'target_amount': sum(d['outstanding'] for d in liabilities if d['interest_rate'] > HIGH_INTEREST_RATE),
+                'current_amount': 0.0
+            },
+            'short_term': {'target_amount': 0.0, 'current_amount': 0.0},
+            'long_term': {'target_amount': 0.0, 'current_amount': 0.0}
+        }
+
+        # Goal Allocation Rule: < 3 years low-risk, otherwise growth
+        today = datetime.now()
+        for goal in goals:
+            months_left = _months_until(goal.get('target_date'), today)
+            bucket = 'short_term' if months_left is not None and months_left < SHORT_TERM_GOAL_MONTHS else 'long_term'
+            buckets[bucket]['target_amount'] += goal.get('target_amount', 0)
+            buckets[bucket]['current_amount'] += goal.get('current_progress', 0)
+
+        return buckets
+
+    @staticmethod
+    def project_goals(goals: List[Dict[str, Any]], monthly_surplus: float) -> List[Dict[str, Any]]:
+        """
+        Project completion for each goal at the current monthly surplus.
+
+        Uses FinancialCalculator.project_goals, as the goals page does, so
+        the plan and the page agree on which goals are on track.
+
+        Returns:
+            One projection per goal: remaining amount, months needed and
+            whether the target date is met
+        """
+        if not goals:
+            return []
+        projection = FinancialCalculator.project_goals(goals, monthly_surplus)
+        remaining = projection['remaining']
+        months_needed = remaining / monthly_surplus if monthly_surplus > 0 else np.zeros_like(remaining)
+        on_track = (remaining <= 0) | ((monthly_surplus > 0) & ~np.isnat(projection['target_date'])
+                                       & projection['on_track'])
+        return [
+            {
+                'name': goal.get('name'),
+                'remaining': float(remaining[i]),
+                'months_needed': round(float(max(months_needed[i], 0)), 1),
+                'on_track': bool(on_track[i]),
+            }
+            for i, goal in enumerate(goals)
+        ]
+
+    @staticmethod
+    def explain_action(action: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Attach title, situation, action and impact text to a rule action.
+
+        Returns:
+            Action dict with display fields added
+        """
+        kind = action['type']
+
+        if kind == 'emergency_fund':
+            gap, months_needed = action['gap'], action['months_needed']
+            text = {
+                'title': '🚨 Build Emergency Fund',
+                'description': f"You need **₹{gap:,.0f} more** to reach 3 months of expenses",
+                'action': f"Save ₹{gap/6:,.0f}/month for 6 months" if gap > 0 else "Maintain current level",
+                'impact': f"Achieve in {months_needed:.0f} months at current savings rate" if months_needed > 0 else "Already achieved!"
+            }
+        elif kind == 'high_interest_debt':
+            text = {
+                'title': '💳 Pay Off High-Interest Debt',
+                'description': f"You have **₹{action['total_high_interest']:,.0f}** in high-interest debt (>15% APR)",
+                'action': f"Focus extra ₹{action['monthly_payment']:,.0f}/month on highest interest debt",
+                'impact': "Save thousands in interest payments"
+            }
+        elif kind == 'savings_rate':
+            gap = action['gap']
+            text = {
+                'title': '📊 Increase Savings Rate',
+                'description': f"Current: **{action['savings_rate']:.1f}%**, Target: **{TARGET_SAVINGS_RATE}%**",
+                'action': f"Reduce expenses by ₹{gap:,.0f}/month",
+                'impact': f"Save an additional ₹{gap*12:,.0f}/year"
+            }
+        else:
+            text = {
+                'title': '🚀 Invest for Growth',
+                'description': "Your financial foundation is strong!",
+                'action': f"Invest ₹{action['monthly_investment']:,.0f}/month in mutual funds or index funds",
+                'impact': "Build long-term wealth and achieve financial freedom faster"
+            }
+
+        return {**action, **text}
+
+
+def _months_until(target_date: Optional[str], today: datetime) -> Optional[float]:
+    """Months from today to a 'YYYY-MM-DD' date (None if missing)."""
+    if not target_date:
+        return None
+    target = datetime.strptime(target_date, "%Y-%m-%d")
+    return (target - today).days / 30
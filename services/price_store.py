@@ -0,0 +1,380 @@
+"""
+Local store of daily NAV/price series, memory-mapped per instrument.
+
+Backtests and valuations need years of daily prices for thousands of
+funds; re-parsing CSVs on every request is slow. The store keeps each
+instrument as two append-only columns:
+
+    catalog.json                   instrument -> name, asset type, count, first/last date
+    series/<asset type>/<id>.dates datetime64[D] (int64 days), strictly increasing
+    series/<asset type>/<id>.values float64 prices
+
+Readers map the columns with np.memmap and serve date-range slices as
+views (binary search on the date column, no copy, only touched pages read
+from disk; every process shares the page cache). The catalog's count is
+the source of truth for a series' length, so a reader never sees a
+half-written tail.
+
+Ingestion is incremental: only dates after an instrument's last stored
+date are appended (older or repeated dates are skipped), so a daily
+AMFI file adds one row per scheme. Sources:
+
+- AMFI NAV text files (NAVAll.txt and the NAV history report): ';'-separated
+  rows under a header naming "Scheme Code", "Scheme Name", "Net Asset
+  Value" and "Date" (dd-Mon-yyyy); section titles and N.A. NAVs are
+  skipped. Schemes are stored as mf/<scheme code>.
+- date,price CSVs laid out like services.backtest's PRICE_DATA_DIR
+  (<asset type>/<name>.csv), stored as <asset type>/<name>.
+
+There is one writer at a time (the ingest CLI); any number of processes
+read.
+
+Usage:
+    python -m services.price_store ingest-amfi NAVAll.txt
+    python -m services.price_store ingest-csv ./data/prices
+    python -m services.price_store info
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+CATALOG = "catalog.json"
+SERIES = "series"
+DATE_DTYPE = np.dtype("<M8[D]")
+VALUE_DTYPE = np.dtype("<f8")
+
+_KEY_PART = re.compile(r"[^A-Za-z0-9_.-]+")
+_AMFI_COLUMNS = {"code": "scheme code", "name": "scheme name", "nav": "net asset value", "date": "date"}
+
+
+def instrument_key(asset_type: str, name: str) -> str:
+    """Store key "<asset type>/<name>", with characters unsafe in file names replaced."""
+    return f"{_KEY_PART.sub('_', asset_type)}/{_KEY_PART.sub('_', name).strip('_') or 'unnamed'}"
+
+
+def read_price_csv(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read one date,price CSV (a header row, if any, is skipped).
+
+    Returns:
+        (dates datetime64[D], prices float64), sorted by date
+    """
+    dates, prices = [], []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or not row[0].strip():
+                continue
+            try:
+                price = float(row[1])
+            except ValueError:
+                continue  # header
+            dates.append(row[0].strip())
+            prices.append(price)
+    dates = np.array(dates, dtype="datetime64[D]")
+    prices = np.array(prices, dtype=np.float64)
+    order = np.argsort(dates, kind="stable")
+    return dates[order], prices[order]
+
+
+def read_amfi(path: Path) -> Dict[str, Tuple[str, np.ndarray, np.ndarray]]:
+    """
+    Parse an AMFI NAV text file.
+
+    Returns:
+        scheme code -> (scheme name, dates datetime64[D], navs float64)
+    """
+    columns: Optional[Dict[str, int]] = None
+    parsed_dates: Dict[str, np.datetime64] = {}  # a file has few distinct dates
+    rows: Dict[str, Tuple[str, List[np.datetime64], List[float]]] = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = [field.strip() for field in line.split(";")]
+            if len(fields) < 4:
+                continue  # blank line, fund house or scheme category title
+            if columns is None or not fields[0].isdigit():
+                header = [field.lower() for field in fields]
+                if all(label in header for label in _AMFI_COLUMNS.values()):
+                    columns = {key: header.index(label) for key, label in _AMFI_COLUMNS.items()}
+                continue
+            try:
+                nav = float(fields[columns["nav"]])
+                raw_date = fields[columns["date"]]
+                date = parsed_dates.get(raw_date)
+                if date is None:
+                    date = np.datetime64(datetime.strptime(raw_date, "%d-%b-%Y").date(), "D")
+                    parsed_dates[raw_date] = date
+            except (ValueError, IndexError):
+                continue  # N.A. or malformed
+            entry = rows.setdefault(fields[columns["code"]], (fields[columns["name"]], [], []))
+            entry[1].append(date)
+            entry[2].append(nav)
+    if columns is None:
+        raise ValueError(f"{path}: no AMFI header (Scheme Code;...;Net Asset Value;...;Date)")
+    return {code: (name, np.array(dates, dtype=DATE_DTYPE), np.array(navs, dtype=VALUE_DTYPE))
+            for code, (name, dates, navs) in rows.items()}
+
+
+class PriceStore:
+    """Memory-mapped, append-only daily price series."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.PRICE_STORE_DIR)
+        self._lock = threading.Lock()
+        self._catalog: Dict[str, Dict[str, Any]] = {}
+        self._catalog_mtime: Optional[int] = None
+        self._maps: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._refresh()
+
+    # Reading
+
+    def _refresh(self) -> None:
+        """Reload the catalog (and drop mappings) if the writer published a new one."""
+        path = self.root / CATALOG
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._catalog_mtime:
+            return
+        with self._lock:
+            with open(path, encoding="utf-8") as f:
+                self._catalog = json.load(f)["instruments"]
+            self._catalog_mtime = mtime
+            self._maps = {}
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        base = self.root / SERIES / key
+        return base.with_name(base.name + ".dates"), base.with_name(base.name + ".values")
+
+    def _columns(self, key: str) -> Tuple[np.ndarray, np.ndarray]:
+        columns = self._maps.get(key)
+        if columns is None:
+            count = self._catalog[key]["count"]
+            dates_path, values_path = self._paths(key)
+            # Plain ndarray views of the maps (they keep the mapping open)
+            columns = (np.asarray(np.memmap(dates_path, dtype=DATE_DTYPE, mode="r", shape=(count,))),
+                       np.asarray(np.memmap(values_path, dtype=VALUE_DTYPE, mode="r", shape=(count,))))
+            self._maps[key] = columns
+        return columns
+
+    def instruments(self, asset_type: Optional[str] = None) -> List[str]:
+        """Stored instrument keys, optionally of one asset type ("mf", "etf", ...)."""
+        self._refresh()
+        return sorted(key for key, info in self._catalog.items()
+                      if asset_type is None or info["asset_type"] == asset_type)
+
+    def info(self, key: str) -> Dict[str, Any]:
+        """Catalog entry: name, asset_type, count, first, last (ISO dates)."""
+        self._refresh()
+        return dict(self._catalog[key])
+
+    def series(self, key: str, start: Optional[Any] = None,
+               end: Optional[Any] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dates and prices of one instrument within [start, end].
+
+        Args:
+            key: Instrument key
+            start: First date (inclusive), anything np.datetime64 accepts
+            end: Last date (inclusive)
+
+        Returns:
+            (dates datetime64[D], prices float64) read-only views of the
+            mapped files
+        """
+        self._refresh()
+        dates, values = self._columns(key)
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return dates[lo:hi], values[lo:hi]
+
+    def latest(self, keys: Sequence[str], as_of: Optional[Any] = None) -> np.ndarray:
+        """
+        Last price on or before as_of for each key, for valuing holdings.
+
+        Returns:
+            float64 array aligned with keys, NaN for unknown keys or no price yet
+        """
+        self._refresh()
+        prices = np.full(len(keys), np.nan)
+        as_of = None if as_of is None else np.datetime64(as_of, "D")
+        for i, key in enumerate(keys):
+            if key not in self._catalog:
+                continue
+            dates, values = self._columns(key)
+            position = len(dates) if as_of is None else int(np.searchsorted(dates, as_of, side="right"))
+            if position:
+                prices[i] = values[position - 1]
+        return prices
+
+    # Writing
+
+    def _save_catalog(self) -> None:
+        path = self.root / CATALOG
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"instruments": self._catalog}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        self._catalog_mtime = path.stat().st_mtime_ns
+
+    def _append(self, key: str, dates: np.ndarray, values: np.ndarray, name: str, asset_type: str) -> int:
+        """Append the points after the instrument's last date; the caller saves the catalog."""
+        dates = np.asarray(dates, dtype=DATE_DTYPE)
+        values = np.asarray(values, dtype=VALUE_DTYPE)
+        if not len(dates):
+            # Empty or header-only file
+            return 0
+        # Sorted, one point per date (the last one given wins)
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+        last_of_day = np.append(dates[1:] != dates[:-1], True)
+        dates, values = dates[last_of_day], values[last_of_day]
+
+        info = self._catalog.get(key)
+        if info is not None:
+            newer = dates > np.datetime64(info["last"], "D")
+            dates, values = dates[newer], values[newer]
+        if not len(dates):
+            return 0
+
+        dates_path, values_path = self._paths(key)
+        dates_path.parent.mkdir(parents=True, exist_ok=True)
+        count = info["count"] if info else 0
+        # Values first, dates second, catalog last: a crash leaves at most
+        # an unpublished tail, cut off before the next append
+        for path, column in ((values_path, values), (dates_path, dates)):
+            with open(path, "ab") as f:
+                f.truncate(count * column.itemsize)
+                f.write(column.tobytes())
+        self._catalog[key] = {
+            "name": name if name else (info or {}).get("name", key),
+            "asset_type": asset_type,
+            "count": count + len(dates),
+            "first": info["first"] if info else str(dates[0]),
+            "last": str(dates[-1]),
+        }
+        self._maps.pop(key, None)
+        return len(dates)
+
+    def append(self, key: str, dates: Any, values: Any, name: Optional[str] = None,
+               asset_type: Optional[str] = None) -> int:
+        """
+        Append one instrument's points newer than its last stored date.
+
+        Args:
+            key: Instrument key (see instrument_key())
+            dates: Dates (anything np.asarray(..., 'datetime64[D]') accepts), any order
+            values: Prices aligned with dates
+            name: Display name (kept from earlier appends if None)
+            asset_type: Asset type (default: the key's prefix)
+
+        Returns:
+            Number of points appended
+        """
+        self._refresh()
+        appended = self._append(key, dates, values, name, asset_type or key.split("/", 1)[0])
+        if appended:
+            self._save_catalog()
+        return appended
+
+    def _ingest(self, series: Iterable[Tuple[str, str, str, np.ndarray, np.ndarray]]) -> Dict[str, int]:
+        self._refresh()
+        stats = {"instruments": 0, "appended": 0, "skipped": 0}
+        for key, name, asset_type, dates, values in series:
+            appended = self._append(key, dates, values, name, asset_type)
+            stats["instruments"] += 1
+            stats["appended"] += appended
+            stats["skipped"] += len(dates) - appended
+        if stats["appended"]:
+            self._save_catalog()
+        return stats
+
+    def ingest_amfi(self, path: str) -> Dict[str, int]:
+        """
+        Append new NAVs from an AMFI NAV text file.
+
+        Returns:
+            Counts: instruments seen, points appended, points skipped
+            (already stored, or duplicate dates in the file)
+        """
+        return self._ingest((f"mf/{code}", name, "mf", dates, navs)
+                            for code, (name, dates, navs) in read_amfi(Path(path)).items())
+
+    def ingest_csv(self, path: str, asset_type: str, key: Optional[str] = None) -> Dict[str, int]:
+        """Append new prices from one date,price CSV (key default: <asset type>/<file stem>)."""
+        path = Path(path)
+        dates, prices = read_price_csv(path)
+        return self._ingest([(key or instrument_key(asset_type, path.stem), path.stem, asset_type, dates, prices)])
+
+    def ingest_directory(self, directory: str) -> Dict[str, int]:
+        """Append new prices from every <asset type>/<name>.csv under directory."""
+        def series():
+            for path in sorted(Path(directory).glob("*/*.csv")):
+                asset_type = path.parent.name
+                dates, prices = read_price_csv(path)
+                yield instrument_key(asset_type, path.stem), path.stem, asset_type, dates, prices
+        return self._ingest(series())
+
+
+_stores: Dict[str, PriceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_price_store(root: Optional[str] = None) -> PriceStore:
+    """Process-shared store for root (default: PRICE_STORE_DIR)."""
+    root = str(Path(root or settings.PRICE_STORE_DIR).resolve())
+    store = _stores.get(root)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(root)
+            if store is None:
+                store = _stores[root] = PriceStore(root)
+    return store
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Price store tools")
+    parser.add_argument("--store", default=None, help="store directory (default: PRICE_STORE_DIR)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    amfi = sub.add_parser("ingest-amfi", help="append new NAVs from AMFI NAV text files")
+    amfi.add_argument("paths", nargs="+")
+    prices = sub.add_parser("ingest-csv", help="append new prices from <asset type>/<name>.csv files")
+    prices.add_argument("directory", nargs="?", default=None, help="default: PRICE_DATA_DIR")
+    sub.add_parser("info", help="instrument counts and date range")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    store = PriceStore(args.store)
+    if args.command == "ingest-amfi":
+        for path in args.paths:
+            logger.info("%s: %s", path, store.ingest_amfi(path))
+    elif args.command == "ingest-csv":
+        directory = args.directory or settings.PRICE_DATA_DIR
+        logger.info("%s: %s", directory, store.ingest_directory(directory))
+    else:
+        keys = store.instruments()
+        by_type: Dict[str, int] = {}
+        for key in keys:
+            asset_type = store.info(key)["asset_type"]
+            by_type[asset_type] = by_type.get(asset_type, 0) + 1
+        points = sum(store.info(key)["count"] for key in keys)
+        print(f"{len(keys)} instruments ({by_type}), {points} points")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# RAG package - retrieval for "Why this?" explanations
+"""
+Retrieval layer for grounded explanations over the playbook corpus
+(docs/rag-agent-code-strategy.md):
+- vector_index: memory-mapped embedding matrix with exact top-k search
+- bm25: memory-mapped inverted index with vectorized BM25 scoring
+- hybrid: BM25 + vector retrieval fused by reciprocal rank
+- embeddings: sentence-transformers and offline hashing embedders
+- model_registry: shared model instances with background warm-up and idle unload
+- embedding_cache: SQLite + in-memory LRU cache of vectors by (model, text hash)
+- explanation_cache: generated explanations keyed by rule, action and bucketed metrics
+- explain: "Why this?" pipeline (retrieval, explanation cache, streamed LLM answer)
+- ingest: incremental, hash-based chunking and indexing of docs/*.md
+"""
@@ -0,0 +1,182 @@
+"""
+In-process BM25 over the corpus chunks, stored next to the vector index.
+
+Exact terms matter in playbook queries ("SIP", "ELSS", "80C", "avalanche")
+and embeddings blur them, so retrieval also scores lexical matches. The
+inverted index is three flat arrays in CSR layout:
+
+    bm25_offsets.npy  (terms + 1,) int64   postings of term t are [offsets[t], offsets[t+1])
+    bm25_docs.npy     (postings,)  int32   row (chunk) ids, ascending within a term
+    bm25_weights.npy  (postings,)  float32 precomputed BM25 impact: idf * saturated tf
+    bm25_vocab.json   term -> term id
+
+Because each posting already carries its full BM25 contribution, a query
+is one slice per query term and a vectorized scatter-add into a score
+array; no per-document Python work. The arrays are memory-mapped like the
+vectors.
+"""
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.rag.vector_index import top_k
+
+OFFSETS = "bm25_offsets.npy"
+DOCS = "bm25_docs.npy"
+WEIGHTS = "bm25_weights.npy"
+VOCAB = "bm25_vocab.json"
+
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens ("80C" -> "80c", "debt-free" -> "debt", "free")."""
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """Read-only BM25 index over the rows of one vector index version."""
+
+    def __init__(self, vocab: Dict[str, int], offsets: np.ndarray, docs: np.ndarray,
+                 weights: np.ndarray, count: int):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def build(path: str, texts: Sequence[str], k1: float = K1, b: float = B) -> "BM25Index":
+        """
+        Write the BM25 arrays for texts (one per index row) into path and open them.
+
+        Args:
+            path: Index version directory
+            texts: Row texts, in vector index row order
+            k1: Term-frequency saturation
+            b: Length normalization strength
+        """
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        vocab: Dict[str, int] = {}
+        term_ids: List[np.ndarray] = []
+        doc_ids: List[np.ndarray] = []
+        tfs: List[np.ndarray] = []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            if not tokens:
+                continue
+            ids = np.fromiter((vocab.setdefault(t, len(vocab)) for t in tokens), dtype=np.int64, count=len(tokens))
+            unique, counts = np.unique(ids, return_counts=True)
+            term_ids.append(unique)
+            doc_ids.append(np.full(unique.shape[0], row, dtype=np.int32))
+            tfs.append(counts.astype(np.float32))
+
+        if term_ids:
+            terms = np.concatenate(term_ids)
+            docs = np.concatenate(doc_ids)
+            tf = np.concatenate(tfs)
+        else:
+            terms, docs, tf = np.zeros(0, np.int64), np.zeros(0, np.int32), np.zeros(0, np.float32)
+
+        # Group postings by term (stable keeps rows ascending within a term)
+        order = np.argsort(terms, kind="stable")
+        terms, docs, tf = terms[order], docs[order], tf[order]
+        df = np.bincount(terms, minlength=len(vocab))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+
+        n = max(len(texts), 1)
+        avgdl = float(lengths.mean()) if len(texts) and lengths.mean() > 0 else 1.0
+        idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * lengths[docs] / avgdl)
+        weights = (idf[terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+        for name, array in ((OFFSETS, offsets), (DOCS, docs.astype(np.int32)), (WEIGHTS, weights)):
+            tmp = directory / (name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, directory / name)
+        tmp = directory / (VOCAB + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"count": len(texts), "k1": k1, "b": b, "terms": vocab}, f, ensure_ascii=False)
+        os.replace(tmp, directory / VOCAB)
+
+        return BM25Index.open(path)
+
+    @staticmethod
+    def open(path: str) -> "BM25Index":
+        """
+        Open the BM25 arrays under path (memory-mapped).
+
+        Raises:
+            FileNotFoundError: If the version has no BM25 index
+        """
+        directory = Path(path)
+        with open(directory / VOCAB, encoding="utf-8") as f:
+            vocab = json.load(f)
+        return BM25Index(
+            vocab["terms"],
+            np.load(directory / OFFSETS, mmap_mode="r"),
+            np.load(directory / DOCS, mmap_mode="r"),
+            np.load(directory / WEIGHTS, mmap_mode="r"),
+            vocab["count"],
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every row for query (0 for rows sharing no term)."""
+        out = np.zeros(self.count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Rows are unique within one term's postings, so fancy += is exact
+            out[self.docs[start:end]] += self.weights[start:end]
+        return out
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Top-k rows by BM25.
+
+        Returns:
+            List of (row index, score), best first; rows with score 0 are omitted
+        """
+        scores = self.scores(query)
+        return [(int(i), float(scores[i])) for i in top_k(scores, k) if scores[i] > 0]
+
+
+_open_bm25: Dict[str, Optional[BM25Index]] = {}
+_open_lock = threading.Lock()
+
+
+def get_bm25(path: str) -> Optional[BM25Index]:
+    """Shared per-process BM25 handle for an index version, or None if it has none."""
+    key = str(Path(path).resolve())
+    if key not in _open_bm25:
+        with _open_lock:
+            if key not in _open_bm25:
+                try:
+                    _open_bm25[key] = BM25Index.open(path)
+                except FileNotFoundError:
+                    _open_bm25[key] = None
+    return _open_bm25[key]
+
+
+def row_texts(metadata: Iterable[dict]) -> List[str]:
+    """Text indexed for each row: heading path plus body."""
+    return [f"{m.get('heading', '')}\n{m.get('text', '')}" for m in metadata]
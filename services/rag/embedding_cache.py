@@ -0,0 +1,325 @@
+"""
+Persistent embedding cache keyed by (model name, normalized text hash).
+
+Recurring questions ("why emergency fund first?") and unchanged corpus
+chunks skip the model entirely:
+
+- an in-process LRU answers repeat lookups in microseconds
+- a SQLite table (WAL mode, shared by all worker processes on the host)
+  stores float16 vectors across restarts
+- misses are computed in one batched model call and written back in one
+  transaction
+- the table is trimmed back under EMBEDDING_CACHE_MAX_MB by least recent use;
+  memory hits update last_used too, batched (TOUCH_BATCH / TOUCH_SECONDS),
+  so hot entries are not the first evicted, and the table is only sized
+  and trimmed when the bytes inserted push the running estimate over
+  the limit
+
+CachedEmbedder wraps any embedder with the same name/dim/encode interface.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import settings
+from services.rag.embeddings import get_embedder
+
+MEMORY_ENTRIES = 4096
+# Bytes per row besides the vector (key, model, bookkeeping), for size accounting
+ROW_OVERHEAD = 64
+# Memory hits are written to last_used once this many are pending, or this
+# long after the last write (and always before evicting)
+TOUCH_BATCH = 256
+TOUCH_SECONDS = 30.0
+# Rows fetched per eviction query
+EVICT_PAGE_ROWS = 1000
+
+
+def normalize_text(text: str) -> str:
+    """NFKC, lowercase, collapse whitespace - so trivially different inputs share an entry."""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Two-level (memory LRU + SQLite) cache of float16 embedding vectors."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None,
+                 memory_entries: int = MEMORY_ENTRIES):
+        self.path = path or settings.EMBEDDING_CACHE_PATH
+        self.max_bytes = max_bytes if max_bytes is not None else settings.EMBEDDING_CACHE_MAX_MB * 2**20
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._local = threading.local()
+        self._touched: Dict[tuple, float] = {}  # (model, key) -> last memory hit, not yet on disk
+        self._touched_at = time.monotonic()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, key BLOB NOT NULL, dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, key)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        # Running size estimate: table size at start plus bytes this process inserted
+        self._estimated_bytes = self.size_bytes() if self.max_bytes else 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- memory level --------------------------------------------------
+
+    def _memory_get(self, key: tuple, now: float) -> Optional[np.ndarray]:
+        with self._memory_lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._touched[key] = now
+            return vector
+
+    def _memory_put(self, key: tuple, vector: np.ndarray) -> None:
+        with self._memory_lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def flush_touches(self) -> int:
+        """
+        Write pending memory-hit times to last_used (one executemany).
+
+        Returns:
+            Number of rows touched
+        """
+        with self._memory_lock:
+            touched, self._touched = self._touched, {}
+            self._touched_at = time.monotonic()
+        if touched:
+            self._connection().executemany(
+                "UPDATE embeddings SET last_used = MAX(last_used, ?) WHERE model = ? AND key = ?",
+                [(used, model, key) for (model, key), used in touched.items()])
+        return len(touched)
+
+    # -- public API ----------------------------------------------------
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached vectors.
+
+        Returns:
+            One float32 vector (or None on miss) per text, in order
+        """
+        now = time.time()
+        keys = [text_key(t) for t in texts]
+        results: List[Optional[np.ndarray]] = [self._memory_get((model, k), now) for k in keys]
+        self.hits_memory += sum(r is not None for r in results)
+
+        pending: Dict[bytes, List[int]] = {}
+        for i, (key, found) in enumerate(zip(keys, results)):
+            if found is None:
+                pending.setdefault(key, []).append(i)
+        if not pending:
+            if len(self._touched) >= TOUCH_BATCH or time.monotonic() - self._touched_at >= TOUCH_SECONDS:
+                self.flush_touches()
+            return results
+
+        conn = self._connection()
+        found_keys = []
+        pending_keys = list(pending)
+        # Stay under SQLite's bound-parameter limit
+        for offset in range(0, len(pending_keys), 500):
+            chunk = pending_keys[offset:offset + 500]
+            rows = conn.execute(
+                f"SELECT key, dim, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(chunk))})",
+                [model, *chunk],
+            ).fetchall()
+            for key, dim, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float16, count=dim).astype(np.float32)
+                self._memory_put((model, key), vector)
+                for i in pending[key]:
+                    results[i] = vector
+                found_keys.append(key)
+
+        if found_keys:
+            self.hits_disk += sum(len(pending[k]) for k in found_keys)
+            with self._memory_lock:
+                for key in found_keys:
+                    self._touched[(model, key)] = now
+        # Already at the database: write these and the pending memory hits together
+        self.flush_touches()
+        self.misses += sum(r is None for r in results)
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """Store vectors for texts (one transaction); trim if that crosses the size limit."""
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            key = text_key(text)
+            half = np.asarray(vector, dtype=np.float16)
+            self._memory_put((model, key), half.astype(np.float32))
+            rows.append((model, key, int(half.shape[0]), half.tobytes(), now))
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO embeddings (model, key, dim, vector, last_used) "
+                             "VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        # Replacements count as new bytes; evict() re-measures before trimming
+        self._estimated_bytes += sum(len(row[3]) + ROW_OVERHEAD for row in rows)
+        if self.max_bytes and self._estimated_bytes > self.max_bytes:
+            self.evict()
+
+    def get_or_compute(self, model: str, texts: Sequence[str],
+                       compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Vectors for texts, computing all misses in a single compute() call.
+
+        Args:
+            model: Model name (part of the key)
+            texts: Input texts
+            compute: Batch function mapping a list of texts to (n, dim) vectors
+
+        Returns:
+            (len(texts), dim) float32 array
+        """
+        cached = self.get_many(model, texts)
+        missing = [i for i, v in enumerate(cached) if v is None]
+        if missing:
+            # Identical texts within one batch are computed once
+            unique: Dict[bytes, int] = {}
+            for i in missing:
+                unique.setdefault(text_key(texts[i]), i)
+            first_rows = list(unique.values())
+            computed = np.asarray(compute([texts[i] for i in first_rows]), dtype=np.float32)
+            self.put_many(model, [texts[i] for i in first_rows], computed)
+            by_key = {key: computed[n] for n, key in enumerate(unique)}
+            for i in missing:
+                cached[i] = by_key[text_key(texts[i])]
+        if not cached:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(cached).astype(np.float32, copy=False)
+
+    def size_bytes(self) -> int:
+        row = self._connection().execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) + COUNT(*) * ? FROM embeddings", (ROW_OVERHEAD,)
+        ).fetchone()
+        return int(row[0])
+
+    def evict(self) -> int:
+        """
+        Delete least recently used rows until under max_bytes.
+
+        Returns:
+            Number of rows deleted
+        """
+        if not self.max_bytes:
+            return 0
+        self.flush_touches()
+        size = self.size_bytes()
+        excess = size - self.max_bytes
+        if excess <= 0:
+            self._estimated_bytes = size
+            return 0
+        conn = self._connection()
+        # Trim 10% below the limit so inserts don't evict on every call
+        target = excess + self.max_bytes // 10
+        deleted, freed = 0, 0
+        while freed < target:
+            rows = conn.execute("SELECT model, key, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT ?",
+                                (EVICT_PAGE_ROWS,)).fetchall()
+            if not rows:
+                break
+            doomed = []
+            for model, key, row_size in rows:
+                if freed >= target:
+                    break
+                doomed.append((model, key))
+                freed += row_size + ROW_OVERHEAD
+            conn.executemany("DELETE FROM embeddings WHERE model = ? AND key = ?", doomed)
+            deleted += len(doomed)
+            with self._memory_lock:
+                for item in doomed:
+                    self._memory.pop(item, None)
+        self._estimated_bytes = size - freed
+        return deleted
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+        }
+
+
+class CachedEmbedder:
+    """Embedder wrapper answering encode() from EmbeddingCache where possible."""
+
+    def __init__(self, embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+        self.name = embedder.name
+
+    @property
+    def dim(self) -> int:
+        return self.embedder.dim
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return self.cache.get_or_compute(self.name, list(texts), self.embedder.encode)
+
+
+_cache: Optional[EmbeddingCache] = None
+_cached_embedders: Dict[str, CachedEmbedder] = {}
+_cache_lock = threading.Lock()
+_embedders_lock = threading.Lock()
+
+
+def get_cache() -> EmbeddingCache:
+    """Process-shared cache at settings.EMBEDDING_CACHE_PATH."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
+
+
+def get_cached_embedder(name: Optional[str] = None) -> CachedEmbedder:
+    """Process-shared cached embedder for name (settings.EMBEDDING_MODEL by default)."""
+    embedder = get_embedder(name)
+    cached = _cached_embedders.get(embedder.name)
+    if cached is None:
+        with _embedders_lock:
+            cached = _cached_embedders.get(embedder.name)
+            if cached is None:
+                cached = _cached_embedders[embedder.name] = CachedEmbedder(embedder, get_cache())
+    return cached
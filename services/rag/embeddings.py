@@ -0,0 +1,115 @@
+"""
+Text embedders for the retrieval corpus and user questions.
+
+Every embedder exposes `name` (recorded in index manifests so vectors from
+different models are never mixed), `dim` and `encode(texts) -> (n, dim)
+float32`. Backends:
+
+- sentence-transformers models (e.g. all-MiniLM-L6-v2), loaded through
+  services.rag.model_registry (background warm-up, idle unload)
+- "hashing": deterministic feature-hashing of word unigrams/bigrams. No
+  model download, useful offline and as a stable stand-in in CI
+"""
+import hashlib
+import re
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import settings
+from services.rag.model_registry import get_registry
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """Feature-hashing bag of unigrams and bigrams (signed, L2-normalized)."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _bucket(self, feature: str):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if (value >> 63) & 1 else -1.0
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                index, sign = self._bucket(feature)
+                out[row, index] += sign
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class SentenceTransformerEmbedder:
+    """
+    sentence-transformers model held by the model registry.
+
+    Loaded by the registry's warm-up thread or on first encode(), shared by
+    every session in the process, and reloaded after an idle unload.
+    """
+
+    def __init__(self, model_name: str):
+        self.name = model_name
+        self.registry_name = f"embedder:{model_name}"
+        self._dim: Optional[int] = None
+        get_registry().register(self.registry_name, self._load_model)
+
+    def _load_model(self):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.name)
+
+    def load(self):
+        return get_registry().get(self.registry_name)
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            self._dim = self.load().get_sentence_embedding_dimension()
+        return self._dim
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.load().encode(list(texts), batch_size=64, normalize_embeddings=True,
+                                     convert_to_numpy=True, show_progress_bar=False)
+        return vectors.astype(np.float32, copy=False)
+
+
+_embedders: Dict[str, object] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(name: str = None):
+    """
+    Process-shared embedder by name (defaults to settings.EMBEDDING_MODEL).
+
+    Args:
+        name: "hashing", "hashing-<dim>" or a sentence-transformers model name
+    """
+    name = name or settings.EMBEDDING_MODEL
+    embedder = _embedders.get(name)
+    if embedder is None:
+        with _embedders_lock:
+            embedder = _embedders.get(name)
+            if embedder is None:
+                if name.startswith("hashing"):
+                    dim = int(name.split("-", 1)[1]) if "-" in name else 384
+                    embedder = HashingEmbedder(dim)
+                else:
+                    embedder = SentenceTransformerEmbedder(name)
+                _embedders[name] = embedder
+    return embedder
+
+
+def encode_batched(embedder, texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """Encode texts in fixed-size batches (one model call per batch)."""
+    if not texts:
+        return np.zeros((0, embedder.dim), dtype=np.float32)
+    parts = [embedder.encode(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    return np.vstack(parts)
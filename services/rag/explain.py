@@ -0,0 +1,136 @@
+"""
+"Why this?" explanations: retrieve -> cache lookup -> LLM (streamed).
+
+Uses the "Why this recommendation?" template from docs/prompts.md. The
+retrieved passage IDs, the model that answered and whether the answer came
+from the explanation cache are recorded in RecommendationLog for logged-in
+users.
+
+Answers are cached per bucket of metrics and shared between users, so the
+prompt (and the retrieval query) carry only the action type and title -
+never the user's rupee figures, which the UI already shows next to the
+explanation.
+"""
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+from services.audit_log import get_audit_writer
+from services.llm_gateway import get_gateway
+from services.plan_generator import PlanGenerator
+from services.rag import hybrid
+from services.rag.explanation_cache import get_explanation_cache
+from services.rag.model_registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_PASSAGES = 3
+
+SYSTEM_PROMPT = (
+    "You are a Personal Finance Explanation Assistant. You only explain "
+    "recommendations already generated by the system, using only the provided "
+    "context. Do not give new advice, calculate numbers or invent facts. If the "
+    "context is insufficient, say: \"I don't have enough information to answer "
+    "this reliably.\" Use simple, calm, supportive language."
+)
+
+
+def recommendation_text(action: Dict[str, Any]) -> str:
+    """
+    Amount-free summary of an explained action (see PlanGenerator.explain_action).
+
+    Only the type and title: description and action hold the user's figures.
+    """
+    title = action.get('title', '').replace("**", "").strip()
+    kind = action.get('type', '').replace("_", " ")
+    return f"{title} ({kind})" if title and kind else title or kind
+
+
+def retrieve_context(query: str, k: int = CONTEXT_PASSAGES) -> List[Dict[str, Any]]:
+    """Top-k corpus passages for query (hybrid BM25 + vector), or [] when no index is published."""
+    return hybrid.search(query, k)
+
+
+def build_messages(action: Dict[str, Any], passages: List[Dict[str, Any]], question: str = "") -> List[Dict[str, str]]:
+    """Chat messages for the "Why this recommendation?" template."""
+    reference = "\n\n".join(f"[{p['id']}]\n{p['text']}" for p in passages) or "(none)"
+    user = (
+        f"Recommendation:\n{recommendation_text(action)}\n\n"
+        f"Reference Information:\n{reference}\n\n"
+    )
+    if question:
+        user += f"Question:\n{question}\n\n"
+    user += (
+        "Explain:\n- Why this recommendation makes sense\n- What problem it solves\n"
+        "- What risk it reduces\n- What happens if the user ignores it\n\n"
+        "Constraints:\n- Do NOT give new advice\n- Use bullet points\n- Max 120 words"
+    )
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user}]
+
+
+class ExplanationStream:
+    """
+    Iterable of text chunks for one explanation.
+
+    After iteration: text, model_version, source_ids and match ("exact",
+    "similar" or "generated") describe what was shown.
+    """
+
+    def __init__(self, action: Dict[str, Any], metrics: Dict[str, Any], question: str,
+                 rule_version: str, user_id: Optional[str], plan_id: Optional[str]):
+        self.action = action
+        self.metrics = metrics
+        self.question = question
+        self.rule_version = rule_version
+        self.user_id = user_id
+        self.plan_id = plan_id
+        self.text = ""
+        self.model_version: Optional[str] = None
+        self.source_ids: List[str] = []
+        self.match: Optional[str] = None
+
+    def __iter__(self) -> Iterator[str]:
+        passages = retrieve_context(f"{recommendation_text(self.action)}\n{self.question}".strip())
+        self.source_ids = [p['id'] for p in passages]
+        cache = get_explanation_cache()
+
+        hit = cache.lookup(self.rule_version, self.action['type'], self.metrics, self.source_ids, self.question)
+        if hit is not None:
+            self.text, self.model_version, self.match = hit['text'], hit['model_version'], hit['match']
+            yield self.text
+        else:
+            stream = get_gateway().stream(build_messages(self.action, passages, self.question))
+            parts = []
+            for token in stream:
+                parts.append(token)
+                yield token
+            self.text, self.model_version, self.match = "".join(parts), stream.model_version, "generated"
+            cache.store(self.rule_version, self.action['type'], self.metrics, self.source_ids,
+                        self.question, self.text, self.model_version)
+
+        get_registry().mark_first_response()
+        if self.user_id:
+            get_audit_writer().record(
+                self.user_id, self.rule_version, plan_id=self.plan_id, source_ids=self.source_ids,
+                model_version=self.model_version,
+                context={"action_type": self.action['type'], "question": self.question, "match": self.match}
+            )
+
+
+def stream_explanation(action: Dict[str, Any], metrics: Dict[str, Any], question: str = "",
+                       rule_version: str = PlanGenerator.RULE_VERSION, user_id: Optional[str] = None,
+                       plan_id: Optional[str] = None) -> ExplanationStream:
+    """
+    Explain a rule action, streaming LLM tokens on a cache miss.
+
+    Args:
+        action: Action from PlanGenerator.generate_plan()['top_actions']
+        metrics: analysis['metrics'] for the user
+        question: Optional follow-up question
+        user_id: Logged-in user to record in RecommendationLog (None for guests)
+        plan_id: Saved plan the action belongs to
+
+    Returns:
+        ExplanationStream; iterating it may raise LLMError, or RuntimeError
+        if the embedding model failed to load
+    """
+    return ExplanationStream(action, metrics, question, rule_version, user_id, plan_id)
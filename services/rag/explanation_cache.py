@@ -0,0 +1,214 @@
+"""
+Cache of generated "Why this?" explanations.
+
+Explanations for the same rule action are nearly identical for users in
+similar financial shape, so entries are keyed by what actually drives the
+text rather than by the raw numbers:
+
+    (rule_version, action type, bucketed metrics, retrieved source IDs)
+
+Metrics are quantized into coarse ranges (e.g. emergency_months 1-3,
+savings_rate 10-20%) before keying. A rule_version bump or a change in the
+retrieved passages yields a new key, so stale explanations are never served.
+
+Within one key, a free-text question is matched exactly (normalized text)
+first, then by embedding similarity against questions already answered,
+so "why build an emergency fund first?" can reuse the answer to "why is
+the emergency fund my first step?".
+
+Lookups are counted in utils.metrics (EXPLANATION_CACHE_LOOKUPS, by
+result) and in the per-process stats().
+"""
+import bisect
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from services.rag.embedding_cache import get_cached_embedder, normalize_text
+from utils.metrics import EXPLANATION_CACHE_LOOKUPS, is_enabled
+
+# Upper bounds of each metric's buckets (value < bound); anything above the
+# last bound falls into a final open bucket. Bounds follow the rule
+# thresholds in services.plan_generator and the dashboard health bands.
+METRIC_BUCKETS: Dict[str, Tuple[float, ...]] = {
+    'emergency_months': (1, 3, 6),
+    'savings_rate': (0, 10, 20, 30),
+    'dti_ratio': (20, 36, 50),
+    'monthly_surplus': (0, 1),
+}
+
+MAX_ENTRIES = 2048
+
+
+def quantize_metrics(metrics: Dict[str, Any]) -> Tuple[Tuple[str, int], ...]:
+    """
+    Map calculator metrics to bucket indexes.
+
+    Args:
+        metrics: analysis['metrics'] from FinancialCalculator
+
+    Returns:
+        Sorted (name, bucket index) pairs for the metrics in METRIC_BUCKETS
+    """
+    return tuple(
+        (name, bisect.bisect_right(bounds, float(metrics[name])))
+        for name, bounds in sorted(METRIC_BUCKETS.items())
+        if metrics.get(name) is not None
+    )
+
+
+def explanation_key(rule_version: str, action_type: str, metrics: Dict[str, Any],
+                    source_ids: Optional[Iterable[str]] = None) -> str:
+    """Stable key for an explanation, independent of the user's question."""
+    payload = json.dumps([rule_version, action_type, quantize_metrics(metrics), sorted(source_ids or [])])
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ExplanationCache:
+    """
+    In-process LRU of explanations with a per-key similarity fallback.
+
+    Entries are dicts with text, model_version, source_ids and the question
+    they answered; lookup() adds 'match' ("exact" or "similar") and
+    'similarity'.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, similarity: Optional[float] = None,
+                 embedder=None):
+        self.max_entries = max_entries
+        self.similarity = similarity if similarity is not None else settings.EXPLANATION_CACHE_SIMILARITY
+        self._embedder = embedder
+        # key -> question text (normalized) -> entry; order of `_lru` drives eviction
+        self._groups: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lru: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {"exact": 0, "similar": 0, "miss": 0}
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = get_cached_embedder()
+        return self._embedder
+
+    def _count(self, result: str) -> None:
+        self.counts[result] += 1
+        if is_enabled():
+            EXPLANATION_CACHE_LOOKUPS.inc(result=result)
+
+    def _touch(self, key: str, question: str) -> None:
+        self._lru[(key, question)] = None
+        self._lru.move_to_end((key, question))
+        while len(self._lru) > self.max_entries:
+            old_key, old_question = self._lru.popitem(last=False)[0]
+            group = self._groups.get(old_key)
+            if group is not None:
+                group.pop(old_question, None)
+                if not group:
+                    del self._groups[old_key]
+
+    def lookup(self, rule_version: str, action_type: str, metrics: Dict[str, Any],
+               source_ids: Optional[Iterable[str]] = None, question: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Find a cached explanation.
+
+        Args:
+            rule_version: PlanGenerator.RULE_VERSION the action came from
+            action_type: Action type (emergency_fund, high_interest_debt, ...)
+            metrics: analysis['metrics'] for the user
+            source_ids: IDs of the passages retrieved for grounding
+            question: User's free-text question ("" for the default "Why this?")
+
+        Returns:
+            Entry dict, or None on a miss
+        """
+        key = explanation_key(rule_version, action_type, metrics, source_ids)
+        normalized = normalize_text(question)
+
+        with self._lock:
+            group = self._groups.get(key)
+            entry = group.get(normalized) if group else None
+            if entry is not None:
+                self._touch(key, normalized)
+                self._count("exact")
+                return _public(entry, "exact", 1.0)
+            candidates = [e for e in group.values() if e["vector"] is not None] if group and normalized else []
+
+        if candidates:
+            query = self.embedder.encode([normalized])[0]
+            scores = np.vstack([e["vector"] for e in candidates]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity:
+                entry = candidates[best]
+                with self._lock:
+                    self._touch(key, entry["question"])
+                self._count("similar")
+                return _public(entry, "similar", float(scores[best]))
+
+        self._count("miss")
+        return None
+
+    def store(self, rule_version: str, action_type: str, metrics: Dict[str, Any],
+              source_ids: Optional[Iterable[str]], question: str, text: str,
+              model_version: Optional[str] = None) -> None:
+        """Cache an explanation generated for (key, question)."""
+        key = explanation_key(rule_version, action_type, metrics, source_ids)
+        normalized = normalize_text(question)
+        vector = self.embedder.encode([normalized])[0] if normalized else None
+        entry = {
+            "text": text,
+            "model_version": model_version,
+            "source_ids": sorted(source_ids or []),
+            "question": normalized,
+            "vector": vector,
+        }
+        with self._lock:
+            self._groups.setdefault(key, {})[normalized] = entry
+            self._touch(key, normalized)
+
+    def get_or_generate(self, rule_version: str, action_type: str, metrics: Dict[str, Any],
+                        source_ids: Optional[List[str]], question: str,
+                        generate: Callable[[], Tuple[str, Optional[str]]]) -> Dict[str, Any]:
+        """
+        Cached explanation, calling generate() (the LLM) only on a miss.
+
+        Args:
+            generate: Returns (text, model_version)
+
+        Returns:
+            Entry dict; 'match' is "generated" when generate() ran
+        """
+        hit = self.lookup(rule_version, action_type, metrics, source_ids, question)
+        if hit is not None:
+            return hit
+        text, model_version = generate()
+        self.store(rule_version, action_type, metrics, source_ids, question, text, model_version)
+        return {"text": text, "model_version": model_version, "source_ids": sorted(source_ids or []),
+                "question": normalize_text(question), "match": "generated", "similarity": None}
+
+    def stats(self) -> Dict[str, float]:
+        lookups = sum(self.counts.values())
+        hits = self.counts["exact"] + self.counts["similar"]
+        return {**self.counts, "entries": len(self._lru), "hit_rate": hits / lookups if lookups else 0.0}
+
+
+def _public(entry: Dict[str, Any], match: str, similarity: float) -> Dict[str, Any]:
+    return {**{k: v for k, v in entry.items() if k != "vector"}, "match": match, "similarity": similarity}
+
+
+_cache: Optional[ExplanationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_explanation_cache() -> ExplanationCache:
+    """Process-shared explanation cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExplanationCache()
+    return _cache
@@ -0,0 +1,86 @@
+"""
+Hybrid retrieval: BM25 and vector search fused by reciprocal-rank fusion.
+
+Each retriever returns its top `candidates` rows; a row's fused score is
+
+    sum over retrievers of 1 / (RRF_K + rank)
+
+so a chunk ranked well by either exact terms or meaning surfaces, and
+ranks (not raw scores, which live on different scales) are combined.
+Falls back to vector-only when a version has no BM25 arrays.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.rag.bm25 import get_bm25
+from services.rag.embedding_cache import get_cached_embedder
+from services.rag.vector_index import VectorIndex, get_current_index, top_k
+
+RRF_K = 60
+CANDIDATES = 50
+
+
+def rrf_fuse(rankings: List[np.ndarray], rrf_k: int = RRF_K) -> Dict[int, float]:
+    """
+    Reciprocal-rank fusion of ranked row lists (best first).
+
+    Returns:
+        Row -> fused score
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking.tolist(), start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (rrf_k + rank)
+    return fused
+
+
+def hybrid_search(index: VectorIndex, query: str, query_vector: np.ndarray, k: int = 5,
+                  candidates: int = CANDIDATES, rrf_k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Top-k rows of index for query by fused BM25 + vector rank.
+
+    Args:
+        index: Vector index version to search
+        query: Query text (for BM25)
+        query_vector: Query embedding (for cosine scores)
+        k: Results to return
+        candidates: Rows taken from each retriever before fusion
+
+    Returns:
+        Metadata dicts with 'score' (fused), 'vector_rank' and 'bm25_rank'
+        (None when the row was not in that retriever's candidates)
+    """
+    vector_ranking = np.array([row for row, _ in index.search(query_vector, candidates)], dtype=np.int64)
+    rankings = [vector_ranking]
+
+    bm25 = get_bm25(str(index.path))
+    bm25_ranking = np.empty(0, dtype=np.int64)
+    if bm25 is not None:
+        bm25_scores = bm25.scores(query)
+        bm25_ranking = top_k(bm25_scores, candidates)
+        bm25_ranking = bm25_ranking[bm25_scores[bm25_ranking] > 0]
+        rankings.append(bm25_ranking)
+
+    fused = rrf_fuse(rankings, rrf_k)
+    vector_rank = {row: rank for rank, row in enumerate(vector_ranking.tolist(), start=1)}
+    bm25_rank = {row: rank for rank, row in enumerate(bm25_ranking.tolist(), start=1)}
+    best = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+    return [
+        {**index.metadata[row], "score": score, "vector_rank": vector_rank.get(row), "bm25_rank": bm25_rank.get(row)}
+        for row, score in best
+    ]
+
+
+def search(query: str, k: int = 5, root: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Hybrid search over the published index (settings.RAG_INDEX_DIR by default).
+
+    Returns:
+        Top-k metadata dicts, or [] when no index is published
+    """
+    index = get_current_index(root)
+    if index is None:
+        return []
+    embedder = get_cached_embedder(index.manifest.get("model"))
+    return hybrid_search(index, query, embedder.encode([query])[0], k)
@@ -0,0 +1,236 @@
+"""
+Incremental ingestion of markdown playbooks into the vector index.
+
+Pipeline: stream each docs/*.md file -> split on heading structure ->
+content-hash every chunk -> reuse vectors for hashes already in the live
+index -> embed only new/changed chunks in batches -> write a new index
+version (vectors + BM25 arrays) -> atomically publish it.
+
+A one-paragraph edit changes one chunk hash, so re-indexing embeds one
+chunk and copies the rest from the memory-mapped previous version.
+
+Usage:
+    python -m services.rag.ingest                  # docs/*.md, incremental
+    python -m services.rag.ingest --full           # re-embed everything
+    python -m services.rag.ingest docs/saving-framework.md docs/rule-engine.md
+"""
+import argparse
+import hashlib
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from config import settings
+from services.rag.bm25 import BM25Index, get_bm25, row_texts
+from services.rag.embedding_cache import get_cached_embedder
+from services.rag.embeddings import encode_batched
+from services.rag.vector_index import (
+    VectorIndex, get_current_index, publish_version, version_path
+)
+
+DEFAULT_SOURCES = "docs/*.md"
+MAX_CHUNK_CHARS = 1500
+EMBED_BATCH_SIZE = 64
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def _slug(text: str) -> str:
+    return _SLUG.sub("-", text.lower()).strip("-")[:60] or "section"
+
+
+def content_hash(heading_path: str, text: str) -> str:
+    """Stable hash of a chunk's heading path and body."""
+    return hashlib.sha256(f"{heading_path}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split a section on blank lines into pieces of at most ~max_chars."""
+    if len(text) <= max_chars:
+        return [text]
+    pieces, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            pieces.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_markdown(lines: Iterable[str], source: str, max_chars: int = MAX_CHUNK_CHARS) -> Iterator[Dict[str, Any]]:
+    """
+    Split a markdown stream into heading-scoped chunks.
+
+    Headings inside fenced code blocks are ignored. Sections longer than
+    max_chars are split on paragraph boundaries.
+
+    Args:
+        lines: Lines of the document (e.g. an open file)
+        source: Document path recorded on each chunk
+
+    Yields:
+        Chunk dicts with id, source, heading, text and hash
+    """
+    stack: List[str] = []
+    body: List[str] = []
+    in_fence = False
+    seen_ids: Dict[str, int] = {}
+
+    def flush():
+        text = "".join(body).strip()
+        body.clear()
+        if not text:
+            return
+        heading = " > ".join(stack)
+        for part, piece in enumerate(_split_long(text, max_chars)):
+            base_id = f"{source}#{_slug(heading)}" + (f"-{part}" if part else "")
+            n = seen_ids.get(base_id, 0)
+            seen_ids[base_id] = n + 1
+            yield {
+                "id": base_id if n == 0 else f"{base_id}~{n}",
+                "source": source,
+                "heading": heading,
+                "text": piece,
+                "hash": content_hash(heading, piece),
+            }
+
+    for line in lines:
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match:
+            yield from flush()
+            level = len(match.group(1))
+            del stack[level - 1:]
+            stack.extend([""] * (level - 1 - len(stack)))
+            stack.append(match.group(2))
+        else:
+            body.append(line)
+    yield from flush()
+
+
+def iter_chunks(paths: Iterable[Path], base: Path) -> Iterator[Dict[str, Any]]:
+    """Stream chunks from every file, one open file at a time."""
+    for path in paths:
+        source = str(path.resolve().relative_to(base)) if path.resolve().is_relative_to(base) else str(path)
+        with open(path, encoding="utf-8") as f:
+            yield from split_markdown(f, source)
+
+
+def _embedding_text(chunk: Dict[str, Any]) -> str:
+    return f"{chunk['heading']}\n\n{chunk['text']}" if chunk["heading"] else chunk["text"]
+
+
+def ingest(paths: List[Path], root: Optional[str] = None, model: Optional[str] = None,
+           full: bool = False, batch_size: int = EMBED_BATCH_SIZE,
+           dtype: str = "float16", quantization: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build and publish a new index version for paths.
+
+    Args:
+        paths: Markdown files to index
+        root: Index root (settings.RAG_INDEX_DIR by default)
+        model: Embedding model name (settings.EMBEDDING_MODEL by default)
+        full: Ignore the live version and re-embed every chunk (vectors
+            still come from the embedding cache when present)
+        batch_size: Texts per embedding call
+        dtype: Vector storage dtype
+        quantization: "int8", "binary" or "none" (float vectors only);
+            None uses settings.RAG_INDEX_QUANTIZATION
+
+    Returns:
+        Stats dict: version, chunks, reused, embedded, seconds (version is
+        None when nothing changed and no new version was written)
+    """
+    started = time.perf_counter()
+    root = root or settings.RAG_INDEX_DIR
+    if quantization is None:
+        quantization = settings.RAG_INDEX_QUANTIZATION
+    if quantization == "none":
+        quantization = None
+    embedder = get_cached_embedder(model)
+    base = Path.cwd().resolve()
+
+    chunks = list(iter_chunks(paths, base))
+
+    # Vectors from the live version, by content hash
+    previous_rows: Dict[str, int] = {}
+    previous = None if full else get_current_index(root)
+    if previous is not None and previous.manifest.get("model") == embedder.name:
+        previous_rows = {meta["hash"]: row for row, meta in enumerate(previous.metadata)}
+
+    # Nothing to do only if the live version has these chunks, built the same way
+    if previous is not None and previous.manifest.get("model") == embedder.name \
+            and previous.manifest.get("dtype") == dtype \
+            and previous.manifest.get("quantization") == quantization \
+            and [c["hash"] for c in chunks] == [m["hash"] for m in previous.metadata] \
+            and [c["id"] for c in chunks] == [m["id"] for m in previous.metadata] \
+            and get_bm25(str(previous.path)) is not None:
+        return {"version": None, "chunks": len(chunks), "reused": len(chunks), "embedded": 0,
+                "seconds": time.perf_counter() - started}
+
+    to_embed = [i for i, c in enumerate(chunks) if c["hash"] not in previous_rows]
+    fresh = encode_batched(embedder, [_embedding_text(chunks[i]) for i in to_embed], batch_size)
+
+    dim = fresh.shape[1] if len(to_embed) else (previous.dim if previous is not None else embedder.dim)
+    vectors = np.empty((len(chunks), dim), dtype=np.float32)
+    if len(to_embed):
+        vectors[to_embed] = fresh
+    reused = [i for i, c in enumerate(chunks) if c["hash"] in previous_rows]
+    if reused:
+        vectors[reused] = np.asarray(previous.vectors[[previous_rows[chunks[i]["hash"]] for i in reused]],
+                                     dtype=np.float32)
+
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    VectorIndex.build(str(version_path(root, version)), vectors, chunks, dtype=dtype, model=embedder.name,
+                      quantization=quantization)
+    BM25Index.build(str(version_path(root, version)), row_texts(chunks))
+    publish_version(root, version)
+
+    return {
+        "version": version,
+        "chunks": len(chunks),
+        "reused": len(reused),
+        "embedded": len(to_embed),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help=f"markdown files (default: {DEFAULT_SOURCES})")
+    parser.add_argument("--root", default=None, help="index root (default: settings.RAG_INDEX_DIR)")
+    parser.add_argument("--model", default=None, help="embedding model (default: settings.EMBEDDING_MODEL)")
+    parser.add_argument("--full", action="store_true", help="re-embed every chunk")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--quantization", choices=["none", "int8", "binary"], default=None,
+                        help="compact first-pass copy, or none (default: settings.RAG_INDEX_QUANTIZATION)")
+    args = parser.parse_args(argv)
+
+    paths = [Path(p) for p in args.paths] or sorted(Path.cwd().glob(DEFAULT_SOURCES))
+    if not paths:
+        print("No markdown files to ingest")
+        return 1
+
+    stats = ingest(paths, root=args.root, model=args.model, full=args.full, batch_size=args.batch_size,
+                   quantization=args.quantization)
+    if stats["version"] is None:
+        print(f"Index up to date ({stats['chunks']} chunks, {stats['seconds']:.2f}s)")
+    else:
+        print(f"Published version {stats['version']}: {stats['chunks']} chunks, "
+              f"{stats['embedded']} embedded, {stats['reused']} reused in {stats['seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
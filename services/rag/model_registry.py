@@ -0,0 +1,231 @@
+"""
+Process-wide registry of heavyweight models (sentence-transformers
+embedders, and any reranker registered later).
+
+- warm_up() starts loading on a daemon thread at process start, so the
+  first "Why this?" does not pay the multi-second import + load
+- get() returns the single shared instance, waiting for an in-progress
+  load instead of starting a second one
+- status() exposes per-model readiness for the UI
+- models idle for MODEL_IDLE_UNLOAD_SECONDS are dropped to reclaim
+  memory; the next get() reloads them
+- the time from process start to the first model-backed response is
+  logged and recorded in utils.metrics (once per process)
+"""
+import gc
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from config import settings
+from utils.metrics import FIRST_RESPONSE_SECONDS, MODEL_LOAD_SECONDS, is_enabled
+
+logger = logging.getLogger(__name__)
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+def _process_start_time() -> float:
+    try:
+        import psutil
+        return psutil.Process().create_time()
+    except ImportError:
+        return time.time()
+
+
+PROCESS_STARTED = _process_start_time()
+
+
+class _Entry:
+    __slots__ = ("name", "loader", "instance", "state", "error", "load_seconds", "last_used", "loaded")
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.instance = None
+        self.state = NOT_LOADED
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.last_used = 0.0
+        self.loaded = threading.Event()
+
+
+class ModelRegistry:
+    """Named model loaders with one shared instance each."""
+
+    def __init__(self, idle_unload_seconds: Optional[float] = None):
+        self.idle_unload_seconds = (idle_unload_seconds if idle_unload_seconds is not None
+                                    else settings.MODEL_IDLE_UNLOAD_SECONDS)
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self.first_response_seconds: Optional[float] = None
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Register a loader under name (no-op if already registered)."""
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(name, loader)
+
+    def _load(self, entry: _Entry) -> None:
+        started = time.perf_counter()
+        try:
+            instance = entry.loader()
+        except Exception as e:
+            with self._lock:
+                entry.state, entry.error = FAILED, f"{type(e).__name__}: {e}"
+            logger.error("Loading model %s failed: %s", entry.name, e)
+        else:
+            with self._lock:
+                entry.instance, entry.state, entry.error = instance, READY, None
+                entry.load_seconds = time.perf_counter() - started
+                entry.last_used = time.monotonic()
+            logger.info("Loaded model %s in %.2fs", entry.name, entry.load_seconds)
+            if is_enabled():
+                MODEL_LOAD_SECONDS.observe(entry.load_seconds, model=entry.name)
+        finally:
+            entry.loaded.set()
+
+    def _claim(self, entry: _Entry) -> bool:
+        """Mark entry as loading; False if another thread already is (or it is loaded)."""
+        with self._lock:
+            if entry.state in (LOADING, READY):
+                return False
+            entry.state = LOADING
+            entry.loaded.clear()
+            return True
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        """Load names (default: all registered) on a background thread."""
+        with self._lock:
+            entries = [self._entries[n] for n in (names if names is not None else list(self._entries))]
+        pending = [e for e in entries if self._claim(e)]
+        if pending:
+            threading.Thread(target=lambda: [self._load(e) for e in pending],
+                             name="model-warmup", daemon=True).start()
+        self._start_reaper()
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Shared instance of name, loading it in this thread if nobody else is.
+
+        Raises:
+            KeyError: If name is not registered
+            RuntimeError: If loading failed or did not finish within timeout
+        """
+        entry = self._entries[name]
+        # Second pass covers an idle unload racing with this call
+        for _ in range(2):
+            if entry.state != READY:
+                if self._claim(entry):
+                    self._load(entry)
+                elif not entry.loaded.wait(timeout):
+                    raise RuntimeError(f"Model {name} is still loading")
+            with self._lock:
+                if entry.state == READY:
+                    entry.last_used = time.monotonic()
+                    return entry.instance
+                if entry.state == FAILED:
+                    break
+        raise RuntimeError(f"Model {name} is unavailable: {entry.error}")
+
+    def is_ready(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.state == READY
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model state (not_loaded, loading, ready, failed), load time and error."""
+        with self._lock:
+            return {
+                name: {"state": e.state, "load_seconds": e.load_seconds, "error": e.error}
+                for name, e in self._entries.items()
+            }
+
+    def unload(self, name: str) -> bool:
+        """Drop the loaded instance of name; returns whether anything was unloaded."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.state != READY:
+                return False
+            entry.instance, entry.state = None, NOT_LOADED
+        gc.collect()
+        logger.info("Unloaded idle model %s", name)
+        return True
+
+    def unload_idle(self) -> int:
+        """Unload models unused for idle_unload_seconds; returns how many were unloaded."""
+        if not self.idle_unload_seconds:
+            return 0
+        cutoff = time.monotonic() - self.idle_unload_seconds
+        with self._lock:
+            idle = [n for n, e in self._entries.items() if e.state == READY and e.last_used < cutoff]
+        return sum(self.unload(n) for n in idle)
+
+    def _start_reaper(self) -> None:
+        if not self.idle_unload_seconds or self._reaper is not None:
+            return
+        interval = max(1.0, self.idle_unload_seconds / 4)
+
+        def reap():
+            while True:
+                time.sleep(interval)
+                self.unload_idle()
+
+        self._reaper = threading.Thread(target=reap, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def mark_first_response(self) -> None:
+        """Record process start -> first model-backed response (first call only)."""
+        if self.first_response_seconds is not None:
+            return
+        self.first_response_seconds = time.time() - PROCESS_STARTED
+        logger.info("Startup to first response: %.2fs", self.first_response_seconds)
+        if is_enabled():
+            FIRST_RESPONSE_SECONDS.observe(self.first_response_seconds)
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Process-shared model registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
+
+
+_warmup_started = False
+
+
+def start_warmup() -> None:
+    """
+    Register the configured models and start loading them in the background.
+
+    Runs once per process (later calls are no-ops, so an idle unload is not
+    undone by the next page run). Skipped unless explanations are enabled.
+    """
+    global _warmup_started
+    if _warmup_started or not (settings.LLM_ENABLED and settings.MODEL_WARMUP_ENABLED):
+        return
+    with _registry_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+
+    from services.rag.embeddings import get_embedder
+    embedder = get_embedder()
+    names = [embedder.registry_name] if hasattr(embedder, "registry_name") else []
+    get_registry().warm_up(names)
+
+
+def is_loading() -> bool:
+    """Whether any registered model is still loading (for readiness hints in the UI)."""
+    return any(s["state"] == LOADING for s in get_registry().status().values())
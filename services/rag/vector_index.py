@@ -0,0 +1,390 @@
+"""
+Memory-mapped embedding index with exact top-k search.
+
+The corpus is small (playbooks and help docs), so brute force is both exact
+and fast: one matrix-vector product over L2-normalized rows gives cosine
+scores. Layout on disk (one directory per index):
+
+    manifest.json   dim, count, dtype, model name
+    vectors.npy     (count, dim) float32 or float16, rows L2-normalized
+    metadata.jsonl  one JSON object per row (id, source, text, ...)
+
+vectors.npy is opened with np.load(mmap_mode="r"), so opening costs a
+header read, every worker process maps the same page-cache pages instead of
+holding a private copy, and only touched pages are ever read from disk.
+float16 halves the mapped size at the cost of a blockwise upcast per query;
+float32 scores straight through BLAS and is the faster choice when memory
+allows.
+
+Quantized indexes add a compact copy used for a first pass over every row:
+
+    quantized.npy   int8 codes (count, dim), or packed sign bits (count, dim/8)
+    scales.npy      float32 per-row scale (int8 only): row ~= codes * scale
+
+search() scores all rows on the compact copy, then rescores the best
+candidates exactly against vectors.npy. Only the candidate rows of the
+full-precision file are ever paged in, so a worker's resident index is
+~1/4 (int8) or ~1/32 (binary) of float32.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+
+MANIFEST = "manifest.json"
+VECTORS = "vectors.npy"
+METADATA = "metadata.jsonl"
+QUANTIZED = "quantized.npy"
+SCALES = "scales.npy"
+
+QUANTIZATIONS = ("int8", "binary")
+# Candidates rescored exactly per requested result; binary codes are much
+# coarser than int8 and need a wider net for the same recall
+RESCORE_FACTOR = {"int8": 4, "binary": 20}
+MIN_RESCORE = 32
+
+# Rows converted to float32 per block when scoring float16 storage; bounds
+# the temporary copy to ~BLOCK_ROWS * dim * 4 bytes
+BLOCK_ROWS = 16384
+
+
+# Set-bit count of every byte value, for Hamming distance on packed codes
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+def quantize_int8(vectors: np.ndarray):
+    """
+    Symmetric per-row int8 quantization.
+
+    Returns:
+        (codes int8 (count, dim), scales float32 (count,)) with row ~= codes * scale
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Sign bits of each row packed 8 per byte: (count, ceil(dim / 8)) uint8."""
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (zero rows stay zero)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """Read-only exact cosine-similarity index over a memory-mapped matrix."""
+
+    def __init__(self, path: Path, manifest: Dict[str, Any], vectors: np.ndarray,
+                 quantized: Optional[np.ndarray] = None, scales: Optional[np.ndarray] = None):
+        self.path = path
+        self.manifest = manifest
+        self.vectors = vectors
+        self.quantized = quantized
+        self.scales = scales
+        self._metadata: Optional[List[Dict[str, Any]]] = None
+        self._metadata_lock = threading.Lock()
+
+    @property
+    def dim(self) -> int:
+        return self.manifest["dim"]
+
+    def __len__(self) -> int:
+        return self.manifest["count"]
+
+    @property
+    def quantization(self) -> Optional[str]:
+        return self.manifest.get("quantization")
+
+    @property
+    def metadata(self) -> List[Dict[str, Any]]:
+        """Row metadata, read from the sidecar file on first access."""
+        if self._metadata is None:
+            with self._metadata_lock:
+                if self._metadata is None:
+                    with open(self.path / METADATA, encoding="utf-8") as f:
+                        self._metadata = [json.loads(line) for line in f]
+        return self._metadata
+
+    @staticmethod
+    def build(path: str, embeddings: np.ndarray, metadata: Sequence[Dict[str, Any]],
+              dtype: str = "float16", model: Optional[str] = None,
+              quantization: Optional[str] = None) -> "VectorIndex":
+        """
+        Write a new index directory and open it.
+
+        Files are written under temporary names and renamed into place, so a
+        reader never sees a half-written index.
+
+        Args:
+            path: Index directory (created if missing)
+            embeddings: (count, dim) array; rows are normalized here
+            metadata: One dict per row
+            dtype: Storage dtype, "float16" (half the pages) or "float32"
+            model: Embedding model name, recorded for compatibility checks
+            quantization: None, "int8" or "binary" - add a compact copy for
+                the first search pass (vectors stay at dtype for rescoring)
+
+        Returns:
+            The opened index
+        """
+        embeddings = np.asarray(embeddings)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(metadata):
+            raise ValueError("embeddings must be (count, dim) with one metadata row per vector")
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unsupported quantization: {quantization}")
+
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        normalized = normalize_rows(embeddings)
+        vectors = normalized.astype(dtype)
+        manifest = {
+            "dim": int(vectors.shape[1]),
+            "count": int(vectors.shape[0]),
+            "dtype": dtype,
+            "model": model,
+            "quantization": quantization,
+        }
+
+        if quantization == "int8":
+            codes, scales = quantize_int8(normalized)
+            _save_atomic(directory / QUANTIZED, codes)
+            _save_atomic(directory / SCALES, scales)
+        elif quantization == "binary":
+            _save_atomic(directory / QUANTIZED, quantize_binary(normalized))
+
+        tmp_vectors = directory / (VECTORS + ".tmp")
+        with open(tmp_vectors, "wb") as f:
+            np.save(f, vectors)
+        _write_atomic(directory / METADATA, "".join(json.dumps(m, ensure_ascii=False) + "\n" for m in metadata))
+        os.replace(tmp_vectors, directory / VECTORS)
+        # Manifest last: its presence marks a complete index
+        _write_atomic(directory / MANIFEST, json.dumps(manifest, indent=2))
+
+        return VectorIndex.open(path)
+
+    @staticmethod
+    def open(path: str) -> "VectorIndex":
+        """
+        Open an index directory with the vectors memory-mapped read-only.
+
+        Raises:
+            FileNotFoundError: If the directory holds no complete index
+        """
+        directory = Path(path)
+        with open(directory / MANIFEST, encoding="utf-8") as f:
+            manifest = json.load(f)
+        vectors = np.load(directory / VECTORS, mmap_mode="r")
+        if vectors.shape != (manifest["count"], manifest["dim"]):
+            raise ValueError(f"Index at {path} is inconsistent with its manifest")
+        quantized = scales = None
+        if manifest.get("quantization"):
+            quantized = np.load(directory / QUANTIZED, mmap_mode="r")
+            if manifest["quantization"] == "int8":
+                scales = np.load(directory / SCALES, mmap_mode="r")
+        return VectorIndex(directory, manifest, vectors, quantized, scales)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of query against every row (float32)."""
+        q = normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        if q.shape[0] != self.dim:
+            raise ValueError(f"Query has dim {q.shape[0]}, index has {self.dim}")
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ q
+
+        # float16 has no BLAS path: upcast block by block
+        out = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+            out[start:start + BLOCK_ROWS] = block @ q
+        return out
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """
+        First-pass scores from the quantized copy (same ranking scale as cosine).
+
+        int8: dot product with the dequantized rows. binary: dim - 2 * Hamming
+        distance between sign bits.
+        """
+        q = normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        if self.quantization == "binary":
+            q_bits = quantize_binary(q.reshape(1, -1))[0]
+            out = np.empty(len(self), dtype=np.float32)
+            for start in range(0, len(self), BLOCK_ROWS):
+                block = np.asarray(self.quantized[start:start + BLOCK_ROWS])
+                hamming = _POPCOUNT[np.bitwise_xor(block, q_bits)].sum(axis=1)
+                out[start:start + BLOCK_ROWS] = self.dim - 2.0 * hamming
+            return out
+
+        out = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = np.asarray(self.quantized[start:start + BLOCK_ROWS], dtype=np.float32)
+            out[start:start + BLOCK_ROWS] = (block @ q) * self.scales[start:start + BLOCK_ROWS]
+        return out
+
+    def search(self, query: np.ndarray, k: int = 5, rescore: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k search: exact, or quantized first pass + exact rescoring.
+
+        Args:
+            query: Query embedding (normalized here)
+            k: Number of results
+            rescore: Candidates rescored exactly on a quantized index
+                (default: RESCORE_FACTOR[quantization] * k, at least MIN_RESCORE)
+
+        Returns:
+            List of (row index, cosine score), best first
+        """
+        if self.quantization is None:
+            scores = self.scores(query)
+            return [(int(i), float(scores[i])) for i in top_k(scores, k)]
+
+        if rescore is None:
+            rescore = max(RESCORE_FACTOR[self.quantization] * k, MIN_RESCORE)
+        # Ascending row order keeps reads of the full-precision file sequential
+        candidates = np.sort(top_k(self.approximate_scores(query), max(rescore, k)))
+        q = normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        exact = np.asarray(self.vectors[candidates], dtype=np.float32) @ q
+        return [(int(candidates[i]), float(exact[i])) for i in top_k(exact, k)]
+
+    def search_with_metadata(self, query: np.ndarray, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k results as metadata dicts with a 'score' key added."""
+        return [{**self.metadata[i], "score": score} for i, score in self.search(query, k)]
+
+
+def _save_atomic(path: Path, array: np.ndarray) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+_open_indexes: Dict[str, VectorIndex] = {}
+_open_lock = threading.Lock()
+
+
+def get_index(path: str) -> VectorIndex:
+    """
+    Shared per-process handle on the index at path.
+
+    Streamlit sessions in one process reuse the same mapping; separate
+    processes share the underlying page cache.
+    """
+    key = str(Path(path).resolve())
+    index = _open_indexes.get(key)
+    if index is None:
+        with _open_lock:
+            index = _open_indexes.get(key)
+            if index is None:
+                index = _open_indexes[key] = VectorIndex.open(path)
+    return index
+
+
+def reset_index_cache(path: Optional[str] = None) -> None:
+    """Drop cached handles (all, or the one for path) so the next get_index() reopens."""
+    with _open_lock:
+        if path is None:
+            _open_indexes.clear()
+        else:
+            _open_indexes.pop(str(Path(path).resolve()), None)
+
+
+# ----------------------------------------------------------------------
+# Versioned index root
+#
+#   <root>/versions/<version>/   complete index directories
+#   <root>/CURRENT               name of the live version
+#
+# Writers build a new version directory, then publish it by atomically
+# replacing CURRENT; readers resolve CURRENT on each lookup, so a swap is
+# picked up on the next query without ever exposing a partial index.
+# ----------------------------------------------------------------------
+
+CURRENT = "CURRENT"
+VERSIONS = "versions"
+
+
+def current_version(root: str) -> Optional[str]:
+    """Name of the published version under root, or None if nothing is published."""
+    try:
+        with open(Path(root) / CURRENT, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_path(root: str, version: str) -> Path:
+    return Path(root) / VERSIONS / version
+
+
+def publish_version(root: str, version: str, keep: int = 2) -> None:
+    """
+    Atomically make version the live index and prune old versions.
+
+    Args:
+        root: Index root directory
+        version: Version directory name under <root>/versions
+        keep: Number of most recent versions to keep on disk (readers that
+            still map an older version keep working until they reopen)
+    """
+    if not (version_path(root, version) / MANIFEST).exists():
+        raise FileNotFoundError(f"Version {version} is not a complete index")
+    _write_atomic(Path(root) / CURRENT, version)
+
+    versions_dir = Path(root) / VERSIONS
+    ordered = sorted((p for p in versions_dir.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    for stale in ordered[:-keep] if keep > 0 else []:
+        if stale.name == version:
+            continue
+        for child in stale.iterdir():
+            child.unlink()
+        stale.rmdir()
+        reset_index_cache(str(stale))
+
+
+def get_current_index(root: str = None) -> Optional[VectorIndex]:
+    """
+    Shared handle on the published index under root (settings.RAG_INDEX_DIR by default).
+
+    Returns:
+        The live VectorIndex, or None if no version has been published
+    """
+    root = root or settings.RAG_INDEX_DIR
+    version = current_version(root)
+    if version is None:
+        return None
+    return get_index(str(version_path(root, version)))
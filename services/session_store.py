@@ -0,0 +1,529 @@
+"""
+Shared, server-side store for guest session data.
+
+st.session_state lives in one Streamlit process, so without this a guest
+must stick to one replica and loses everything on a restart. The store
+keeps each session's GuestData outside the process, one key per section
+(guest:<sid>:<section>), so:
+
+- any replica can serve the session (the sid travels in a cookie)
+- a page loads only the sections it reads (the dashboard never loads goals)
+- sections are serialized compactly: marshal of the records' astuple()
+  rows behind a 5-byte header (format version + schema CRC); values
+  written under another schema are ignored rather than misread
+- writes are write-behind: put() encodes on the caller's thread and
+  returns, a daemon thread writes the latest value per key every
+  SESSION_FLUSH_SECONDS, reads see pending writes, and what is left is
+  flushed at interpreter exit. A replica reading within that window sees
+  the previous value.
+- a session expires as a whole after SESSION_TTL_SECONDS without a load
+  or save: either one refreshes the expiry of all its sections (at most
+  every TTL/10, on the writer thread), so sections that have not changed
+  in a while do not expire before the ones still being edited
+
+Backends (SESSION_STORE):
+- memory: process-local dict (single replica; survives reconnects only)
+- sqlite: WAL-mode SQLite file shared by every process on the host
+- kv: a small networked key-value server; `python -m services.session_store
+  serve` runs one locally as a stand-in for a shared KV service
+
+Values are trusted (written by this app); never point the store at data
+other clients can write.
+"""
+import argparse
+import atexit
+import logging
+import marshal
+import socket
+import socketserver
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from config import settings
+from models.session import Analysis, Asset, Goal, Liability, Metrics, Scores, Snapshot, to_plain
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("snapshot", "assets", "liabilities", "goals", "plan", "analysis")
+_ROWS = {"assets": Asset, "liabilities": Liability, "goals": Goal}
+
+FORMAT_VERSION = 1
+# Changes whenever a record gains, loses or reorders a field
+SCHEMA = zlib.crc32(repr([cls._fields for cls in (Snapshot, Asset, Liability, Goal, Metrics, Scores, Analysis)])
+                    .encode("utf-8"))
+_HEADER = struct.Struct("!BI")
+
+
+# -- serialization -----------------------------------------------------
+
+def encode_section(section: str, value: Any) -> bytes:
+    """
+    Serialize one GuestData section.
+
+    Args:
+        section: One of SECTIONS
+        value: The section's value (records, lists of records, plan dict)
+
+    Returns:
+        Header + marshal payload
+    """
+    if section == "snapshot":
+        payload = value.astuple()
+    elif section in _ROWS:
+        payload = tuple(row.astuple() for row in value)
+    elif section == "analysis":
+        payload = None if value is None else (value["metrics"].astuple(), value["scores"].astuple(),
+                                              value.get("version"))
+    else:
+        payload = to_plain(value)
+    return _HEADER.pack(FORMAT_VERSION, SCHEMA) + marshal.dumps(payload)
+
+
+def decode_section(section: str, data: bytes) -> Any:
+    """
+    Inverse of encode_section().
+
+    Raises:
+        ValueError: data was written by another format version or schema
+    """
+    version, schema = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION or schema != SCHEMA:
+        raise ValueError(f"session section {section!r} has format {version}/{schema:08x}")
+    payload = marshal.loads(data[_HEADER.size:])
+    if section == "snapshot":
+        return Snapshot.fromtuple(payload)
+    if section in _ROWS:
+        record = _ROWS[section]
+        return [record.fromtuple(row) for row in payload]
+    if section == "analysis":
+        if payload is None:
+            return None
+        metrics, scores, version = payload
+        return Analysis(metrics=Metrics.fromtuple(metrics), scores=Scores.fromtuple(scores), version=version)
+    return payload
+
+
+def section_hash(section: str, value: Any) -> int:
+    """Structural hash of a section, to skip writing unchanged sections."""
+    if section == "plan":
+        return hash(encode_section(section, value))
+    if section in _ROWS:
+        return hash(tuple(value))
+    return hash(value)
+
+
+# -- backends ----------------------------------------------------------
+#
+# Each backend stores bytes under string keys with a TTL and implements
+# get_many(keys) -> {key: value}, set_many({key: value}, ttl),
+# touch(keys, ttl) (new expiry for the keys that exist), delete(keys)
+# and close().
+
+class MemoryBackend:
+    """Process-local dict with expiry."""
+
+    SWEEP_EVERY = 1024  # writes between sweeps of expired keys
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        now = time.time()
+        with self._lock:
+            found = {key: self._data.get(key) for key in keys}
+        return {key: entry[1] for key, entry in found.items() if entry and entry[0] > now}
+
+    def set_many(self, items: Dict[str, bytes], ttl: float) -> None:
+        expires = time.time() + ttl
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (expires, value)
+            self._writes += len(items)
+            if self._writes >= self.SWEEP_EVERY:
+                self._writes = 0
+                now = time.time()
+                for key in [key for key, (exp, _) in self._data.items() if exp <= now]:
+                    del self._data[key]
+
+    def touch(self, keys: Sequence[str], ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry and entry[0] > now:
+                    self._data[key] = (now + ttl, entry[1])
+
+    def delete(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    """WAL-mode SQLite file, shared by all processes on the host."""
+
+    SWEEP_EVERY = 1024
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.SESSION_STORE_PATH
+        self._local = threading.local()
+        self._writes = 0
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+        rows = self._connection().execute(
+            f"SELECT key, value FROM sessions WHERE key IN ({','.join('?' * len(keys))}) AND expires > ?",
+            [*keys, time.time()],
+        )
+        return dict(rows)
+
+    def set_many(self, items: Dict[str, bytes], ttl: float) -> None:
+        expires = time.time() + ttl
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany("INSERT OR REPLACE INTO sessions (key, value, expires) VALUES (?, ?, ?)",
+                             [(key, value, expires) for key, value in items.items()])
+        self._writes += len(items)
+        if self._writes >= self.SWEEP_EVERY:
+            self._writes = 0
+            conn.execute("DELETE FROM sessions WHERE expires <= ?", (time.time(),))
+
+    def touch(self, keys: Sequence[str], ttl: float) -> None:
+        now = time.time()
+        self._connection().executemany("UPDATE sessions SET expires = ? WHERE key = ? AND expires > ?",
+                                       [(now + ttl, key, now) for key in keys])
+
+    def delete(self, keys: Sequence[str]) -> None:
+        self._connection().executemany("DELETE FROM sessions WHERE key = ?", [(key,) for key in keys])
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Wire format: request = header (op, key length, value length, ttl) + key + value;
+# reply = (found, value length) + value. Requests are pipelined.
+_REQUEST = struct.Struct("!cHII")
+_REPLY = struct.Struct("!BI")
+_GET, _SET, _TOUCH, _DEL = b"G", b"S", b"T", b"D"
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        buf += chunk
+    return bytes(buf)
+
+
+class KVBackend:
+    """Client for the KV server below; one connection per thread, pipelined requests."""
+
+    def __init__(self, address: Optional[str] = None, timeout: float = 5.0):
+        host, port = (address or settings.SESSION_STORE_KV_ADDRESS).rsplit(":", 1)
+        self.address = (host, int(port))
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _socket(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._local.sock = sock
+        return sock
+
+    def _roundtrip(self, requests: List[Tuple[bytes, str, bytes, int]]) -> List[Optional[bytes]]:
+        frames = b"".join(
+            _REQUEST.pack(op, len(key.encode()), len(value), ttl) + key.encode() + value
+            for op, key, value, ttl in requests
+        )
+        for attempt in range(2):
+            sock = self._socket()
+            try:
+                sock.sendall(frames)
+                replies = []
+                for _ in requests:
+                    found, size = _REPLY.unpack(_recv_exact(sock, _REPLY.size))
+                    value = _recv_exact(sock, size)
+                    replies.append(value if found else None)
+                return replies
+            except OSError:
+                # Stale connection (server restarted): reconnect once
+                self.close()
+                if attempt:
+                    raise
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+        replies = self._roundtrip([(_GET, key, b"", 0) for key in keys])
+        return {key: value for key, value in zip(keys, replies) if value is not None}
+
+    def set_many(self, items: Dict[str, bytes], ttl: float) -> None:
+        if items:
+            self._roundtrip([(_SET, key, value, int(ttl)) for key, value in items.items()])
+
+    def touch(self, keys: Sequence[str], ttl: float) -> None:
+        if keys:
+            self._roundtrip([(_TOUCH, key, b"", int(ttl)) for key in keys])
+
+    def delete(self, keys: Sequence[str]) -> None:
+        if keys:
+            self._roundtrip([(_DEL, key, b"", 0) for key in keys])
+
+    def close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+
+class KVServer(socketserver.ThreadingTCPServer):
+    """Networked KV server over a MemoryBackend (local stand-in for a shared KV service)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int]):
+        self.backend = MemoryBackend()
+        super().__init__(address, _KVHandler)
+
+
+class _KVHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        sock, backend = self.request, self.server.backend
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                op, key_size, value_size, ttl = _REQUEST.unpack(_recv_exact(sock, _REQUEST.size))
+                key = _recv_exact(sock, key_size).decode()
+                value = _recv_exact(sock, value_size)
+            except ConnectionError:
+                return
+            if op == _GET:
+                found = backend.get_many([key]).get(key)
+                reply = _REPLY.pack(1, len(found)) + found if found is not None else _REPLY.pack(0, 0)
+            elif op == _SET:
+                backend.set_many({key: value}, ttl)
+                reply = _REPLY.pack(1, 0)
+            elif op == _TOUCH:
+                backend.touch([key], ttl)
+                reply = _REPLY.pack(1, 0)
+            else:
+                backend.delete([key])
+                reply = _REPLY.pack(1, 0)
+            sock.sendall(reply)
+
+
+def make_backend(kind: Optional[str] = None):
+    """Backend for SESSION_STORE ("memory", "sqlite" or "kv")."""
+    kind = kind or settings.SESSION_STORE
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SQLiteBackend()
+    if kind == "kv":
+        return KVBackend()
+    raise ValueError(f"Unknown SESSION_STORE {kind!r} (expected memory, sqlite or kv)")
+
+
+# -- store -------------------------------------------------------------
+
+class SessionStore:
+    """Section-level reads and write-behind writes of GuestData over a backend."""
+
+    def __init__(self, backend=None, flush_seconds: Optional[float] = None, ttl_seconds: Optional[int] = None):
+        self.backend = backend if backend is not None else make_backend()
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.SESSION_FLUSH_SECONDS
+        self.ttl_seconds = ttl_seconds or settings.SESSION_TTL_SECONDS
+
+        self._pending: Dict[str, bytes] = {}  # key -> latest encoded value
+        self._touch: Set[str] = set()  # sids whose expiry the next flush refreshes
+        self._touched: Dict[str, float] = {}  # sid -> when its expiry was last queued for refresh
+        self._cond = threading.Condition()
+        # Held by flush() while it writes, so delete() cannot be undone by a batch in flight
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+
+        self._thread = threading.Thread(target=self._run, name="session-store-writer", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def key(sid: str, section: str) -> str:
+        return f"guest:{sid}:{section}"
+
+    def _keep_alive(self, sid: str) -> None:
+        """Queue a refresh of the session's expiry, unless one was queued recently (caller holds _cond)."""
+        now = time.monotonic()
+        if now - self._touched.get(sid, -self.ttl_seconds) >= self.ttl_seconds / 10:
+            self._touched[sid] = now
+            self._touch.add(sid)
+
+    def load(self, sid: str, sections: Iterable[str]) -> Dict[str, Any]:
+        """
+        Read sections of a session.
+
+        Args:
+            sid: Session ID
+            sections: Sections to read
+
+        Returns:
+            {section: value} for the sections that are stored (missing,
+            expired or unreadable sections are left out)
+        """
+        keys = {self.key(sid, section): section for section in sections}
+        with self._cond:
+            found = {key: self._pending[key] for key in keys if key in self._pending}
+            self._keep_alive(sid)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            try:
+                found.update(self.backend.get_many(missing))
+            except (OSError, sqlite3.Error) as e:
+                logger.error("Session store read failed: %s", e)
+
+        loaded = {}
+        for key, data in found.items():
+            section = keys[key]
+            try:
+                loaded[section] = decode_section(section, data)
+            except ValueError as e:
+                logger.warning("Ignoring stored %s: %s", key, e)
+        return loaded
+
+    def put(self, sid: str, section: str, value: Any) -> None:
+        """Queue one section; encodes now, written by the background thread."""
+        data = encode_section(section, value)
+        with self._cond:
+            self._pending[self.key(sid, section)] = data
+            self._keep_alive(sid)
+
+    def delete(self, sid: str) -> None:
+        """Drop all sections of a session (pending writes included)."""
+        keys = [self.key(sid, section) for section in SECTIONS]
+        # Waits for a flush in progress, which may still hold this session's keys
+        with self._write_lock:
+            with self._cond:
+                for key in keys:
+                    self._pending.pop(key, None)
+                self._touch.discard(sid)
+                self._touched.pop(sid, None)
+            self.backend.delete(keys)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait(self.flush_seconds)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self) -> None:
+        """Write everything pending, and refresh queued expiries, from the calling thread."""
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                touch, self._touch = self._touch, set()
+                if touch:
+                    # Forget sessions idle past the TTL (they have expired)
+                    horizon = time.monotonic() - self.ttl_seconds
+                    self._touched = {sid: at for sid, at in self._touched.items() if at > horizon}
+            if batch:
+                try:
+                    self.backend.set_many(batch, self.ttl_seconds)
+                    self.written += len(batch)
+                except (OSError, sqlite3.Error) as e:
+                    logger.error("Session store write of %d keys failed: %s", len(batch), e)
+                    with self._cond:
+                        # Keep them for the next flush unless newer values arrived meanwhile
+                        for key, value in batch.items():
+                            self._pending.setdefault(key, value)
+            if touch:
+                try:
+                    self.backend.touch([self.key(sid, section) for sid in touch for section in SECTIONS],
+                                       self.ttl_seconds)
+                except (OSError, sqlite3.Error) as e:
+                    logger.error("Session store expiry refresh of %d sessions failed: %s", len(touch), e)
+                    with self._cond:
+                        self._touch.update(touch)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush pending writes and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Process-shared store for SESSION_STORE, flushed at interpreter exit."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+                atexit.register(_store.close)
+    return _store
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Session store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the KV server (stand-in for a shared KV service)")
+    serve.add_argument("--address", default=None, help="host:port (default: SESSION_STORE_KV_ADDRESS)")
+    args = parser.parse_args(argv)
+
+    host, port = (args.address or settings.SESSION_STORE_KV_ADDRESS).rsplit(":", 1)
+    logging.basicConfig(level=logging.INFO)
+    with KVServer((host, int(port))) as server:
+        logger.info("Session KV server on %s:%s", host, port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
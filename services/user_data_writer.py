@@ -0,0 +1,210 @@
+"""
+Debounced, write-behind persistence of logged-in users' onboarding edits.
+
+Saving on every submit put a DB transaction (and a full rewrite of the
+user's rows) on the render thread for each click. Instead:
+
+- submit() records the latest value of a section (snapshot, assets,
+  liabilities, goals, plan) per user and returns immediately; a newer
+  value replaces a queued one
+- a daemon thread saves a user's queued sections in one transaction
+  (DataService.save_financial_data) once no edit has arrived for
+  USER_SAVE_QUIET_SECONDS, or USER_SAVE_MAX_DELAY_SECONDS after the
+  first unsaved edit if edits keep coming
+- flush_user() saves now: without wait at navigation, with wait=True at
+  logout, when the caller must know the data is stored
+- pending saves do not depend on the Streamlit session, so they still
+  happen after the browser goes away; what is left is flushed at
+  interpreter exit
+- a save that fails (e.g. DB unreachable) is retried after the quiet
+  period, keeping newer edits, at most USER_SAVE_MAX_ATTEMPTS times
+- if the database rejects the data (a constraint violation), the sections
+  are saved one transaction each instead: the valid ones are stored and
+  the rejected ones dropped, since retrying them cannot succeed
+"""
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from config import settings
+from services.data_service import REJECTED_DATA_ERRORS, DataService
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("snapshot", "assets", "liabilities", "goals", "plan")
+
+
+class UserDataWriter:
+    """Coalesces per-user saves and writes them from a background thread."""
+
+    def __init__(self, quiet_seconds: Optional[float] = None, max_delay_seconds: Optional[float] = None,
+                 max_attempts: Optional[int] = None, save: Optional[Callable[..., bool]] = None):
+        self.quiet_seconds = quiet_seconds if quiet_seconds is not None else settings.USER_SAVE_QUIET_SECONDS
+        self.max_delay_seconds = (max_delay_seconds if max_delay_seconds is not None
+                                  else settings.USER_SAVE_MAX_DELAY_SECONDS)
+        self.max_attempts = max_attempts or settings.USER_SAVE_MAX_ATTEMPTS
+        self._save = save or DataService.save_financial_data
+
+        self._pending: Dict[str, Dict[str, Any]] = {}  # user_id -> {section: latest value}
+        self._due: Dict[str, float] = {}  # user_id -> monotonic time to save at
+        self._first_edit: Dict[str, float] = {}  # user_id -> oldest unsaved edit
+        self._saving: Set[str] = set()
+        self._attempts: Dict[str, int] = {}  # user_id -> failed saves in a row (writer thread only)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.submitted = 0
+        self.saves = 0
+        self.failures = 0
+        self.rejected = 0
+
+        self._thread = threading.Thread(target=self._run, name="user-data-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id: str, section: str, value: Any) -> None:
+        """
+        Queue the new value of one section; never blocks on the database.
+
+        Args:
+            user_id: User ID
+            section: One of SECTIONS
+            value: Full section value (lists are saved as the user's whole collection)
+        """
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown section: {section}")
+        now = time.monotonic()
+        with self._cond:
+            self._pending.setdefault(user_id, {})[section] = value
+            first = self._first_edit.setdefault(user_id, now)
+            self._due[user_id] = min(now + self.quiet_seconds, first + self.max_delay_seconds)
+            self.submitted += 1
+            self._cond.notify_all()
+
+    def flush_user(self, user_id: str, wait: bool = False, timeout: float = 10.0) -> bool:
+        """
+        Save a user's queued sections now.
+
+        Args:
+            user_id: User ID
+            wait: Block until they are written (logout); otherwise only
+                hand them to the writer thread (navigation)
+            timeout: Max seconds to wait
+
+        Returns:
+            True if nothing is left queued or being saved for the user
+            (always True without wait)
+        """
+        with self._cond:
+            if user_id in self._pending:
+                self._due[user_id] = 0.0
+                self._cond.notify_all()
+            if not wait:
+                return True
+            return self._cond.wait_for(
+                lambda: user_id not in self._pending and user_id not in self._saving, timeout)
+
+    def pending(self, user_id: str) -> bool:
+        """Whether the user has edits that are not saved yet."""
+        with self._cond:
+            return user_id in self._pending or user_id in self._saving
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    ready = [user for user, due in self._due.items() if due <= now or self._closed]
+                    if ready or (self._closed and not self._pending):
+                        break
+                    next_due = min(self._due.values(), default=None)
+                    self._cond.wait(None if next_due is None else next_due - now)
+                batch = {}
+                for user_id in ready:
+                    batch[user_id] = self._pending.pop(user_id)
+                    del self._due[user_id]
+                    del self._first_edit[user_id]
+                self._saving.update(batch)
+                closed = self._closed and not self._pending
+
+            for user_id, sections in batch.items():
+                self._write(user_id, sections)
+
+            with self._cond:
+                self._saving.difference_update(batch)
+                self._cond.notify_all()
+            if closed:
+                return
+
+    def _save_each(self, user_id: str, sections: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Save sections one transaction each, dropping the ones the database rejects.
+
+        Returns:
+            Sections left unsaved for another reason (to retry)
+        """
+        # SECTIONS order: the snapshot goes in before the plan that links to it
+        ordered = [section for section in SECTIONS if section in sections]
+        for i, section in enumerate(ordered):
+            try:
+                if not self._save(user_id, **{section: sections[section]}):
+                    return {s: sections[s] for s in ordered[i:]}
+            except REJECTED_DATA_ERRORS:
+                self.rejected += 1
+                logger.error("Dropping %s for user %s: rejected by the database", section, user_id)
+        return {}
+
+    def _write(self, user_id: str, sections: Dict[str, Any]) -> None:
+        try:
+            if self._save(user_id, **sections):
+                sections = {}
+        except REJECTED_DATA_ERRORS:
+            sections = self._save_each(user_id, sections)
+        if not sections:
+            self.saves += 1
+            self._attempts.pop(user_id, None)
+            return
+        self.failures += 1
+        attempts = self._attempts[user_id] = self._attempts.get(user_id, 0) + 1
+        if attempts >= self.max_attempts:
+            del self._attempts[user_id]
+            logger.error("Dropping unsaved %s for user %s after %d attempts",
+                         ", ".join(sections), user_id, attempts)
+            return
+        if self._closed:
+            logger.error("Dropping unsaved %s for user %s at shutdown", ", ".join(sections), user_id)
+            return
+        logger.warning("Saving %s for user %s failed; retrying in %.1fs",
+                       ", ".join(sections), user_id, self.quiet_seconds)
+        with self._cond:
+            # Edits made while this save ran are newer; keep them
+            queued = self._pending.setdefault(user_id, {})
+            for section, value in sections.items():
+                queued.setdefault(section, value)
+            now = time.monotonic()
+            self._first_edit.setdefault(user_id, now)
+            self._due.setdefault(user_id, now + self.quiet_seconds)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Save everything queued and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+
+_writer: Optional[UserDataWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_user_data_writer() -> UserDataWriter:
+    """Process-shared writer, flushed at interpreter exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = UserDataWriter()
+                atexit.register(_writer.close)
+    return _writer
@@ -0,0 +1,151 @@
+"""
+Plotly figures for the dashboard, built once per distinct input.
+
+The four health gauges are one figure with four indicator subplots,
+so one chart element (and one copy of the layout template) is sent
+instead of four. Figures are cached per input values in
+st.cache_resource. That cache is shared by every session: users with the
+same scores (rounded to 0.1 by the calculator) reuse one figure object,
+and reruns produce byte-identical specs, so the frontend keeps the chart
+mounted. Callers must treat returned figures as read-only.
+"""
+from typing import Dict, Tuple
+
+import plotly.graph_objects as go
+import streamlit as st
+from plotly.subplots import make_subplots
+
+CACHE_ENTRIES = 1024
+
+GAUGES = (
+    ("emergency_fund", "Emergency Fund"),
+    ("savings", "Savings Rate"),
+    ("debt", "Debt Health"),
+    ("overall_health", "Overall Health"),
+)
+
+
+def _gauge(value: float, title: str) -> go.Indicator:
+    return go.Indicator(
+        mode="gauge+number",
+        value=value,
+        title={'text': title},
+        gauge={
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "#6366f1"},
+            'steps': [
+                {'range': [0, 33], 'color': "#fecaca"},
+                {'range': [33, 66], 'color': "#fde68a"},
+                {'range': [66, 100], 'color': "#bbf7d0"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 75
+            }
+        }
+    )
+
+
+def build_health_gauges(values: Tuple[float, ...]) -> go.Figure:
+    """One row of gauges, one per GAUGES entry, in the same order as values."""
+    fig = make_subplots(rows=1, cols=len(GAUGES), specs=[[{'type': 'indicator'}] * len(GAUGES)],
+                        horizontal_spacing=0.08)
+    for col, (value, (_, title)) in enumerate(zip(values, GAUGES), start=1):
+        fig.add_trace(_gauge(value, title), row=1, col=col)
+    fig.update_layout(height=220, margin=dict(l=30, r=30, t=50, b=20))
+    return fig
+
+
+@st.cache_resource(max_entries=CACHE_ENTRIES, show_spinner=False)
+def _health_gauges(values: Tuple[float, ...]) -> go.Figure:
+    return build_health_gauges(values)
+
+
+def health_gauges(scores: Dict[str, float]) -> go.Figure:
+    """
+    Cached gauge row for analysis scores.
+
+    Args:
+        scores: FinancialCalculator scores (emergency_fund, savings, debt, overall_health)
+
+    Returns:
+        Shared figure (do not modify)
+    """
+    return _health_gauges(tuple(float(scores[key]) for key, _ in GAUGES))
+
+
+@st.cache_resource(max_entries=CACHE_ENTRIES, show_spinner=False)
+def income_expense_chart(income: float, expenses: float, surplus: float) -> go.Figure:
+    """Cached income / expenses / surplus bar chart (shared figure, do not modify)."""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        name='Monthly',
+        x=['Income', 'Expenses', 'Surplus'],
+        y=[income, expenses, surplus],
+        marker_color=['#10b981', '#ef4444', '#6366f1']
+    ))
+    fig.update_layout(
+        height=300,
+        showlegend=False,
+        yaxis_title="Amount (₹)",
+        template="plotly_white"
+    )
+    return fig
+
+
+@st.cache_resource(max_entries=CACHE_ENTRIES, show_spinner=False)
+def assets_liabilities_chart(assets: float, liabilities: float) -> go.Figure:
+    """Cached assets vs liabilities donut chart (shared figure, do not modify)."""
+    fig = go.Figure(data=[go.Pie(
+        labels=['Assets', 'Liabilities'],
+        values=[assets, liabilities],
+        marker_colors=['#10b981', '#ef4444'],
+        hole=0.4
+    )])
+    fig.update_layout(
+        height=300,
+        showlegend=True,
+        template="plotly_white"
+    )
+    return fig
+
+
+@st.cache_resource(max_entries=CACHE_ENTRIES, show_spinner=False)
+def goals_overview_chart(names: Tuple[str, ...], targets: Tuple[float, ...],
+                         progress: Tuple[float, ...]) -> go.Figure:
+    """
+    Cached target vs progress bars for all goals as two traces (shared figure, do not modify).
+
+    Args:
+        names: Goal names (x categories)
+        targets: Target amounts, aligned with names
+        progress: Amounts saved so far, aligned with names
+    """
+    fig = go.Figure([
+        go.Bar(
+            name='Target',
+            x=names,
+            y=targets,
+            text=[f"₹{value:,.0f}" for value in targets],
+            textposition='auto',
+            marker_color='lightgray',
+        ),
+        go.Bar(
+            name='Progress',
+            x=names,
+            y=progress,
+            text=[f"₹{value:,.0f}" for value in progress],
+            textposition='auto',
+            marker_color='#6366f1',
+        ),
+    ])
+    fig.update_layout(
+        title="Goals Progress Overview",
+        barmode='overlay',
+        height=300,
+        showlegend=False,
+        yaxis_title="Amount (₹)",
+        template="plotly_white"
+    )
+    return fig
@@ -0,0 +1,216 @@
+"""
+Guest data in st.session_state, backed by the shared session store.
+
+Pages call load_guest_data() with the sections they read at the top of
+each run, and save_guest_data() at the end of each run (and of each
+fragment run). Within one process the GuestData object in session_state
+is used as is; the store is only read for sections this session has not
+loaded yet (a new replica, a restart, a reload), and only sections whose
+structural hash changed since the last save are written.
+
+The session ID unlocks the guest's financial data, so it is kept in a
+SameSite cookie (sent with the websocket handshake, read through
+st.context.cookies) rather than in the URL, where history, bookmarks,
+shared links and referrers would leak it. A reconnect to any replica
+finds the same data. A `sid` query parameter left by older versions is
+removed and not honoured.
+
+On signup/login, migrate_guest_session() writes the guest data to the
+account, replaces it with the merged account data and rotates the
+session ID.
+"""
+import json
+import re
+import secrets
+from typing import Sequence
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from config import settings
+
+from models.session import Asset, Goal, GuestData, Liability, Snapshot, as_guest_data
+from services.session_store import SECTIONS, get_session_store, section_hash
+
+SID_COOKIE = "sid"
+SID_PARAM = "sid"  # legacy URL parameter, only ever removed
+_SID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+# Value for a section the store has nothing for; analysis stays unset
+# (pages check 'analysis' in guest_data)
+_DEFAULTS = {
+    "snapshot": Snapshot,
+    "assets": list,
+    "liabilities": list,
+    "goals": list,
+    "plan": lambda: None,
+}
+
+# Record types for the account rows migrate_guest_session() loads
+_RECORDS = {"assets": Asset, "liabilities": Liability, "goals": Goal}
+
+# Goal fields the account does not store (or stores as an enum value):
+# a migrated goal keeps them from its session copy
+_SESSION_GOAL_FIELDS = ("category", "current_progress", "required_monthly", "created_at")
+# Goals-page labels for account goals the session never had
+_GOAL_CATEGORY_LABELS = {
+    "emergency": "Emergency",
+    "short_term": "Short-term (< 3 years)",
+    "medium_term": "Medium-term (3-5 years)",
+    "long_term": "Long-term (5+ years)",
+    "retirement": "Retirement",
+}
+
+
+def _set_cookie(sid: str) -> None:
+    """Store sid in the browser's cookie (a zero-height same-origin component runs the script)."""
+    components.html(
+        "<script>"
+        f"window.parent.document.cookie = {json.dumps(f'{SID_COOKIE}={sid}')}"
+        f" + '; Path=/; Max-Age={settings.SESSION_TTL_SECONDS}; SameSite=Strict'"
+        " + (window.parent.location.protocol === 'https:' ? '; Secure' : '');"
+        "</script>",
+        height=0,
+    )
+
+
+def session_id() -> str:
+    """This session's store ID, from the cookie or newly generated (and then set as the cookie)."""
+    if SID_PARAM in st.query_params:
+        del st.query_params[SID_PARAM]
+    sid = st.session_state.get("sid")
+    if sid is None:
+        candidate = st.context.cookies.get(SID_COOKIE)
+        # Not a str without a browser connection (e.g. under AppTest)
+        if isinstance(candidate, str) and _SID_PATTERN.match(candidate):
+            sid = candidate
+        else:
+            sid = secrets.token_urlsafe(16)
+            _set_cookie(sid)
+        st.session_state.sid = sid
+    return sid
+
+
+def rotate_session_id() -> str:
+    """
+    Move the session to a new store ID, dropping the old one's data.
+
+    Called on login so an ID seen before (e.g. on a shared device) no
+    longer reaches the account's data. Every section is rewritten under
+    the new ID at the next save_guest_data().
+
+    Returns:
+        The new session ID
+    """
+    old = st.session_state.get("sid")
+    sid = secrets.token_urlsafe(16)
+    st.session_state.sid = sid
+    st.session_state._guest_saved = {}
+    _set_cookie(sid)
+    if old is not None:
+        get_session_store().delete(old)
+    return sid
+
+
+def load_guest_data(sections: Sequence[str]) -> GuestData:
+    """
+    The session's GuestData with at least `sections` loaded.
+
+    Args:
+        sections: GuestData fields the page reads
+
+    Returns:
+        The object stored in st.session_state.guest_data
+    """
+    current = st.session_state.get("guest_data")
+    guest_data = GuestData() if current is None else as_guest_data(current)
+    saved = st.session_state.setdefault("_guest_saved", {})
+
+    missing = [section for section in sections if section not in saved and section not in guest_data]
+    if missing:
+        stored = get_session_store().load(session_id(), missing)
+        for section in missing:
+            if section in stored:
+                guest_data[section] = stored[section]
+            elif section in _DEFAULTS:
+                guest_data[section] = _DEFAULTS[section]()
+            else:
+                saved[section] = None
+                continue
+            saved[section] = section_hash(section, guest_data[section])
+
+    st.session_state.guest_data = guest_data
+    return guest_data
+
+
+def save_guest_data() -> None:
+    """Queue the sections that changed since the last save (write-behind)."""
+    current = st.session_state.get("guest_data")
+    if current is None:
+        return
+    guest_data = as_guest_data(current)
+    saved = st.session_state.setdefault("_guest_saved", {})
+
+    changed = {}
+    for section, value in guest_data.items():
+        digest = section_hash(section, value)
+        if saved.get(section) != digest:
+            changed[section] = (value, digest)
+    if not changed:
+        return
+
+    store, sid = get_session_store(), session_id()
+    for section, (value, digest) in changed.items():
+        store.put(sid, section, value)
+        saved[section] = digest
+
+
+def _merge_goals(session_goals: Sequence[Goal], account_rows: Sequence[dict]) -> list:
+    """Account goal rows as Goals, keeping session-only fields of the goals matched by name."""
+    from services.guest_migration import _natural_key
+
+    kept = {_natural_key(goal, ("name",)): goal for goal in session_goals}
+    goals = []
+    for row in account_rows:
+        session_goal = kept.get(_natural_key(row, ("name",)))
+        if session_goal is not None:
+            row = {**row, **{field: session_goal[field] for field in _SESSION_GOAL_FIELDS if field in session_goal}}
+        elif row.get("category") in _GOAL_CATEGORY_LABELS:
+            row = {**row, "category": _GOAL_CATEGORY_LABELS[row["category"]]}
+        goals.append(Goal.from_dict(row))
+    return goals
+
+
+def migrate_guest_session(user_id: str, strategy: str = "merge") -> bool:
+    """
+    Move this session's guest data into an account after signup/login.
+
+    Args:
+        user_id: ID of the account signed up for or logged into
+        strategy: "merge" or "replace" (see services.guest_migration)
+
+    Returns:
+        True if the data was written; the session is then logged in
+        (user_id, plan_id), guest_data holds the merged account data and
+        the session ID has been rotated
+    """
+    from services.guest_migration import GuestMigrationService  # pulls in SQLAlchemy
+
+    guest_data = load_guest_data(SECTIONS)
+    result = GuestMigrationService.migrate(user_id, guest_data, strategy)
+    if result is None:
+        return False
+
+    for section, value in result['data'].items():
+        if section == "goals":
+            value = _merge_goals(guest_data["goals"], value)
+        elif section in _RECORDS:
+            value = [_RECORDS[section].from_dict(row) for row in value]
+        if value is not None:
+            guest_data[section] = value
+    st.session_state.user_id = user_id
+    if result['plan_id']:
+        st.session_state.plan_id = result['plan_id']
+    rotate_session_id()
+    save_guest_data()
+    return True
@@ -0,0 +1,53 @@
+"""
+Per-page instrumentation hooks for Streamlit scripts.
+
+Every page calls begin_page() at the top and end_page() at the bottom, so
+one place decides what is measured per rerun: render time (utils.metrics)
+and the statements issued during the run (utils.query_profiler).
+"""
+import logging
+from typing import Any, Dict
+
+from config import settings
+from utils import metrics, query_profiler
+
+logger = logging.getLogger(__name__)
+
+
+def begin_page(page: str) -> Dict[str, Any]:
+    """
+    Start instrumentation for one script run of page.
+
+    Returns:
+        Opaque state to hand back to end_page()
+    """
+    state: Dict[str, Any] = {"render": metrics.start_page_render(page)}
+    if settings.QUERY_PROFILING_ENABLED:
+        state["profile"] = query_profiler.start_profile(f"page:{page}")
+    return state
+
+
+def end_page(page: str, state: Dict[str, Any]) -> None:
+    """
+    Finish instrumentation started by begin_page().
+
+    Query budget violations are logged; with QUERY_BUDGET_STRICT they raise
+    QueryBudgetExceeded so tests and local runs fail loudly.
+    """
+    metrics.finish_page_render(page, state.get("render"))
+
+    token = state.get("profile")
+    if token is None:
+        return
+
+    profile = query_profiler.end_profile(token)
+    budget = query_profiler.PAGE_QUERY_BUDGETS.get(page)
+    if profile is None or budget is None:
+        return
+
+    violations = query_profiler.check_budget(profile, budget)
+    repeated = profile.repeated()
+    if violations or repeated:
+        logger.warning("%s\n%s", "\n".join(violations) or "repeated statements", profile.report())
+    if violations and settings.QUERY_BUDGET_STRICT:
+        raise query_profiler.QueryBudgetExceeded("\n".join(violations) + "\n" + profile.report())
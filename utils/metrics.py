@@ -0,0 +1,324 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Counters and histograms for the hot paths (calculator, services, bcrypt,
+DB connection checkout, page render). Metrics are off unless
+METRICS_ENABLED is set; when off, the instrumentation decorators return
+the original functions untouched and the helper calls return immediately,
+so the disabled cost is a single flag check at most.
+
+Exposition:
+    Set METRICS_PORT to serve GET /metrics from a daemon thread, or call
+    render_prometheus() to embed the text in another server.
+"""
+import bisect
+import functools
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_ENABLED = settings.METRICS_ENABLED
+PREFIX = "finance_coach"
+
+# Seconds; covers sub-millisecond calculator calls up to slow bcrypt/DB work
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def is_enabled() -> bool:
+    """Whether metrics collection is enabled for this process."""
+    return _ENABLED
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def expose(self) -> Iterable[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(key)} {value:g}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelKey, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            slots = self._values.get(key)
+            if slots is None:
+                slots = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            slots[index] += 1
+            slots[-1] += value
+
+    def count(self, **labels: Any) -> int:
+        slots = self._values.get(_label_key(labels))
+        return sum(slots[:-1]) if slots else 0
+
+    def expose(self) -> Iterable[str]:
+        with self._lock:
+            items = [(key, list(slots)) for key, slots in self._values.items()]
+        for key, slots in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, slots):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}"
+            cumulative += slots[len(self.buckets)]
+            yield f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {slots[-1]:.9g}"
+            yield f"{self.name}_count{_format_labels(key)} {cumulative}"
+
+
+class Registry:
+    """Holds all metrics of the process, keyed by name."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CALL_SECONDS = REGISTRY.histogram(f"{PREFIX}_call_seconds", "Service and calculator call latency")
+CALL_ERRORS = REGISTRY.counter(f"{PREFIX}_errors_total", "Errors raised or handled inside service calls")
+BCRYPT_SECONDS = REGISTRY.histogram(f"{PREFIX}_bcrypt_seconds", "bcrypt hash/verify latency")
+DB_CHECKOUTS = REGISTRY.counter(f"{PREFIX}_db_checkouts_total", "DB connections checked out of the pool")
+DB_CHECKOUT_HELD = REGISTRY.histogram(f"{PREFIX}_db_connection_held_seconds", "Time a DB connection stays checked out")
+PAGE_RENDER_SECONDS = REGISTRY.histogram(f"{PREFIX}_page_render_seconds", "Streamlit page script run time")
+EXPLANATION_CACHE_LOOKUPS = REGISTRY.counter(f"{PREFIX}_explanation_cache_lookups_total",
+                                             "Explanation cache lookups by result (exact, similar, miss)")
+# Seconds; model loads and cold starts take seconds to minutes
+SLOW_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+MODEL_LOAD_SECONDS = REGISTRY.histogram(f"{PREFIX}_model_load_seconds", "Model load time", buckets=SLOW_BUCKETS)
+FIRST_RESPONSE_SECONDS = REGISTRY.histogram(f"{PREFIX}_startup_to_first_response_seconds",
+                                            "Process start to first model-backed response", buckets=SLOW_BUCKETS)
+
+
+def timed(histogram: Histogram, **labels: Any) -> Callable:
+    """
+    Decorator recording a function's latency into histogram.
+
+    Returns the function unchanged when metrics are disabled.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not _ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+def instrument_class(component: str) -> Callable:
+    """
+    Class decorator timing every public staticmethod of a service class.
+
+    Latency goes to finance_coach_call_seconds{component, method}; exceptions
+    escaping a call are counted in finance_coach_errors_total.
+    """
+    def decorator(cls):
+        if not _ENABLED:
+            return cls
+
+        for name, attr in list(vars(cls).items()):
+            if name.startswith("_") or not isinstance(attr, staticmethod):
+                continue
+            setattr(cls, name, staticmethod(_wrap_call(attr.__func__, component, name)))
+        return cls
+    return decorator
+
+
+def _wrap_call(func: Callable, component: str, method: str) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            CALL_ERRORS.inc(component=component, method=method)
+            raise
+        finally:
+            CALL_SECONDS.observe(time.perf_counter() - start, component=component, method=method)
+    return wrapper
+
+
+def record_error(component: str, method: str) -> None:
+    """Count an error that was handled (and swallowed) inside a service call."""
+    if _ENABLED:
+        CALL_ERRORS.inc(component=component, method=method)
+
+
+def instrument_engine(engine) -> None:
+    """Count pool checkouts and time how long each connection is held."""
+    if not _ENABLED:
+        return
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_CHECKOUTS.inc()
+        connection_record.info["metrics_checkout_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("metrics_checkout_at", None)
+        if started is not None:
+            DB_CHECKOUT_HELD.observe(time.perf_counter() - started)
+
+
+def start_page_render(page: str) -> Optional[float]:
+    """
+    Mark the start of a page script run.
+
+    Also makes sure the exporter is running. Pair with finish_page_render();
+    runs cut short by st.rerun()/st.switch_page() are simply not recorded.
+    """
+    if not _ENABLED:
+        return None
+    ensure_exporter()
+    return time.perf_counter()
+
+
+def finish_page_render(page: str, started: Optional[float]) -> None:
+    """Record the page run time started by start_page_render()."""
+    if started is not None:
+        PAGE_RENDER_SECONDS.observe(time.perf_counter() - started, page=page)
+
+
+def render_prometheus() -> str:
+    """Current metrics in Prometheus text format."""
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood stderr
+        pass
+
+
+_exporter: Optional[ThreadingHTTPServer] = None
+_exporter_attempted = False
+_exporter_lock = threading.Lock()
+
+
+def ensure_exporter(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Start the /metrics HTTP endpoint once per process.
+
+    Args:
+        port: Port to bind (defaults to settings.METRICS_PORT)
+
+    Returns:
+        The running server, or None if disabled / no port configured
+    """
+    global _exporter, _exporter_attempted
+
+    port = port if port is not None else settings.METRICS_PORT
+    if not _ENABLED or not port or _exporter_attempted:
+        return _exporter
+
+    with _exporter_lock:
+        if not _exporter_attempted:
+            _exporter_attempted = True
+            try:
+                _exporter = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                # Another worker on this host already owns the port
+                logger.warning("Metrics exporter not started on port %s: %s", port, e)
+                return None
+            thread = threading.Thread(target=_exporter.serve_forever, name="metrics-exporter", daemon=True)
+            thread.start()
+        return _exporter
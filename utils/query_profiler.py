@@ -0,0 +1,265 @@
+"""
+SQLAlchemy query profiler with N+1 detection and query budgets.
+
+Hooks the engine's before/after_cursor_execute events and attributes every
+statement to the active QueryProfile: one per Streamlit rerun (opened by
+utils.instrumentation.begin_page) or per explicit profile_queries() block.
+Statements are normalized (literals and IN-lists stripped) so the same query
+issued in a loop shows up as one repeated statement - the N+1 signature of
+lazy relationship loads.
+
+Engines are only hooked when profiling is on (QUERY_PROFILING_ENABLED,
+or once profile_queries() / query_budget() is used), so production
+statements pay nothing for it.
+
+Usage in tests:
+    with query_budget(3):
+        DataService.load_user_data(user_id)
+
+    with query_budget(PAGE_QUERY_BUDGETS["dashboard"], all_threads=True):
+        AppTest.from_file("pages/2_dashboard.py").run()
+
+python -m benchmarks.query_budgets runs every page this way and exits 1
+when one is over budget (for CI).
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Max statements per page script run. Guest mode touches no tables; logged-in
+# onboarding saves snapshot, assets and liabilities.
+PAGE_QUERY_BUDGETS: Dict[str, int] = {
+    "landing": 0,
+    "onboarding": 12,
+    "dashboard": 4,
+    "goals": 4,
+}
+
+# Same normalized statement this many times in one profile is flagged
+REPEAT_THRESHOLD = 2
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape.
+
+    Literals and bind placeholders become '?', IN-lists collapse to IN (?...),
+    whitespace is squeezed.
+    """
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("IN (?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a profiled block runs more statements than its budget."""
+
+
+class QueryProfile:
+    """Statements recorded for one rerun, request or profiled block."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.statements: List[Tuple[str, float]] = []  # (normalized sql, seconds)
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        normalized = normalize_sql(statement)
+        with self._lock:
+            self.statements.append((normalized, duration))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_time(self) -> float:
+        return sum(duration for _, duration in self.statements)
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> Dict[str, int]:
+        """Normalized statements executed at least threshold times."""
+        counts = Counter(sql for sql, _ in self.statements)
+        return {sql: n for sql, n in counts.most_common() if n >= threshold}
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "label": self.label,
+            "count": self.count,
+            "total_ms": round(self.total_time * 1000, 3),
+            "repeated": self.repeated(),
+        }
+
+    def report(self) -> str:
+        """Multi-line human-readable report, slowest statement shapes first."""
+        totals: Dict[str, List[float]] = {}
+        for sql, duration in self.statements:
+            totals.setdefault(sql, []).append(duration)
+        lines = [f"{self.label}: {self.count} statements, {self.total_time * 1000:.1f} ms"]
+        for sql, durations in sorted(totals.items(), key=lambda item: -sum(item[1])):
+            flag = "  <-- repeated" if len(durations) >= REPEAT_THRESHOLD else ""
+            lines.append(f"  {len(durations):>4}x {sum(durations) * 1000:8.2f} ms  {sql[:160]}{flag}")
+        return "\n".join(lines)
+
+
+_current: contextvars.ContextVar[Optional[QueryProfile]] = contextvars.ContextVar("query_profile", default=None)
+# Profiles capturing statements from every thread (AppTest runs pages off-thread)
+_global_profiles: List[QueryProfile] = []
+_global_lock = threading.Lock()
+_engines: List[object] = []  # every engine created, hooked or not
+_installed_engines = set()
+_enabled = False
+
+
+def register(engine) -> None:
+    """
+    Note a new engine; hook it now if profiling is on.
+
+    Profiling is on with QUERY_PROFILING_ENABLED, or once profile_queries()
+    has been used in this process; otherwise statements run unhooked.
+    """
+    from config import settings
+
+    with _global_lock:
+        _engines.append(engine)
+    if _enabled or settings.QUERY_PROFILING_ENABLED:
+        install(engine)
+
+
+def enable() -> None:
+    """Hook every engine, existing and future (profile_queries() calls this)."""
+    global _enabled
+    _enabled = True
+    with _global_lock:
+        engines = list(_engines)
+    for engine in engines:
+        install(engine)
+
+
+def install(engine) -> None:
+    """Attach the profiler to an engine (idempotent)."""
+    with _global_lock:
+        if id(engine) in _installed_engines:
+            return
+        _installed_engines.add(id(engine))
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_profiler_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its start
+        conn = exception_context.connection
+        if conn is not None and exception_context.execution_context is not None:
+            starts = conn.info.get("query_profiler_start")
+            if starts:
+                starts.pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_profiler_start"].pop()
+        profile = _current.get()
+        if profile is None and not _global_profiles:
+            return
+        duration = time.perf_counter() - started
+        if profile is not None:
+            profile.record(statement, duration)
+        for global_profile in list(_global_profiles):
+            if global_profile is not profile:
+                global_profile.record(statement, duration)
+
+
+def start_profile(label: str) -> contextvars.Token:
+    """Make a new profile current for this thread/context; returns a reset token."""
+    return _current.set(QueryProfile(label))
+
+
+def current_profile() -> Optional[QueryProfile]:
+    """Profile statements are currently attributed to, if any."""
+    return _current.get()
+
+
+def end_profile(token: contextvars.Token) -> Optional[QueryProfile]:
+    """Close the profile opened by start_profile() and return it."""
+    profile = _current.get()
+    _current.reset(token)
+    return profile
+
+
+@contextmanager
+def profile_queries(label: str = "block", all_threads: bool = False) -> Iterator[QueryProfile]:
+    """
+    Record statements issued inside the block.
+
+    Args:
+        label: Name shown in reports
+        all_threads: Also capture statements from other threads (e.g. the
+            AppTest script thread); otherwise only this context is profiled
+    """
+    enable()
+    if all_threads:
+        profile = QueryProfile(label)
+        with _global_lock:
+            _global_profiles.append(profile)
+        try:
+            yield profile
+        finally:
+            with _global_lock:
+                _global_profiles.remove(profile)
+    else:
+        token = start_profile(label)
+        try:
+            yield _current.get()
+        finally:
+            _current.reset(token)
+
+
+def check_budget(profile: QueryProfile, max_queries: int, allow_repeats: bool = True) -> List[str]:
+    """
+    List budget violations for a finished profile (empty if within budget).
+
+    Args:
+        profile: Finished profile
+        max_queries: Maximum statements allowed
+        allow_repeats: If False, any repeated statement shape is a violation
+    """
+    violations = []
+    if profile.count > max_queries:
+        violations.append(f"{profile.label}: {profile.count} statements exceeds budget of {max_queries}")
+    if not allow_repeats:
+        for sql, n in profile.repeated().items():
+            violations.append(f"{profile.label}: statement repeated {n}x (possible N+1): {sql[:160]}")
+    return violations
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block", allow_repeats: bool = True,
+                 all_threads: bool = False) -> Iterator[QueryProfile]:
+    """
+    Fail the block if it exceeds max_queries statements.
+
+    Raises:
+        QueryBudgetExceeded: With the full profile report attached
+    """
+    with profile_queries(label, all_threads=all_threads) as profile:
+        yield profile
+    violations = check_budget(profile, max_queries, allow_repeats)
+    if violations:
+        raise QueryBudgetExceeded("\n".join(violations) + "\n" + profile.report())
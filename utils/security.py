@@ -8,11 +8,13 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from config import settings
+from utils.metrics import timed, BCRYPT_SECONDS
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@timed(BCRYPT_SECONDS, op="hash")
 def hash_password(password: str) -> str:
     """
     Hash a plain text password using bcrypt.
@@ -26,6 +28,7 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
+@timed(BCRYPT_SECONDS, op="verify")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain text password against a hashed password.
@@ -0,0 +1,266 @@
+"""
+Lightweight in-process tracing.
+
+Spans are context managers with parent/child links, attributes and
+nanosecond timings, propagated through contextvars:
+
+    with span("plan.generate", user_id=user_id) as s:
+        ...
+        s.set_attribute("actions", 3)
+
+A trace is exported when its root span ends, if it was head-sampled
+(TRACE_SAMPLE_RATE) or ran longer than TRACE_SLOW_MS - so slow, tail-latency
+requests are always kept for offline inspection even at low sample rates.
+Exporters append to a local file, either one span per line (jsonl) or one
+OTLP/JSON ExportTraceServiceRequest per line (otlp), which OpenTelemetry
+collectors' file receivers and most trace viewers can ingest.
+
+When TRACING_ENABLED is off, span() hands back a shared no-op object and the
+class/function decorators leave code unwrapped.
+"""
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import settings
+
+_ENABLED = settings.TRACING_ENABLED
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, trace: "_Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned by span() when tracing is off or the trace is not recorded."""
+
+    __slots__ = ()
+    trace_id = span_id = parent_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Trace:
+    """Spans sharing one root; exported as a unit when the root ends."""
+
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        self.spans: List[Span] = []
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class JsonlExporter:
+    """Appends one JSON span per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class OtlpJsonExporter:
+    """Appends one OTLP/JSON ExportTraceServiceRequest per trace per line."""
+
+    def __init__(self, path: str, service_name: str = "finance-coach"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def export(self, spans: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "finance_coach.tracing"},
+                    "spans": [{
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        "parentSpanId": s.parent_id or "",
+                        "name": s.name,
+                        "kind": 1,  # SPAN_KIND_INTERNAL
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns),
+                        "attributes": [self._attribute(k, v) for k, v in s.attributes.items()],
+                        "status": {"code": 2 if s.status == "error" else 1},
+                    } for s in spans],
+                }],
+            }]
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, default=str) + "\n")
+
+
+class InMemoryExporter:
+    """Keeps exported spans in a list (for inspection and tests)."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+
+def _default_exporter():
+    if settings.TRACE_EXPORT_FORMAT == "otlp":
+        return OtlpJsonExporter(settings.TRACE_EXPORT_PATH)
+    return JsonlExporter(settings.TRACE_EXPORT_PATH)
+
+
+_exporter = _default_exporter() if _ENABLED else None
+_sample_rate = settings.TRACE_SAMPLE_RATE
+_slow_ms = settings.TRACE_SLOW_MS
+
+
+def configure(exporter: Any = None, sample_rate: Optional[float] = None, slow_ms: Optional[float] = None,
+              enabled: Optional[bool] = None) -> None:
+    """
+    Override exporter and sampling at runtime.
+
+    Note that trace_class()/traced() decide whether to wrap at import time,
+    so enabling here only affects explicit span() blocks in already-imported code.
+    """
+    global _exporter, _sample_rate, _slow_ms, _ENABLED
+    if exporter is not None:
+        _exporter = exporter
+    if sample_rate is not None:
+        _sample_rate = sample_rate
+    if slow_ms is not None:
+        _slow_ms = slow_ms
+    if enabled is not None:
+        _ENABLED = enabled
+
+
+def current_span() -> Optional[Span]:
+    """Innermost active span, if any."""
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Time a block as a span, child of the current span if there is one.
+
+    Yields:
+        The Span (or a no-op stand-in when tracing is off)
+    """
+    if not _ENABLED:
+        yield _NOOP
+        return
+
+    parent = _current_span.get()
+    trace = parent.trace if parent is not None else _Trace(sampled=random.random() < _sample_rate)
+    current = Span(trace, name, parent.span_id if parent is not None else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.spans.append(current)
+        if parent is None:
+            _finish_trace(trace, current)
+
+
+def _finish_trace(trace: _Trace, root: Span) -> None:
+    keep = trace.sampled or (_slow_ms is not None and root.duration_ms >= _slow_ms)
+    if keep and _exporter is not None:
+        root.attributes.setdefault("sampled", "head" if trace.sampled else "slow")
+        _exporter.export(trace.spans)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator running a function inside a span (unwrapped when tracing is off)."""
+    def decorator(func: Callable) -> Callable:
+        if not _ENABLED:
+            return func
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_class(component: str) -> Callable:
+    """Class decorator putting every public staticmethod in a '<component>.<method>' span."""
+    def decorator(cls):
+        if not _ENABLED:
+            return cls
+        for attr_name, attr in list(vars(cls).items()):
+            if attr_name.startswith("_") or not isinstance(attr, staticmethod):
+                continue
+            setattr(cls, attr_name, staticmethod(traced(f"{component}.{attr_name}")(attr.__func__)))
+        return cls
+    return decorator
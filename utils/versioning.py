@@ -0,0 +1,55 @@
+"""
+Version tokens (ETags) for cheap conditional reads.
+
+A version token is a short hash over values that change whenever the
+underlying rows change (latest row id, row count, newest updated_at).
+Callers keep the token from a previous read and pass it back; if it still
+matches, the service answers "not modified" without loading the payload.
+"""
+import hashlib
+from typing import Any, Optional
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from version parts.
+
+    Args:
+        *parts: Values identifying the current version (ids, counts, timestamps)
+
+    Returns:
+        Quoted ETag string, e.g. '"3f2a9c..."'
+    """
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """
+    Check an ETag against an If-None-Match value.
+
+    Accepts a single token, a comma-separated list, weak tokens (W/"...")
+    or "*", following HTTP conditional-request semantics.
+
+    Args:
+        etag: Current ETag of the resource
+        if_none_match: Token(s) the client already has, or None
+
+    Returns:
+        True if the client copy is still current
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False